@@ -0,0 +1,167 @@
+"""
+Batch queries over a process pool
+
+The compiled graph is placed in shared memory once (or, if it was loaded from the
+binary cache, simply memory-mapped again by every worker), so workers attach to the
+same arrays instead of receiving a pickled copy of G/Dist/Cost.
+"""
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from multiprocessing import shared_memory
+
+import os
+import numpy as np
+
+from task3 import *
+from graph_cache import load_graph_cache
+
+ARRAYS = ("labels", "offsets", "targets", "tails", "dist", "energy", "coords")
+
+
+"""
+SharedGraph
+- copies the arrays of a CompiledGraph into multiprocessing.shared_memory blocks
+- description is a small picklable value that attach() turns back into a
+  CompiledGraph in any process, without copying the arrays
+- a graph loaded from the binary cache is described by its cache folder instead,
+  since memory-mapping the cache already shares the pages between processes
+- use as a context manager so the blocks are released afterwards
+"""
+class SharedGraph:
+
+    def __init__(self, graph):
+        self.blocks = []
+
+        if graph.cache_folder is not None:
+            self.description = ("cache", str(graph.cache_folder))
+            return
+
+        arrays = {}
+        for name in ARRAYS:
+            array = getattr(graph, name)
+            if array is None:
+                continue
+            array = np.ascontiguousarray(np.asarray(array))
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, array.dtype, buffer=block.buf)[...] = array
+            self.blocks.append(block)
+            arrays[name] = (block.name, array.dtype.str, array.shape)
+        self.description = ("shared_memory", arrays)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+    """
+    attach
+    - output:
+        - (CompiledGraph, blocks to keep open while the graph is in use)
+    """
+    @staticmethod
+    def attach(description):
+        kind, value = description
+        if kind == "cache":
+            return load_graph_cache(value), []
+
+        arrays = dict.fromkeys(ARRAYS)
+        blocks = []
+        for name, (block_name, dtype, shape) in value.items():
+            block = shared_memory.SharedMemory(name=block_name)
+            blocks.append(block)
+            arrays[name] = np.ndarray(shape, np.dtype(dtype), buffer=block.buf)
+        graph = CompiledGraph(
+            arrays["labels"], arrays["offsets"], arrays["targets"], arrays["dist"],
+            arrays["energy"], arrays["coords"], arrays["tails"],
+        )
+        return graph, blocks
+
+
+# graph of each worker process, attached once when the worker starts
+worker_graph = None
+worker_blocks = []
+
+
+def init_worker(description):
+    global worker_graph, worker_blocks
+    worker_graph, worker_blocks = SharedGraph.attach(description)
+
+
+"""
+run_query
+- answers one (s, d, energy_budget) query on graph
+- find_path_astar is used when options contain a heuristic_func, find_path otherwise
+- errors such as NoPathError are returned, not raised, so one bad query does not stop a batch
+"""
+def run_query(graph, query, options):
+    s, d, energy_budget = query
+    try:
+        if options.get("heuristic_func"):
+            return find_path_astar(graph, s, d, energy_budget=energy_budget, **options)
+        return find_path(graph, s, d, energy_budget=energy_budget, **options)
+    except Exception as error:
+        return error
+
+
+def run_chunk(chunk, options):
+    return [(index, run_query(worker_graph, query, options)) for index, query in chunk]
+
+
+"""
+find_paths_batch
+- arguments:
+    - graph: a CompiledGraph
+    - queries: iterable of (s, d, energy_budget)
+    - workers: number of worker processes (default: number of CPUs)
+    - ordered: yield results in input order (True) or as soon as they are done (False)
+    - chunksize: queries sent to a worker at a time
+    - options: passed to find_path, e.g. engine="label"; options must be picklable
+- output:
+    - generator of (index in queries, PathInfo or the exception raised by that query)
+"""
+def find_paths_batch(graph, queries, workers=None, ordered=True, chunksize=16, **options):
+
+    workers = workers or os.cpu_count()
+    queries = iter(enumerate(queries))
+
+    def next_chunk():
+        chunk = []
+        for item in queries:
+            chunk.append(item)
+            if len(chunk) == chunksize:
+                break
+        return chunk
+
+    with SharedGraph(graph) as shared, ProcessPoolExecutor(
+            workers, initializer=init_worker, initargs=(shared.description,)) as executor:
+
+        # keep a few chunks per worker in flight, so the queries are not all submitted at once
+        pending = set()
+        finished = {}
+        next_index = 0
+        while True:
+            while len(pending) < 4 * workers:
+                chunk = next_chunk()
+                if not chunk:
+                    break
+                pending.add(executor.submit(run_chunk, chunk, options))
+            if not pending:
+                break
+
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                for index, result in future.result():
+                    if not ordered:
+                        yield index, result
+                    else:
+                        finished[index] = result
+
+            while next_index in finished:
+                yield next_index, finished.pop(next_index)
+                next_index += 1
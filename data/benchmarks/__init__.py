@@ -0,0 +1,16 @@
+"""
+Reproducible benchmarks of the search engines
+
+Run from the data folder:
+    python -m benchmarks run --output baseline.json
+    python -m benchmarks run --queries-from baseline.json --compare baseline.json
+    python -m benchmarks compare baseline.json current.json
+    python -m benchmarks heaps
+    python service.py & python -m benchmarks load --concurrency 16
+See python -m benchmarks --help for the options.
+"""
+from benchmarks.queries import make_queries, LENGTHS, TIGHTNESS
+from benchmarks.engines import ENGINES, IGNORES_BUDGET, BenchmarkContext, EngineUnavailable
+from benchmarks.runner import run_benchmarks, compare_reports
+from benchmarks.heaps import run_heap_benchmarks
+from benchmarks.load import run_load_test
@@ -0,0 +1,138 @@
+"""
+Command line interface of the benchmarks, see benchmarks/__init__.py
+"""
+from pathlib import Path
+
+import argparse
+import asyncio
+import json
+import sys
+
+from graph_store import GraphStore, DEFAULT_DATA_FOLDER
+from benchmarks import (
+    make_queries, ENGINES, BenchmarkContext, run_benchmarks, compare_reports, run_heap_benchmarks,
+)
+from benchmarks.runner import report_meta
+from benchmarks.load import run_load_test
+
+
+def load_report(path):
+    with open(path, encoding="utf8") as f:
+        return json.load(f)
+
+
+def write_json(data, path):
+    text = json.dumps(data, indent=2)
+    if path is None:
+        print(text)
+    else:
+        Path(path).write_text(text + "\n", encoding="utf8")
+
+
+def print_regressions(regressions, threshold):
+    if not regressions:
+        print("No regressions above {0:.0%}".format(threshold), file=sys.stderr)
+    for regression in regressions:
+        print("REGRESSION {engine} {queries} {metric}: {baseline:.4g} -> {current:.4g}".format(
+            **regression), file=sys.stderr)
+
+
+def run(args):
+
+    store = GraphStore.get(args.data)
+    if args.queries_from:
+        queries = load_report(args.queries_from)["queries"]
+    else:
+        queries = make_queries(store.compiled, args.per_set, args.seed)
+
+    def log(message):
+        print(message, file=sys.stderr)
+
+    report = {
+        "meta": report_meta(args.per_set, args.seed, args.repeat),
+        "queries": queries,
+        "results": run_benchmarks(
+            BenchmarkContext(store), queries, args.engines, args.memory_sample, args.repeat, log),
+    }
+    write_json(report, args.output)
+
+    if args.compare:
+        regressions = compare_reports(load_report(args.compare), report, args.threshold)
+        print_regressions(regressions, args.threshold)
+        return 1 if regressions else 0
+    return 0
+
+
+def compare(args):
+    regressions = compare_reports(load_report(args.baseline), load_report(args.current), args.threshold)
+    print_regressions(regressions, args.threshold)
+    return 1 if regressions else 0
+
+
+def heaps(args):
+    write_json(run_heap_benchmarks(GraphStore.get(args.data).compiled, args.queries, args.seed), args.output)
+    return 0
+
+
+def load(args):
+    store = GraphStore.get(args.data)
+    queries = [query for query_set in make_queries(store.compiled, args.per_set, args.seed).values()
+               for query in query_set]
+    write_json(asyncio.run(run_load_test(
+        args.host, args.port, queries, args.requests, args.concurrency, args.kind, args.hot, args.seed)),
+        args.output)
+    return 0
+
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the engines and write a json report")
+    run_parser.add_argument("--data", default=DEFAULT_DATA_FOLDER, help="folder of G.json etc.")
+    run_parser.add_argument("--per-set", type=int, default=20, help="queries per query set")
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--queries-from", help="reuse the queries of this report")
+    run_parser.add_argument("--engines", nargs="+", choices=list(ENGINES), help="default: all")
+    run_parser.add_argument("--memory-sample", type=int, default=3,
+                            help="queries per set measured with tracemalloc")
+    run_parser.add_argument("--repeat", type=int, default=3, help="runs per query, the fastest is kept")
+    run_parser.add_argument("--output", help="report file, default: standard output")
+    run_parser.add_argument("--compare", help="baseline report to check for regressions")
+    run_parser.add_argument("--threshold", type=float, default=0.1)
+    run_parser.set_defaults(command_func=run)
+
+    compare_parser = commands.add_parser("compare", help="compare two reports")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.1)
+    compare_parser.set_defaults(command_func=compare)
+
+    heaps_parser = commands.add_parser("heaps", help="compare the priority queues on plain Dijkstra")
+    heaps_parser.add_argument("--data", default=DEFAULT_DATA_FOLDER)
+    heaps_parser.add_argument("--queries", type=int, default=20)
+    heaps_parser.add_argument("--seed", type=int, default=0)
+    heaps_parser.add_argument("--output")
+    heaps_parser.set_defaults(command_func=heaps)
+
+    load_parser = commands.add_parser("load", help="load test a running service.py over http")
+    load_parser.add_argument("--data", default=DEFAULT_DATA_FOLDER, help="the data the service was started with")
+    load_parser.add_argument("--host", default="127.0.0.1")
+    load_parser.add_argument("--port", type=int, default=8080)
+    load_parser.add_argument("--requests", type=int, default=1000)
+    load_parser.add_argument("--concurrency", type=int, default=16, help="clients sending at the same time")
+    load_parser.add_argument("--kind", choices=("find_path", "find_path_astar"), default="find_path")
+    load_parser.add_argument("--hot", type=int, default=0,
+                             help="draw from this many distinct queries, 0 for all")
+    load_parser.add_argument("--per-set", type=int, default=20, help="queries per query set")
+    load_parser.add_argument("--seed", type=int, default=0)
+    load_parser.add_argument("--output")
+    load_parser.set_defaults(command_func=load)
+
+    args = parser.parse_args(argv)
+    return args.command_func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+"""
+The engines measured by the benchmarks
+
+Each engine is a function engine(context, s, d, energy_budget) answering one query
+with node labels. The engines in IGNORES_BUDGET answer the query without a budget.
+"""
+from task1 import dijkstra_task1
+from task3 import *
+from label_setting import pareto_frontier
+
+
+"""
+EngineUnavailable
+- raised by an engine whose preprocessing was not found, the engine is skipped
+"""
+class EngineUnavailable(Exception):
+    pass
+
+
+"""
+BenchmarkContext
+- the data shared by the engines, loaded on first use (before timing starts,
+  see runner.warm_up)
+"""
+class BenchmarkContext:
+
+    def __init__(self, store):
+        self.store = store
+        self._hierarchy = None
+        self._landmarks = None
+
+    @property
+    def compiled(self):
+        return self.store.compiled
+
+    @property
+    def straight_line(self):
+        return StraightLineHeuristic(self.store.Coord)
+
+    @property
+    def hierarchy(self):
+        if self._hierarchy is None:
+            from contraction import ContractionHierarchy, default_hierarchy_path
+            path = default_hierarchy_path(self.compiled)
+            if not path.exists():
+                raise EngineUnavailable("no contraction hierarchy at {0}, run contraction.py".format(path))
+            self._hierarchy = ContractionHierarchy.load(path)
+        return self._hierarchy
+
+    @property
+    def landmarks(self):
+        if self._landmarks is None:
+            from landmarks import Landmarks, default_landmark_folder
+            folder = default_landmark_folder(self.compiled)
+            if not folder.exists():
+                raise EngineUnavailable("no landmarks in {0}, run landmarks.py".format(folder))
+            self._landmarks = Landmarks.load(self.compiled, folder)
+        return self._landmarks
+
+
+def task1(context, s, d, energy_budget):
+    store = context.store
+    path, distance, energy = dijkstra_task1(store.G, s, d, store=store, verbose=False)
+    return PathInfo(path, distance, energy)
+
+
+def rerun(context, s, d, energy_budget):
+    store = context.store
+    return find_path(store.G, s, d, store.distance_func, store.energy_func, energy_budget=energy_budget)
+
+
+def astar_rerun(context, s, d, energy_budget):
+    store = context.store
+    return find_path_astar(store.G, s, d, store.distance_func, store.energy_func,
+                           context.straight_line, energy_budget=energy_budget)
+
+
+def compiled_rerun(context, s, d, energy_budget):
+    return find_path(context.compiled, s, d, energy_budget=energy_budget)
+
+
+def compiled_astar(context, s, d, energy_budget):
+    return find_path_astar(context.compiled, s, d, energy_budget=energy_budget)
+
+
+def bidirectional(context, s, d, energy_budget):
+    return find_path(context.compiled, s, d, energy_budget=energy_budget, direction="bidirectional")
+
+
+def incremental(context, s, d, energy_budget):
+    return find_path(context.compiled, s, d, energy_budget=energy_budget, engine="incremental")
+
+
+def label(context, s, d, energy_budget):
+    return find_path(context.compiled, s, d, energy_budget=energy_budget, engine="label")
+
+
+def larac(context, s, d, energy_budget):
+    return find_path(context.compiled, s, d, energy_budget=energy_budget, engine="larac")
+
+
+def pareto(context, s, d, energy_budget):
+    return pareto_frontier(context.compiled, s, d, energy_budget).best_for(energy_budget)
+
+
+def alt(context, s, d, energy_budget):
+    return find_path_astar(context.compiled, s, d, heuristic_func=context.landmarks.heuristic(d),
+                           energy_budget=energy_budget)
+
+
+def contraction(context, s, d, energy_budget):
+    return context.hierarchy.query(s, d)
+
+
+ENGINES = {
+    "dijkstra_task1": task1,
+    "find_path": rerun,
+    "find_path_astar": astar_rerun,
+    "compiled": compiled_rerun,
+    "compiled_astar": compiled_astar,
+    "bidirectional": bidirectional,
+    "incremental": incremental,
+    "label": label,
+    "larac": larac,
+    "pareto": pareto,
+    "alt": alt,
+    "contraction": contraction,
+}
+
+IGNORES_BUDGET = {"dijkstra_task1", "contraction"}
@@ -0,0 +1,152 @@
+"""
+Compares the priority queues on plain Dijkstra over the compiled graph
+
+Each queue runs the same search for a few random queries; pushes, pops, peak heap
+size and time are summed over the queries.
+"""
+from heapq import heappush, heappop
+from time import perf_counter_ns
+from priority_dictionary import priorityDictionary
+from indexed_heap import IndexedHeap
+from radix_heap import RadixHeap
+import random
+
+
+"""
+dijkstra_heapq
+- heapq with duplicates, stale pairs are skipped with a visited set (task 2 before the IndexedHeap)
+"""
+def dijkstra_heapq(graph, s, d):
+
+    offsets, targets, dist, _ = graph.views()
+    costs = {s: 0}
+    visited = set()
+    visit_queue = [(0, s)]
+    pushes, pops, peak = 1, 0, 1
+
+    while visit_queue:
+        cost_of_s_to_u, u = heappop(visit_queue)
+        pops += 1
+        if u == d:
+            break
+        if u in visited:
+            continue
+        visited.add(u)
+
+        for arc in range(offsets[u], offsets[u + 1]):
+            v = targets[arc]
+            if v in visited:
+                continue
+            cost_of_s_to_u_plus_cost_of_e = cost_of_s_to_u + dist[arc]
+            if v not in costs or cost_of_s_to_u_plus_cost_of_e < costs[v]:
+                costs[v] = cost_of_s_to_u_plus_cost_of_e
+                heappush(visit_queue, (cost_of_s_to_u_plus_cost_of_e, v))
+                pushes += 1
+                peak = max(peak, len(visit_queue))
+
+    return costs.get(d), pushes, pops, peak
+
+
+"""
+dijkstra_priority_dictionary
+- Eppstein's priorityDictionary, as used by task 1 before the IndexedHeap
+- every assignment pushes a pair, stale pairs are dropped by smallest() or a rebuild
+"""
+def dijkstra_priority_dictionary(graph, s, d):
+
+    offsets, targets, dist, _ = graph.views()
+    costs = {}
+    visit_queue = priorityDictionary()
+    visit_queue[s] = 0
+    pushes, pops, peak = 1, 0, 1
+
+    for u in visit_queue:
+        pops += 1
+        costs[u] = visit_queue[u]
+        if u == d:
+            break
+
+        for arc in range(offsets[u], offsets[u + 1]):
+            v = targets[arc]
+            if v in costs:
+                continue
+            cost_of_s_to_u_plus_cost_of_e = costs[u] + dist[arc]
+            if v not in visit_queue or cost_of_s_to_u_plus_cost_of_e < visit_queue[v]:
+                visit_queue[v] = cost_of_s_to_u_plus_cost_of_e
+                pushes += 1
+                peak = max(peak, len(visit_queue._priorityDictionary__heap))
+
+    return costs.get(d), pushes, pops, peak
+
+
+"""
+dijkstra_indexed_heap
+- IndexedHeap with decrease-key, as used by tasks 1, 2 and 3
+- Queue=RadixHeap gives the queue task 2 uses on graphs with integer distances
+"""
+def dijkstra_indexed_heap(graph, s, d, Queue=IndexedHeap):
+
+    offsets, targets, dist, _ = graph.views()
+    visited = set()
+    visit_queue = Queue()
+    visit_queue.push(s, 0)
+    cost = None
+
+    while visit_queue:
+        cost_of_s_to_u, u = visit_queue.pop()
+        if u == d:
+            cost = cost_of_s_to_u
+            break
+        visited.add(u)
+
+        for arc in range(offsets[u], offsets[u + 1]):
+            v = targets[arc]
+            if v not in visited:
+                visit_queue.push(v, cost_of_s_to_u + dist[arc])
+
+    return cost, visit_queue.pushes + visit_queue.decreases, visit_queue.pops, visit_queue.peak
+
+
+QUEUES = {
+    "heapq": dijkstra_heapq,
+    "priorityDictionary": dijkstra_priority_dictionary,
+    "IndexedHeap": dijkstra_indexed_heap,
+    "RadixHeap": lambda graph, s, d: dijkstra_indexed_heap(graph, s, d, RadixHeap),
+}
+
+
+"""
+run_heap_benchmarks
+- runs every queue on the same random (s, d) node id pairs
+- output:
+    - {queue: {pushes, pops, peak heap size, total milliseconds}}, summed over the
+      queries (the largest peak is kept); the distances found must all agree
+"""
+def run_heap_benchmarks(graph, num_queries=20, seed=0):
+
+    rng = random.Random(seed)
+    queries = [(rng.randrange(graph.num_nodes), rng.randrange(graph.num_nodes))
+               for _ in range(num_queries)]
+
+    results = {}
+    reference = None
+    for name, dijkstra in QUEUES.items():
+        pushes = pops = peak = elapsed = 0
+        costs = []
+        for s, d in queries:
+            start = perf_counter_ns()
+            cost, query_pushes, query_pops, query_peak = dijkstra(graph, s, d)
+            elapsed += perf_counter_ns() - start
+            costs.append(cost)
+            pushes += query_pushes
+            pops += query_pops
+            peak = max(peak, query_peak)
+
+        if reference is None:
+            reference = costs
+        elif costs != reference:
+            raise RuntimeError("{0} found different distances".format(name))
+
+        results[name] = {"pushes": pushes, "pops": pops, "peak": peak, "total_ms": elapsed / 1e6}
+
+    return results
@@ -0,0 +1,117 @@
+"""
+Load test of the routing service (service.py) over HTTP on localhost
+
+Every client keeps one connection open and sends its next query as soon as the
+previous one is answered. The queries are the benchmark query sets (see
+queries.make_queries); hot > 0 draws them from only that many distinct queries, so
+identical queries are in flight together and the service can coalesce them.
+"""
+from time import perf_counter
+import asyncio
+import json
+import random
+
+import numpy as np
+
+
+"""
+Connection
+- one keep-alive HTTP/1.1 connection to the service
+"""
+class Connection:
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = self.writer = None
+
+    async def request(self, method, path, payload=None):
+
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+        body = json.dumps(payload).encode("utf8") if payload is not None else b""
+        head = "{0} {1} HTTP/1.1\r\nHost: {2}\r\nContent-Type: application/json\r\nContent-Length: {3}\r\n\r\n"
+        self.writer.write(head.format(method, path, self.host, len(body)).encode("latin-1") + body)
+        await self.writer.drain()
+
+        status = int((await self.reader.readline()).split()[1])
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if not line.strip():
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        data = await self.reader.readexactly(int(headers.get("content-length", 0)))
+
+        if headers.get("connection", "").lower() == "close":
+            self.close()
+        return status, json.loads(data) if data else None
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.reader = self.writer = None
+
+
+"""
+run_load_test
+- arguments:
+    - queries: list of (s, d, energy_budget)
+    - requests: total number of requests sent
+    - concurrency: number of clients sending at the same time
+    - kind: "find_path" or "find_path_astar"
+    - hot: number of distinct queries to draw from, 0 for all of queries
+- output:
+    - dictionary of the throughput, latency percentiles in milliseconds, the number
+      of answers per http status and the service's own counters afterwards
+"""
+async def run_load_test(host, port, queries, requests=1000, concurrency=16, kind="find_path",
+                        hot=0, seed=0):
+
+    rng = random.Random(seed)
+    pool = rng.sample(queries, min(hot, len(queries))) if hot else queries
+    plan = [rng.choice(pool) for _ in range(requests)]
+    plan.reverse()
+
+    latencies = []
+    statuses = {}
+
+    async def client():
+        connection = Connection(host, port)
+        try:
+            while plan:
+                s, d, energy_budget = plan.pop()
+                start = perf_counter()
+                status, _ = await connection.request(
+                    "POST", "/" + kind, {"s": s, "d": d, "budget": energy_budget})
+                latencies.append(perf_counter() - start)
+                statuses[status] = statuses.get(status, 0) + 1
+        finally:
+            connection.close()
+
+    start = perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = perf_counter() - start
+
+    connection = Connection(host, port)
+    try:
+        _, service_stats = await connection.request("GET", "/stats")
+    finally:
+        connection.close()
+
+    milliseconds = np.array(latencies) * 1000
+    p50, p95, p99 = np.percentile(milliseconds, [50, 95, 99]).tolist()
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "seconds": elapsed,
+        "requests_per_second": requests / elapsed,
+        "p50_ms": p50,
+        "p95_ms": p95,
+        "p99_ms": p99,
+        "max_ms": float(milliseconds.max()),
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        "service": service_stats,
+    }
@@ -0,0 +1,101 @@
+"""
+Seeded origin-destination query sets
+
+Every query set is named "<length>/<tightness>":
+    - length: the target is drawn from the nearest, middle or farthest third of the
+      nodes reachable from the source, ordered by shortest distance
+    - tightness: the budget is least + t * (shortest - least), where least is the
+      energy of the least energy path and shortest the energy of the shortest path.
+      "tight" leaves little room above the least energy, "loose" lets the shortest
+      path through, so the budget never binds
+The same graph, per_set and seed always give the same queries.
+"""
+import math
+import random
+
+import numpy as np
+
+from indexed_heap import IndexedHeap
+from landmarks import shortest_distances
+
+LENGTHS = (("short", 0.0, 1 / 3), ("medium", 1 / 3, 2 / 3), ("long", 2 / 3, 1.0))
+TIGHTNESS = (("tight", 0.1), ("medium", 0.5), ("loose", 1.0))
+
+
+"""
+shortest_path_tree
+- plain Dijkstra from source over the whole graph
+- output:
+    - (distance, energy) numpy arrays: the shortest distance to every node and the
+      energy along that shortest path, inf if unreachable
+"""
+def shortest_path_tree(graph, source):
+
+    offsets, targets, dist, energy = graph.views()
+    energies = {source: 0}
+    visited = {}
+    visit_queue = IndexedHeap()
+    visit_queue.push(source, 0)
+
+    while visit_queue:
+
+        cost_of_s_to_u, u = visit_queue.pop()
+        visited[u] = cost_of_s_to_u
+
+        for arc in range(offsets[u], offsets[u + 1]):
+            v = targets[arc]
+            if v not in visited and visit_queue.push(v, cost_of_s_to_u + dist[arc]):
+                energies[v] = energies[u] + energy[arc]
+
+    distances = np.full(graph.num_nodes, np.inf)
+    distances[list(visited)] = list(visited.values())
+    path_energies = np.full(graph.num_nodes, np.inf)
+    path_energies[list(visited)] = [energies[v] for v in visited]
+
+    return distances, path_energies
+
+
+"""
+make_queries
+- arguments:
+    - graph: a CompiledGraph
+    - per_set: number of queries in each set
+    - seed: seed of the random sources and targets
+- output:
+    - {set name: [[s, d, energy_budget], ...]} with node labels, ready for json
+"""
+def make_queries(graph, per_set=20, seed=0):
+
+    rng = random.Random(seed)
+    least_energy_graph = graph.with_weights(graph.energy)
+    queries = {
+        "{0}/{1}".format(length, tightness): []
+        for length, _, _ in LENGTHS for tightness, _ in TIGHTNESS
+    }
+
+    # every source gives one query to every set
+    for _ in range(10 * per_set):
+        if all(len(query_set) >= per_set for query_set in queries.values()):
+            break
+
+        source = rng.randrange(graph.num_nodes)
+        distances, path_energies = shortest_path_tree(graph, source)
+        reachable = np.flatnonzero(np.isfinite(distances))
+        reachable = reachable[reachable != source]
+        if len(reachable) < len(LENGTHS):
+            continue                            # e.g. a dead end
+        reachable = reachable[np.argsort(distances[reachable], kind="stable")]
+        least_energies = shortest_distances(least_energy_graph, source)
+
+        for length, low, high in LENGTHS:
+            first = int(low * len(reachable))
+            last = max(int(high * len(reachable)), first + 1)
+            target = int(reachable[rng.randrange(first, last)])
+            least, shortest = least_energies[target], path_energies[target]
+            for tightness, t in TIGHTNESS:
+                query_set = queries["{0}/{1}".format(length, tightness)]
+                if len(query_set) < per_set:
+                    budget = math.ceil(least + t * (shortest - least))
+                    query_set.append([graph.label(source), graph.label(target), budget])
+
+    return queries
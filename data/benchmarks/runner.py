@@ -0,0 +1,218 @@
+"""
+Runs the engines over the query sets and compares reports
+
+A report is a json-ready dictionary:
+    - meta: how the report was made
+    - queries: the query sets, see queries.make_queries
+    - results: {engine: {query set: summary}}, where a summary holds the p50, p95,
+      p99 and mean latency in milliseconds, the median number of nodes settled (when
+      the engine reports it), the peak memory of one query in bytes (measured with
+      tracemalloc on a few queries), and the number of queries without a path
+Nodes settled and memory are measured in separate runs after the timed ones, so
+neither the instrumentation nor tracemalloc slows down the timed runs.
+"""
+from time import perf_counter_ns
+import platform
+import sys
+import tracemalloc
+
+import numpy as np
+
+from task2 import NoPathError
+from instrumentation import add_hook, remove_hook
+from benchmarks.engines import ENGINES, IGNORES_BUDGET, EngineUnavailable
+
+
+"""
+nodes_settled
+- runs engine once per query with the search counters on, see instrumentation.py
+- output:
+    - the number of nodes taken from the queue for each query, from the counters or
+      from the engine's own PathInfo.stats, None if the engine reports neither
+"""
+def nodes_settled(engine, context, queries):
+
+    popped = []
+
+    def record(name, stats):
+        popped.append(stats["popped"])
+
+    settled = []
+    add_hook(record)
+    try:
+        for s, d, energy_budget in queries:
+            popped.clear()
+            try:
+                result = engine(context, s, d, energy_budget)
+            except NoPathError:
+                result = None
+            stats = getattr(result, "stats", None) or {}
+            if popped:
+                settled.append(sum(popped))
+            elif "expanded" in stats:
+                settled.append(sum(stats["expanded"]))
+            else:
+                settled.append(None)
+    finally:
+        remove_hook(record)
+
+    return settled
+
+
+"""
+measure
+- runs engine repeat times per query, the fastest run is the latency of the query
+- output:
+    - (latencies in nanoseconds, number of queries without a path)
+"""
+def measure(engine, context, queries, repeat=1):
+
+    latencies = []
+    no_path = 0
+
+    for s, d, energy_budget in queries:
+        fastest = None
+        for _ in range(repeat):
+            start = perf_counter_ns()
+            try:
+                result = engine(context, s, d, energy_budget)
+            except NoPathError:
+                result = None
+            elapsed = perf_counter_ns() - start
+            if fastest is None or elapsed < fastest:
+                fastest = elapsed
+        latencies.append(fastest)
+        no_path += result is None
+
+    return latencies, no_path
+
+
+"""
+peak_memory
+- largest memory allocated by python while answering one of queries, in bytes
+"""
+def peak_memory(engine, context, queries):
+
+    peak = 0
+    for s, d, energy_budget in queries:
+        tracemalloc.start()
+        try:
+            engine(context, s, d, energy_budget)
+        except NoPathError:
+            pass
+        finally:
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+
+    return peak
+
+
+def summarize(latencies, settled, no_path, memory):
+
+    milliseconds = np.array(latencies) / 1e6
+    p50, p95, p99 = np.percentile(milliseconds, [50, 95, 99]).tolist()
+    settled = [n for n in settled if n is not None]
+
+    return {
+        "queries": len(latencies),
+        "no_path": no_path,
+        "p50_ms": p50,
+        "p95_ms": p95,
+        "p99_ms": p99,
+        "mean_ms": float(milliseconds.mean()),
+        "settled_p50": float(np.median(settled)) if settled else None,
+        "peak_memory_bytes": memory,
+    }
+
+
+"""
+run_benchmarks
+- arguments:
+    - context: a BenchmarkContext
+    - queries: query sets, see queries.make_queries
+    - engines: names of the engines to run, all of ENGINES by default
+    - memory_sample: number of queries per set measured with tracemalloc
+    - repeat: runs per query, the fastest is kept to reduce noise
+    - log: function called with progress messages, e.g. print
+- output:
+    - the "results" part of a report; engines whose preprocessing is missing are
+      recorded as {"skipped": reason}
+"""
+def run_benchmarks(context, queries, engines=None, memory_sample=3, repeat=3, log=None):
+
+    results = {}
+    for name in engines or ENGINES:
+        engine = ENGINES[name]
+
+        # the first query loads the data the engine needs, so it is not timed
+        first = next(query for query_set in queries.values() for query in query_set)
+        try:
+            measure(engine, context, [first])
+        except EngineUnavailable as error:
+            results[name] = {"skipped": str(error)}
+            if log:
+                log("{0}: skipped, {1}".format(name, error))
+            continue
+
+        results[name] = {}
+        for set_name, query_set in queries.items():
+            latencies, no_path = measure(engine, context, query_set, repeat)
+            settled = nodes_settled(engine, context, query_set)
+            memory = peak_memory(engine, context, query_set[:memory_sample])
+            results[name][set_name] = summary = summarize(latencies, settled, no_path, memory)
+            if name in IGNORES_BUDGET:
+                summary["ignores_budget"] = True
+            if log:
+                log("{0} {1}: p50 {2:.3f} ms, p95 {3:.3f} ms".format(
+                    name, set_name, summary["p50_ms"], summary["p95_ms"]))
+
+    return results
+
+
+def report_meta(per_set, seed, repeat):
+    return {
+        "per_set": per_set,
+        "seed": seed,
+        "repeat": repeat,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+    }
+
+
+"""
+compare_reports
+- arguments:
+    - baseline, current: reports
+    - threshold: relative increase that counts as a regression, e.g. 0.1 for 10%
+    - min_ms: latency differences below this are treated as noise
+- output:
+    - list of regressions, each a dictionary of engine, query set, metric, baseline
+      and current value
+"""
+def compare_reports(baseline, current, threshold=0.1, min_ms=0.05):
+
+    if baseline["queries"] != current["queries"]:
+        raise ValueError("the reports were made with different queries, "
+                         "run the benchmarks with --queries-from the baseline")
+
+    regressions = []
+    for name, sets in current["results"].items():
+        for set_name, summary in sets.items():
+            before = baseline["results"].get(name, {}).get(set_name)
+            if not isinstance(before, dict) or not isinstance(summary, dict):
+                continue                    # new engine or skipped on either side
+
+            for metric in ("p50_ms", "p95_ms", "settled_p50"):
+                old, new = before.get(metric), summary.get(metric)
+                if old is None or new is None:
+                    continue
+                if metric.endswith("_ms") and new - old < min_ms:
+                    continue
+                if new > old * (1 + threshold):
+                    regressions.append({
+                        "engine": name, "queries": set_name, "metric": metric,
+                        "baseline": old, "current": new,
+                    })
+
+    return regressions
@@ -0,0 +1,190 @@
+"""
+Bidirectional Dijkstra and bidirectional A*
+
+One search runs forward from s over the graph and one backward from d over the
+reversed graph, each time expanding the side whose queue has the smaller key. The
+shortest path seen through a node reached by both sides is kept in best, and the
+search stops once the two smallest keys add up to at least best.
+
+For A* both sides use the average potential
+    p(v) = (h(v, d) - h(s, v)) / 2
+(forward key g + p(v), backward key g - p(v)), which keeps the reduced edge costs
+the same for both sides, so the stopping rule above stays correct.
+
+Once a path over the energy budget is found, the forward side drops the nodes that
+cannot reach d within the budget, and the backward side the nodes that s cannot
+reach within it (see energy_bounds.py).
+"""
+from heapq import heappush, heappop
+
+from task2 import NoPathError, path_info_from_arcs, energy_lower_bounds
+from compiled_graph import require_compiled
+
+import numpy as np
+
+
+"""
+bidirectional_shortest_path
+- arguments:
+    - graph: a CompiledGraph
+    - s, d: integer node ids
+    - potential: optional function p(v) of a node id, see the module docstring
+    - to_go: optional (least energy from each node to d, least energy from s to each
+      node), a node is then not reached by a side on a path that cannot meet energy_budget,
+      and the path found meets it
+- output:
+    - arc ids of the shortest path from s to d, None if there is no path
+"""
+def bidirectional_shortest_path(graph, s, d, potential=None, to_go=None, energy_budget=None):
+
+    if s == d:
+        return []
+
+    reverse = graph.reverse()
+    # per side: (offsets, heads, dist, energy, arc id in graph) - arc ids are None going forward
+    sides = (
+        graph.views() + (None,),
+        reverse.views() + (memoryview(np.ascontiguousarray(reverse.arc_ids)),),
+    )
+
+    if potential is None:
+        def potential(v):
+            return 0
+    signs = (1, -1)
+
+    costs = ({s: 0}, {d: 0})
+    energies = ({s: 0}, {d: 0})                   # energy of the path to / from each node
+    predecessors = ({s: None}, {d: None})         # arc (in graph) used to reach each node
+    visited = (set(), set())
+    visit_queues = ([(potential(s), s)], [(-potential(d), d)])
+
+    best = float("inf")
+    meeting_node = None
+
+    while visit_queues[0] and visit_queues[1]:
+
+        if visit_queues[0][0][0] + visit_queues[1][0][0] >= best:
+            break                                     # no shorter path is left
+
+        side = 0 if visit_queues[0][0][0] <= visit_queues[1][0][0] else 1
+        offsets, heads, dist, energy, arc_ids = sides[side]
+        side_costs, other_costs = costs[side], costs[1 - side]
+        side_visited, sign = visited[side], signs[side]
+        side_energies, other_energies = energies[side], energies[1 - side]
+        side_to_go = to_go and to_go[side]
+
+        _, u = heappop(visit_queues[side])
+        if u in side_visited:
+            continue
+        side_visited.add(u)
+        cost_to_u = side_costs[u]
+
+        for side_arc in range(offsets[u], offsets[u + 1]):
+
+            v = heads[side_arc]
+            if v in side_visited:
+                continue
+
+            cost_to_v = cost_to_u + dist[side_arc]
+            if v not in side_costs or cost_to_v < side_costs[v]:
+                if side_to_go:
+                    energy_to_v = side_energies[u] + energy[side_arc]
+                    if energy_to_v + side_to_go[v] > energy_budget:
+                        continue
+                    side_energies[v] = energy_to_v
+                side_costs[v] = cost_to_v
+                predecessors[side][v] = side_arc if arc_ids is None else arc_ids[side_arc]
+                heappush(visit_queues[side], (cost_to_v + sign * potential(v), v))
+
+                # a path through v is known if the other side has reached v
+                # (and, when pruning, if its two halves together meet the budget)
+                if v in other_costs and cost_to_v + other_costs[v] < best:
+                    if not side_to_go or energy_to_v + other_energies[v] <= energy_budget:
+                        best = cost_to_v + other_costs[v]
+                        meeting_node = v
+                        # v may still be reached again on a path using more energy
+                        meeting_arcs = (predecessors[0][v], predecessors[1][v])
+
+    if meeting_node is None:
+        return None
+
+    return join_paths(graph, predecessors, meeting_node, meeting_arcs)
+
+
+"""
+join_paths
+- arguments:
+    - meeting_arcs: (arc into, arc out of) the meeting node, the current predecessors
+      by default
+- output:
+    - arcs from s to the meeting node followed by the arcs from it to d
+"""
+def join_paths(graph, predecessors, meeting_node, meeting_arcs=None):
+
+    forward, backward = predecessors
+    tails, targets = graph.tails, graph.targets
+    if meeting_arcs is None:
+        meeting_arcs = (forward[meeting_node], backward[meeting_node])
+
+    arcs = []
+    arc = meeting_arcs[0]
+    while arc is not None:
+        arcs.append(arc)
+        arc = forward[int(tails[arc])]
+    arcs.reverse()
+
+    arc = meeting_arcs[1]
+    while arc is not None:
+        arcs.append(arc)
+        arc = backward[int(targets[arc])]
+
+    return arcs
+
+
+"""
+find_path_bidirectional
+- same budget handling as find_path, with a bidirectional search: if the shortest path
+  is over the budget, search once more pruned on both sides
+- arguments:
+    - same as find_path_astar, without cost_func and energy_func
+    - graph: a CompiledGraph, see require_compiled
+    - heuristic_func: optional, for bidirectional A*. heuristic_func(alpha, v, d) must
+      estimate the distance from v to d, like heuristic_sl_distance in main.py. The
+      distance from s to v is estimated with heuristic_func.from_source(alpha, v, s)
+      when the heuristic has it (see landmarks.py), and otherwise with
+      heuristic_func(alpha, v, s), which assumes the estimate is symmetric
+- output:
+    - PathInfo
+"""
+def find_path_bidirectional(graph, s, d, heuristic_func=None, alpha=1, energy_budget=287932):
+
+    graph = require_compiled(graph, "the bidirectional search")
+    s_label, d_label = s, d
+    s, d = graph.node_id(s), graph.node_id(d)
+
+    potential = None
+    if heuristic_func:
+        from_source = getattr(heuristic_func, "from_source", heuristic_func)
+        values = {}
+
+        def potential(v):
+            if v not in values:
+                label = graph.label(v)
+                values[v] = (heuristic_func(alpha, label, d_label)
+                             - from_source(alpha, label, s_label)) / 2
+            return values[v]
+
+    arcs = bidirectional_shortest_path(graph, s, d, potential)
+
+    if arcs is not None and energy_budget and graph.energy[arcs].sum() > energy_budget:
+        # search again pruned by the least energy to d and from s (the least energy to s
+        # on the reversed graph); a meeting is only kept if it meets the budget, and each
+        # side alone reaches the other end, so a path is found whenever one exists
+        bounds = energy_lower_bounds(graph, s, d, energy_budget)
+        to_go = (bounds.to_go, graph.reverse().bounds_cache.get(s, energy_budget).to_go)
+        arcs = bidirectional_shortest_path(graph, s, d, potential, to_go, energy_budget)
+
+    if arcs is None:
+        raise NoPathError("Could not find a path from {0} to {1}".format(s_label, d_label))
+
+    return path_info_from_arcs(graph, arcs, d)
@@ -0,0 +1,273 @@
+"""
+Please ensure that you have numpy installed.
+"""
+from pathlib import Path
+
+import json
+import numpy as np
+
+
+"""
+CompiledGraph
+- immutable, array based version of the G/Dist/Cost/Coord data
+- nodes are renumbered to dense integer ids 0..n-1
+    - labels[i] is the original node name, e.g. "1"
+- arcs are stored in CSR (compressed sparse row) form
+    - the arcs leaving node u are offsets[u] .. offsets[u+1]-1
+    - targets[arc], dist[arc], energy[arc] describe each arc
+    - tails[arc] is the node the arc leaves from
+- coords[i] is the (x, y) coordinate of node i, if coordinates were given
+"""
+class CompiledGraph:
+
+    def __init__(self, labels, offsets, targets, dist, energy, coords=None, tails=None):
+        self.labels = labels
+        self.offsets = offsets
+        self.targets = targets
+        self.dist = dist
+        self.energy = energy
+        self.coords = coords
+        if tails is None:
+            tails = np.repeat(
+                np.arange(len(offsets) - 1, dtype=np.int32), np.diff(offsets))
+        self.tails = tails
+        self.cache_folder = None        # set when loaded from a binary cache, see graph_cache.py
+        self._index = None
+        self._views = None
+        self._reverse = None
+        self._integral_weights = None
+        self._workspaces = None
+        self._bounds_cache = None
+
+    """
+    from_dicts
+    - compiles the data in the format of the json files
+    - arguments:
+        - G: adjacency list, {"u": ["v", ...]}
+        - Dist: distance of each edge, {"u,v": distance}
+        - Cost: energy of each edge, {"u,v": energy}
+        - Coord: optional coordinates, {"u": [x, y]}
+    """
+    @classmethod
+    def from_dicts(cls, G, Dist, Cost, Coord=None):
+        return cls.from_callbacks(
+            G,
+            lambda u, v: Dist[f"{u},{v}"],
+            lambda u, v: Cost[f"{u},{v}"],
+            Coord,
+        )
+
+    """
+    from_callbacks
+    - compiles a graph whose edge weights are given by functions
+    - same arguments as find_path: cost_func(u, v) and energy_func(u, v)
+    - every edge is looked up exactly once
+    """
+    @classmethod
+    def from_callbacks(cls, graph, cost_func, energy_func, Coord=None):
+
+        labels = list(graph)
+        index = {label: i for i, label in enumerate(labels)}
+
+        # nodes that only appear as a neighbour still need an id
+        for neighbors in graph.values():
+            for v in neighbors:
+                if v not in index:
+                    index[v] = len(labels)
+                    labels.append(v)
+
+        offsets = [0]
+        targets = []
+        dist = []
+        energy = []
+        for u in labels:
+            for v in graph.get(u, ()):
+                targets.append(index[v])
+                dist.append(cost_func(u, v))
+                energy.append(energy_func(u, v))
+            offsets.append(len(targets))
+
+        coords = None
+        if Coord is not None:
+            coords = np.array([Coord[u] for u in labels], dtype=np.float64)
+
+        compiled = cls(
+            labels,
+            np.array(offsets, dtype=np.int64),
+            np.array(targets, dtype=np.int32),
+            np.array(dist),
+            np.array(energy),
+            coords,
+        )
+        compiled._index = index
+        return compiled
+
+    """
+    from_json
+    - compiles G.json, Dist.json, Cost.json and Coord.json found in folder
+    """
+    @classmethod
+    def from_json(cls, folder):
+        folder = Path(folder)
+        data = {}
+        for name in ("G", "Dist", "Cost", "Coord"):
+            with open(folder / f"{name}.json", encoding="utf8") as f:
+                data[name] = json.load(f)
+        return cls.from_dicts(data["G"], data["Dist"], data["Cost"], data["Coord"])
+
+    # the cached memoryviews cannot be pickled, e.g. when sending the graph to worker processes
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_views"] = None
+        state["_reverse"] = None
+        state["_workspaces"] = None
+        state["_bounds_cache"] = None
+        return state
+
+    @property
+    def num_nodes(self):
+        return len(self.offsets) - 1
+
+    @property
+    def num_arcs(self):
+        return len(self.targets)
+
+    """
+    integral_weights
+    - True if every distance is a non-negative integer, checked once per graph
+    - such graphs can be searched with a RadixHeap instead of a comparison based heap
+    """
+    @property
+    def integral_weights(self):
+        if self._integral_weights is None:
+            dist = np.asarray(self.dist)
+            self._integral_weights = bool(
+                dist.dtype.kind in "iu" and (dist.size == 0 or dist.min() >= 0))
+        return self._integral_weights
+
+    def node_id(self, label):
+        if self._index is None:
+            self._index = {str(label): i for i, label in enumerate(self.labels)}
+        return self._index[label]
+
+    def label(self, node):
+        return str(self.labels[node])
+
+    """
+    views
+    - memoryviews of (offsets, targets, dist, energy)
+    - indexing a memoryview returns plain python numbers, which is much
+      faster than indexing a numpy array element by element in the search loops
+    """
+    def views(self):
+        if self._views is None:
+            self._views = tuple(
+                memoryview(np.ascontiguousarray(a))
+                for a in (self.offsets, self.targets, self.dist, self.energy)
+            )
+        return self._views
+
+    """
+    workspaces
+    - pool of the SearchWorkspace of this graph, see search_state.py
+    """
+    @property
+    def workspaces(self):
+        if self._workspaces is None:
+            # imported here so that the graph does not depend on the searches
+            from search_state import SearchWorkspace, WorkspacePool
+            num_nodes = self.num_nodes
+            self._workspaces = WorkspacePool(lambda: SearchWorkspace(num_nodes))
+        return self._workspaces
+
+    """
+    bounds_cache
+    - least energy of every node to the recently searched targets, see energy_bounds.py
+    """
+    @property
+    def bounds_cache(self):
+        if self._bounds_cache is None:
+            from energy_bounds import BoundsCache
+            self._bounds_cache = BoundsCache(self)
+        return self._bounds_cache
+
+    """
+    with_weights
+    - same graph with dist replaced, e.g. by a combination of distance and energy
+    - only the new array is allocated, everything else is shared
+    """
+    def with_weights(self, dist):
+        weighted = CompiledGraph(
+            self.labels, self.offsets, self.targets, dist, self.energy, self.coords, self.tails)
+        weighted._index = self._index
+        weighted._workspaces = self.workspaces
+        weighted._bounds_cache = self.bounds_cache
+        return weighted
+
+    """
+    arc
+    - returns the id of the first arc from u to v (integer ids)
+    - raises KeyError if there is no such arc
+    """
+    def arc(self, u, v):
+        offsets, targets, _, _ = self.views()
+        for arc in range(offsets[u], offsets[u + 1]):
+            if targets[arc] == v:
+                return arc
+        raise KeyError(f"{self.label(u)},{self.label(v)}")
+
+    """
+    reverse
+    - graph with every arc turned around, built once and cached
+    - reverse.arc_ids[arc] is the id of the same arc in this graph
+    """
+    def reverse(self):
+        if self._reverse is None:
+            order = np.argsort(self.targets, kind="stable")
+            counts = np.bincount(self.targets, minlength=self.num_nodes)
+            offsets = np.zeros(self.num_nodes + 1, dtype=np.int64)
+            np.cumsum(counts, out=offsets[1:])
+            reverse = CompiledGraph(
+                self.labels,
+                offsets,
+                self.tails[order],
+                self.dist[order],
+                self.energy[order],
+                self.coords,
+            )
+            reverse.arc_ids = order
+            reverse._index = self._index
+            reverse._reverse = self
+            self._reverse = reverse
+        return self._reverse
+
+
+"""
+as_compiled
+- returns graph unchanged if it is already a CompiledGraph
+- otherwise compiles an adjacency list with its cost_func and energy_func
+- compiling reads every edge once, so callers answering many queries on the
+  same graph should compile it themselves and reuse the result
+"""
+def as_compiled(graph, cost_func=None, energy_func=None):
+    if isinstance(graph, CompiledGraph):
+        return graph
+    if cost_func is None or energy_func is None:
+        raise ValueError("cost_func and energy_func are needed to compile an adjacency list")
+    return CompiledGraph.from_callbacks(graph, cost_func, energy_func)
+
+
+"""
+require_compiled
+- returns graph if it is a CompiledGraph, ValueError otherwise
+- for the searches that only run on the arrays of a CompiledGraph (bidirectional,
+  label, pareto, incremental): compiling an adjacency list for every query would
+  cost more than the search, and a compiled copy kept for later queries would miss
+  any edge the caller changes, so the caller compiles it once with as_compiled
+"""
+def require_compiled(graph, search):
+    if not isinstance(graph, CompiledGraph):
+        raise ValueError(
+            "{0} needs a CompiledGraph: compile the adjacency list once with "
+            "as_compiled(graph, cost_func, energy_func) and reuse it".format(search))
+    return graph
@@ -0,0 +1,414 @@
+"""
+Contraction hierarchies for unconstrained shortest distance queries (task 1)
+
+Preprocessing removes ("contracts") the nodes one by one, from least to most
+important. When v is contracted, a shortcut u -> w is added for every pair of
+neighbours whose only shortest connection ran through v. The rank of a node is the
+order in which it was contracted.
+
+A query then runs a bidirectional Dijkstra that only follows arcs towards higher
+ranked nodes: forward from s over the upward arcs, backward from d over the
+downward arcs. Both searches stay small, and shortcuts are unpacked back into the
+original nodes at the end.
+
+On a 10,000 node RoadGrid (see synthetic_graph.py) the build takes about 20 s,
+after which a query takes about 2 ms against 50 to 70 ms for dijkstra_task1, so
+the build pays for itself after a few hundred queries.
+
+usage: python contraction.py
+"""
+from heapq import heappush, heappop, heapify
+from pathlib import Path
+
+import sys
+import numpy as np
+
+from task2 import NoPathError, PathInfo
+
+
+"""
+ContractionHierarchy
+- ranks plus two CSR graphs over the original node ids
+    - up: arcs u -> w with rank[w] > rank[u], stored at u
+    - down: arcs u -> w with rank[u] > rank[w], stored at w (so the backward search
+      from d can follow them in reverse)
+- every arc has a distance, an energy, and the contracted middle node of a shortcut
+  (-1 for an original arc)
+"""
+class ContractionHierarchy:
+
+    def __init__(self, labels, rank, up, down):
+        self.labels = labels
+        self.rank = rank
+        self.up = up            # (offsets, heads, dist, energy, middle)
+        self.down = down        # (offsets, tails, dist, energy, middle)
+        self._index = None
+        self._views = None
+
+    def node_id(self, label):
+        if self._index is None:
+            self._index = {str(label): i for i, label in enumerate(self.labels)}
+        return self._index[label]
+
+    def views(self):
+        if self._views is None:
+            self._views = tuple(
+                tuple(memoryview(np.ascontiguousarray(a)) for a in arrays)
+                for arrays in (self.up, self.down)
+            )
+        return self._views
+
+    """
+    save / load
+    - one uncompressed .npz file
+    """
+    def save(self, path):
+        arrays = {"labels": np.array([str(label) for label in self.labels]), "rank": self.rank}
+        for name, graph in (("up", self.up), ("down", self.down)):
+            for field, array in zip(("offsets", "nodes", "dist", "energy", "middle"), graph):
+                arrays[f"{name}_{field}"] = array
+        np.savez(path, **arrays)
+        return Path(path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            def graph(name):
+                return tuple(data[f"{name}_{field}"]
+                             for field in ("offsets", "nodes", "dist", "energy", "middle"))
+            return cls(data["labels"], data["rank"], graph("up"), graph("down"))
+
+    """
+    query
+    - shortest distance path from s to d (node labels)
+    - output:
+        - PathInfo with the original nodes of the path
+    """
+    def query(self, s, d):
+        s, d = self.node_id(s), self.node_id(d)
+        found = self.search(s, d)
+        if found is None:
+            raise NoPathError("Could not find a path from {0} to {1}".format(
+                self.labels[s], self.labels[d]))
+
+        distance, forward_arcs, backward_arcs = found
+        nodes = [s]
+        energy = 0
+        (_, up_heads, _, up_energy, _), (_, _, _, down_energy, _) = self.views()
+        for arc in forward_arcs:
+            energy += up_energy[arc]
+            self.unpack(nodes[-1], up_heads[arc], ("up", arc), nodes)
+        for arc, head in backward_arcs:
+            energy += down_energy[arc]
+            self.unpack(nodes[-1], head, ("down", arc), nodes)
+
+        return PathInfo([str(self.labels[v]) for v in nodes], distance, energy)
+
+    """
+    search
+    - the bidirectional upward search
+    - output:
+        - (distance, up arcs from s to the top node, (down arc, head) pairs from it to d),
+          or None if d cannot be reached
+    """
+    def search(self, s, d):
+
+        if s == d:
+            return 0, [], []
+
+        up, down = self.views()
+        sides = (up, down)
+
+        costs = ({s: 0}, {d: 0})
+        predecessors = ({s: None}, {d: None})
+        visit_queues = ([(0, s)], [(0, d)])
+        visited = (set(), set())
+        best = float("inf")
+        meeting_node = None
+
+        # each side runs until its smallest key can no longer improve best
+        while ((visit_queues[0] and visit_queues[0][0][0] < best)
+               or (visit_queues[1] and visit_queues[1][0][0] < best)):
+
+            if not visit_queues[1] or visit_queues[1][0][0] >= best:
+                side = 0
+            elif not visit_queues[0] or visit_queues[0][0][0] >= best:
+                side = 1
+            else:
+                side = 0 if visit_queues[0][0][0] <= visit_queues[1][0][0] else 1
+
+            cost_to_u, u = heappop(visit_queues[side])
+            if u in visited[side]:
+                continue
+            visited[side].add(u)
+
+            if u in costs[1 - side] and cost_to_u + costs[1 - side][u] < best:
+                best = cost_to_u + costs[1 - side][u]
+                meeting_node = u
+
+            # stall-on-demand: u is not expanded if a higher ranked node this side has
+            # reached is shorter to go through (forward, a down arc x -> u stored at u;
+            # backward, an up arc u -> x), as the shortest path to u then leaves the
+            # upward search anyway
+            side_costs = costs[side]
+            offsets, nodes, dist, _, _ = sides[1 - side]
+            stalled = False
+            for arc in range(offsets[u], offsets[u + 1]):
+                x = nodes[arc]
+                if x in side_costs and side_costs[x] + dist[arc] < cost_to_u:
+                    stalled = True
+                    break
+            if stalled:
+                continue
+
+            offsets, nodes, dist, _, _ = sides[side]
+            for arc in range(offsets[u], offsets[u + 1]):
+                v = nodes[arc]
+                cost_to_v = cost_to_u + dist[arc]
+                if v not in side_costs or cost_to_v < side_costs[v]:
+                    side_costs[v] = cost_to_v
+                    predecessors[side][v] = (u, arc)
+                    heappush(visit_queues[side], (cost_to_v, v))
+
+        if meeting_node is None:
+            return None
+
+        forward_arcs = []
+        node = meeting_node
+        while predecessors[0][node] is not None:
+            node, arc = predecessors[0][node]
+            forward_arcs.append(arc)
+        forward_arcs.reverse()
+
+        backward_arcs = []
+        node = meeting_node
+        while predecessors[1][node] is not None:
+            head, arc = predecessors[1][node]
+            backward_arcs.append((arc, head))
+            node = head
+
+        return best, forward_arcs, backward_arcs
+
+    """
+    upward_search
+    - Dijkstra from node over the upward arcs (or, with backward=True, backwards over
+      the downward arcs) until the queue is empty
+    - output:
+        - dictionaries of the distance and the energy of the path found to each node
+    """
+    def upward_search(self, node, backward=False):
+
+        offsets, nodes, dist, energy, _ = self.views()[1 if backward else 0]
+        costs = {node: 0}
+        energies = {node: 0}
+        visited = set()
+        visit_queue = [(0, node)]
+
+        while visit_queue:
+            cost_to_u, u = heappop(visit_queue)
+            if u in visited:
+                continue
+            visited.add(u)
+            for arc in range(offsets[u], offsets[u + 1]):
+                v = nodes[arc]
+                cost_to_v = cost_to_u + dist[arc]
+                if v not in costs or cost_to_v < costs[v]:
+                    costs[v] = cost_to_v
+                    energies[v] = energies[u] + energy[arc]
+                    heappush(visit_queue, (cost_to_v, v))
+
+        return costs, energies
+
+    """
+    unpack
+    - appends the original nodes after u of the arc u -> w to nodes, replacing every
+      shortcut by the two arcs through its middle node
+    """
+    def unpack(self, u, w, arc, nodes):
+
+        up, down = self.views()
+        stack = [(u, w, arc)]
+
+        while stack:
+            u, w, (direction, arc) = stack.pop()
+            middle = (up if direction == "up" else down)[4][arc]
+            if middle < 0:
+                nodes.append(w)
+                continue
+            # both halves lead up to u and w from the lower ranked middle node:
+            # u -> middle is a down arc stored at middle, middle -> w an up arc
+            stack.append((middle, w, ("up", self.find_arc(up, middle, w))))
+            stack.append((u, middle, ("down", self.find_arc(down, middle, u))))
+
+    @staticmethod
+    def find_arc(graph, node, other):
+        offsets, nodes, dist, _, _ = graph
+        best = None
+        for arc in range(offsets[node], offsets[node + 1]):
+            if nodes[arc] == other and (best is None or dist[arc] < dist[best]):
+                best = arc
+        return best
+
+
+"""
+build_contraction_hierarchy
+- arguments:
+    - graph: a CompiledGraph, only its distances are used
+    - witness_limit: nodes settled by each witness search before giving up and
+      adding the shortcut (a smaller limit builds faster but adds more shortcuts)
+- output:
+    - ContractionHierarchy
+"""
+def build_contraction_hierarchy(graph, witness_limit=500):
+
+    n = graph.num_nodes
+    offsets, targets, dist, energy = graph.views()
+
+    # remaining graph: node -> {neighbour: (distance, energy, middle)}, shortest arc kept
+    out_arcs = [dict() for _ in range(n)]
+    in_arcs = [dict() for _ in range(n)]
+    for u in range(n):
+        for arc in range(offsets[u], offsets[u + 1]):
+            v = targets[arc]
+            if v == u:
+                continue
+            if v not in out_arcs[u] or dist[arc] < out_arcs[u][v][0]:
+                out_arcs[u][v] = in_arcs[v][u] = (dist[arc], energy[arc], -1)
+
+    deleted_neighbors = [0] * n
+    rank = np.zeros(n, dtype=np.int32)
+    up_arcs = []            # (u, w, distance, energy, middle) with rank[w] > rank[u]
+    down_arcs = []
+
+    # shortcuts(v) found by the last priority(v), dropped once an arc of v changes;
+    # other changes to the remaining graph never lengthen a witness, so at worst a
+    # kept list has a shortcut that a new witness search would no longer add
+    needed_shortcuts = {}
+
+    def shortcuts(v):
+        needed = []
+        for u, (dist_uv, energy_uv, _) in in_arcs[v].items():
+            limit = max((dist_uv + dist_vw for w, (dist_vw, _, _) in out_arcs[v].items() if w != u),
+                        default=None)
+            if limit is None:
+                continue
+            witness = witness_search(out_arcs, u, v, limit, witness_limit)
+            for w, (dist_vw, energy_vw, _) in out_arcs[v].items():
+                if w != u and witness.get(w, float("inf")) > dist_uv + dist_vw:
+                    needed.append((u, w, dist_uv + dist_vw, energy_uv + energy_vw))
+        return needed
+
+    def priority(v):
+        if v not in needed_shortcuts:
+            needed_shortcuts[v] = shortcuts(v)
+        edge_difference = len(needed_shortcuts[v]) - len(in_arcs[v]) - len(out_arcs[v])
+        return edge_difference + deleted_neighbors[v]
+
+    visit_queue = [(priority(v), v) for v in range(n)]
+    heapify(visit_queue)
+    order = 0
+
+    while visit_queue:
+
+        _, v = heappop(visit_queue)
+
+        # lazy update: contract v only if it is still the least important node
+        current = priority(v)
+        if visit_queue and current > visit_queue[0][0]:
+            heappush(visit_queue, (current, v))
+            continue
+
+        # priority(v) above computed them, or kept them while no arc of v changed
+        for u, w, shortcut_dist, shortcut_energy in needed_shortcuts.pop(v):
+            if w not in out_arcs[u] or shortcut_dist < out_arcs[u][w][0]:
+                out_arcs[u][w] = in_arcs[w][u] = (shortcut_dist, shortcut_energy, v)
+
+        # every remaining arc of v ends at a higher ranked node
+        for w, (arc_dist, arc_energy, middle) in out_arcs[v].items():
+            up_arcs.append((v, w, arc_dist, arc_energy, middle))
+            del in_arcs[w][v]
+            deleted_neighbors[w] += 1
+            needed_shortcuts.pop(w, None)
+        for u, (arc_dist, arc_energy, middle) in in_arcs[v].items():
+            down_arcs.append((u, v, arc_dist, arc_energy, middle))
+            del out_arcs[u][v]
+            deleted_neighbors[u] += 1
+            needed_shortcuts.pop(u, None)
+        out_arcs[v] = {}
+        in_arcs[v] = {}
+
+        rank[v] = order
+        order += 1
+
+    return ContractionHierarchy(
+        list(graph.labels),
+        rank,
+        to_csr(n, up_arcs, key=0, other=1),
+        to_csr(n, down_arcs, key=1, other=0),
+    )
+
+
+"""
+witness_search
+- Dijkstra from u in the remaining graph, never passing through v
+- stops after limit distance or witness_limit settled nodes
+- output:
+    - dictionary of the distances found
+"""
+def witness_search(out_arcs, u, v, limit, witness_limit):
+
+    costs = {u: 0}
+    visited = set()
+    visit_queue = [(0, u)]
+
+    while visit_queue and len(visited) < witness_limit:
+        cost, x = heappop(visit_queue)
+        if cost > limit:
+            break
+        if x in visited:
+            continue
+        visited.add(x)
+        for y, (arc_dist, _, _) in out_arcs[x].items():
+            if y == v:
+                continue
+            if y not in costs or cost + arc_dist < costs[y]:
+                costs[y] = cost + arc_dist
+                heappush(visit_queue, (costs[y], y))
+
+    return costs
+
+
+"""
+to_csr
+- arcs grouped by the node in position key of each (u, w, distance, energy, middle)
+- output:
+    - (offsets, other nodes, distances, energies, middle nodes)
+"""
+def to_csr(n, arcs, key, other):
+
+    arcs.sort(key=lambda arc: arc[key])
+    counts = np.bincount(np.array([arc[key] for arc in arcs], dtype=np.int64), minlength=n)
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+
+    return (
+        offsets,
+        np.array([arc[other] for arc in arcs], dtype=np.int32),
+        np.array([arc[2] for arc in arcs]),
+        np.array([arc[3] for arc in arcs]),
+        np.array([arc[4] for arc in arcs], dtype=np.int32),
+    )
+
+
+def default_hierarchy_path(graph):
+    if graph.cache_folder is None:
+        raise ValueError("graph was not loaded from a cache, a file name is needed")
+    return Path(graph.cache_folder) / "contraction_hierarchy.npz"
+
+
+if __name__ == "__main__":
+    from graph_store import GraphStore
+
+    graph = GraphStore.get().compiled
+    path = build_contraction_hierarchy(graph).save(default_hierarchy_path(graph))
+    print("Wrote contraction hierarchy to", path)
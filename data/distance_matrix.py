@@ -0,0 +1,129 @@
+"""
+Many-to-many shortest distance and energy matrices
+
+Instead of one find_path per (source, target) pair, one Dijkstra runs per source
+and only stops once every target is settled. The energy of each shortest path is
+added up along the search tree as it grows.
+
+With a contraction hierarchy the bucket method is used instead: one backward
+upward search per target fills a bucket at every node it reaches, and one forward
+upward search per source combines its distances with the buckets it meets.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from heapq import heappush, heappop
+
+import os
+import numpy as np
+
+import batch
+
+
+"""
+one_to_many
+- Dijkstra from source until all targets (integer ids) are settled
+- output:
+    - (distances, energies): numpy rows aligned with targets, inf if unreachable
+"""
+def one_to_many(graph, source, targets):
+
+    offsets, heads, dist, energy = graph.views()
+    remaining = set(targets)
+    costs = {source: 0}
+    energies = {source: 0}
+    visited = set()
+    visit_queue = [(0, source)]
+
+    while visit_queue and remaining:
+
+        cost_of_s_to_u, u = heappop(visit_queue)
+        if u in visited:
+            continue
+        visited.add(u)
+        remaining.discard(u)
+
+        for arc in range(offsets[u], offsets[u + 1]):
+            v = heads[arc]
+            if v in visited:
+                continue
+            cost_of_s_to_u_plus_cost_of_e = cost_of_s_to_u + dist[arc]
+            if v not in costs or cost_of_s_to_u_plus_cost_of_e < costs[v]:
+                costs[v] = cost_of_s_to_u_plus_cost_of_e
+                energies[v] = energies[u] + energy[arc]
+                heappush(visit_queue, (cost_of_s_to_u_plus_cost_of_e, v))
+
+    inf = float("inf")
+    return (
+        np.array([costs[t] if t in visited else inf for t in targets], dtype=np.float64),
+        np.array([energies[t] if t in visited else inf for t in targets], dtype=np.float64),
+    )
+
+
+def one_to_many_rows(sources, targets):
+    return [one_to_many(batch.worker_graph, source, targets) for source in sources]
+
+
+"""
+bucket_many_to_many
+- many-to-many query on a ContractionHierarchy (integer ids)
+- output:
+    - (distances, energies) matrices
+"""
+def bucket_many_to_many(hierarchy, sources, targets):
+
+    distances = np.full((len(sources), len(targets)), np.inf)
+    energies = np.full((len(sources), len(targets)), np.inf)
+
+    # node -> [(target column, distance to the target, energy to the target)]
+    buckets = {}
+    for column, target in enumerate(targets):
+        costs, target_energies = hierarchy.upward_search(target, backward=True)
+        for node, cost in costs.items():
+            buckets.setdefault(node, []).append((column, cost, target_energies[node]))
+
+    for row, source in enumerate(sources):
+        costs, source_energies = hierarchy.upward_search(source)
+        row_distances, row_energies = distances[row], energies[row]
+        for node, cost in costs.items():
+            for column, target_cost, target_energy in buckets.get(node, ()):
+                if cost + target_cost < row_distances[column]:
+                    row_distances[column] = cost + target_cost
+                    row_energies[column] = source_energies[node] + target_energy
+
+    return distances, energies
+
+
+"""
+distance_matrix
+- arguments:
+    - graph: a CompiledGraph
+    - sources, targets: lists of node labels
+    - workers: processes running the per-source searches (1 runs them in this process)
+    - hierarchy: optional ContractionHierarchy of graph, to use the bucket method
+- output:
+    - (distances, energies): numpy matrices with one row per source and one column per
+      target; energies[i, j] is the energy of the shortest path, inf if there is none
+"""
+def distance_matrix(graph, sources, targets, workers=None, hierarchy=None):
+
+    source_ids = [graph.node_id(s) for s in sources]
+    target_ids = [graph.node_id(t) for t in targets]
+
+    if hierarchy is not None:
+        return bucket_many_to_many(hierarchy, source_ids, target_ids)
+
+    workers = workers or os.cpu_count()
+    if workers == 1:
+        rows = [one_to_many(graph, source, target_ids) for source in source_ids]
+    else:
+        chunksize = max(1, len(source_ids) // (4 * workers))
+        chunks = [source_ids[i:i + chunksize] for i in range(0, len(source_ids), chunksize)]
+        with batch.SharedGraph(graph) as shared, ProcessPoolExecutor(
+                workers, initializer=batch.init_worker, initargs=(shared.description,)) as executor:
+            rows = [row for chunk in executor.map(one_to_many_rows, chunks, [target_ids] * len(chunks))
+                    for row in chunk]
+
+    if not rows:
+        empty = np.zeros((0, len(target_ids)))
+        return empty, empty.copy()
+
+    return np.vstack([row[0] for row in rows]), np.vstack([row[1] for row in rows])
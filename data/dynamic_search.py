@@ -0,0 +1,212 @@
+"""
+Incremental repair of the shortest path tree for the edge-removal budget loop
+
+The original budget loop of task 2 / task 3 deletes the most energy intensive edge
+of a path over the budget and searches again from scratch, until a path meets the
+budget. Deleting an edge can only change the nodes below it in the shortest path
+tree, so DynamicShortestPathTree keeps the search state between iterations and only
+re-searches that subtree (a decremental Dijkstra / A*, in the spirit of LPA* and
+D* Lite).
+
+The rerun engine of find_path prunes its second search with the least energy to d
+(see energy_bounds.py), after which no edge is ever removed. The incremental engine
+keeps the unpruned edge-removal loop and returns the path that loop finds; it only
+uses the bounds to raise NoPathError right away when no path meets the budget.
+"""
+from heapq import heappush, heappop
+
+from task2 import NoPathError, path_info_from_arcs, energy_lower_bounds
+from task3 import heuristic_table
+from compiled_graph import require_compiled
+from edge_mask import EdgeMask
+
+import numpy as np
+
+
+"""
+DynamicShortestPathTree
+- search state of one s -> d query on a CompiledGraph
+- arguments:
+    - graph: a CompiledGraph
+    - s, d: integer node ids
+    - heuristic: optional function of a node id returning the estimated distance to d,
+      which must be consistent (as for A*)
+"""
+class DynamicShortestPathTree:
+
+    def __init__(self, graph, s, d, heuristic=None):
+        self.graph = graph
+        self.s = s
+        self.d = d
+        self.heuristic = heuristic or (lambda v: 0)
+        self.removed = EdgeMask()            # deleted arc ids
+
+        self.costs = {s: 0}                  # cost_of_s_to_u
+        self.predecessors = {s: None}        # arc used to reach each node
+        self.children = {s: set()}           # nodes reached through each node
+        self.visited = set()                 # settled nodes
+
+        # (f_score of u, cost_of_s_to_u, node)
+        self.visit_queue = [(self.heuristic(s), 0, s)]
+
+    """
+    search
+    - continues the search until d is taken from the queue
+    - output:
+        - number of nodes expanded
+    """
+    def search(self):
+
+        offsets, targets, dist, _ = self.graph.views()
+        costs, visited = self.costs, self.visited
+        visit_queue, removed = self.visit_queue, self.removed
+        expanded = 0
+
+        while visit_queue:
+
+            f_score, cost_of_s_to_u, u = visit_queue[0]
+
+            if u == self.d and costs.get(u) == cost_of_s_to_u:
+                break                        # left in the queue for the next repair
+
+            heappop(visit_queue)
+            if u in visited or costs.get(u) != cost_of_s_to_u:
+                continue                     # stale entry
+            visited.add(u)
+            expanded += 1
+
+            for arc in range(offsets[u], offsets[u + 1]):
+
+                if removed.is_disabled(arc):
+                    continue
+
+                v = targets[arc]
+                if v in visited:
+                    continue
+
+                cost_of_s_to_u_plus_cost_of_e = cost_of_s_to_u + dist[arc]
+
+                if v not in costs or cost_of_s_to_u_plus_cost_of_e < costs[v]:
+                    self._set_predecessor(v, arc, cost_of_s_to_u_plus_cost_of_e)
+
+        return expanded
+
+    """
+    remove_arc
+    - deletes an arc and repairs the tree below it, then searches again
+    - output:
+        - number of nodes expanded by the repair
+    """
+    def remove_arc(self, arc):
+
+        self.removed.disable(arc)
+        v = int(self.graph.targets[arc])
+        if self.predecessors.get(v) != arc:
+            return self.search()             # not a tree arc - nothing to repair
+
+        # every node reached through v has lost its path
+        subtree = [v]
+        for node in subtree:
+            subtree.extend(self.children[node])
+
+        parent = int(self.graph.tails[arc])
+        self.children[parent].discard(v)
+        for node in subtree:
+            self.visited.discard(node)
+            del self.costs[node]
+            del self.predecessors[node]
+            del self.children[node]
+
+        # reconnect each of them to the best settled node outside the subtree
+        reverse = self.graph.reverse()
+        offsets, tails, dist, _ = reverse.views()
+        arc_ids = reverse.arc_ids
+        for node in subtree:
+            for reverse_arc in range(offsets[node], offsets[node + 1]):
+                u = tails[reverse_arc]
+                if u not in self.visited:
+                    continue
+                arc = int(arc_ids[reverse_arc])
+                if self.removed.is_disabled(arc):
+                    continue
+                cost = self.costs[u] + dist[reverse_arc]
+                if node not in self.costs or cost < self.costs[node]:
+                    self._set_predecessor(node, arc, cost)
+
+        return self.search()
+
+    def _set_predecessor(self, v, arc, cost):
+        old = self.predecessors.get(v)
+        if old is not None:
+            self.children[int(self.graph.tails[old])].discard(v)
+        u = int(self.graph.tails[arc])
+        self.costs[v] = cost
+        self.predecessors[v] = arc
+        self.children.setdefault(u, set()).add(v)
+        self.children.setdefault(v, set())
+        heappush(self.visit_queue, (cost + self.heuristic(v), cost, v))
+
+    """
+    path_arcs
+    - arc ids of the current shortest path from s to d, None if d is unreachable
+    """
+    def path_arcs(self):
+
+        if self.d not in self.costs:
+            return None
+
+        tails = self.graph.tails
+        arcs = []
+        arc = self.predecessors[self.d]
+        while arc is not None:
+            arcs.append(arc)
+            arc = self.predecessors[int(tails[arc])]
+        arcs.reverse()
+
+        return arcs
+
+
+"""
+find_path_incremental
+- the edge-removal budget loop: while the path found is over the budget, delete its
+  most energy intensive edge (ties go to the edge closest to d) and search again,
+  each search only repairing the previous one
+- arguments:
+    - same as find_path_astar without cost_func and energy_func, heuristic_func may be
+      None for Dijkstra
+    - graph: a CompiledGraph, see require_compiled
+- output:
+    - PathInfo, with stats["expanded"] the number of nodes expanded by the first
+      search followed by the number re-expanded by the repair after each removal
+"""
+def find_path_incremental(graph, s, d, heuristic_func=None, alpha=1, energy_budget=287932):
+
+    graph = require_compiled(graph, "the incremental engine")
+    s, d = graph.node_id(s), graph.node_id(d)
+
+    heuristic = None
+    if heuristic_func:
+        heuristic = heuristic_table(graph, d, heuristic_func, alpha).__getitem__
+
+    tree = DynamicShortestPathTree(graph, s, d, heuristic)
+    expanded = [tree.search()]
+
+    while True:
+
+        arcs = tree.path_arcs()
+        if arcs is None:
+            raise NoPathError("Could not find a path from {0} to {1}".format(
+                graph.label(s), graph.label(d)))
+
+        if not energy_budget or graph.energy[arcs].sum() <= energy_budget:
+            break
+
+        if len(expanded) == 1:
+            # no edge removal can help if even the least energy path is over the budget
+            energy_lower_bounds(graph, s, d, energy_budget)
+
+        reverse_arcs = arcs[::-1]
+        arc = reverse_arcs[int(np.argmax(graph.energy[reverse_arcs]))]
+        expanded.append(tree.remove_arc(arc))
+
+    return path_info_from_arcs(graph, arcs, d)._replace(stats={"expanded": expanded})
@@ -0,0 +1,14 @@
+"""
+EdgeMask
+- per-query set of disabled edges, laid over a graph that is never modified
+- edges are (u, v) pairs for adjacency lists and arc ids for a CompiledGraph
+- disabling an edge and testing an edge are both O(1), and no copy of the
+  adjacency is made, so any number of queries can share one graph
+"""
+class EdgeMask(set):
+
+    def disable(self, edge):
+        self.add(edge)
+
+    def is_disabled(self, edge):
+        return edge in self
@@ -0,0 +1,244 @@
+"""
+Least energy needed to reach d, as lower bounds for the budgeted searches
+
+The search of task 2 only looks at the energy of a path once it has found it. One
+Dijkstra on the energies of the reversed graph, from d, gives for every node v the
+least energy of any path from v to d. A search that has used energy E to reach v
+can then drop v when
+    E + least energy from v to d > energy_budget
+because no continuation of that path meets the budget, and if even s needs more than
+the budget no path does.
+
+The reverse search stops once it has settled every node within the budget; nodes
+needing more than that are left at infinity, which prunes them just the same. The
+bounds of a CompiledGraph are cached with the graph (see BoundsCache). Those of a
+dict graph are computed for each query, on a reversed adjacency built for that
+query (see incoming_edges), since the caller may change the graph between queries.
+"""
+from array import array
+from collections import OrderedDict, namedtuple
+from heapq import heappush, heappop
+from threading import Lock
+
+import numpy as np
+
+from search_state import UNREACHED, NO_ARC
+
+# targets whose bounds a CompiledGraph keeps, see BoundsCache
+BOUNDS_CACHE_SIZE = 16
+
+
+"""
+EnergyBounds
+- d: the target
+- radius: energy up to which the bounds are exact, None for no limit
+- to_go[v]: least energy of a path from v to d, UNREACHED if there is none within radius
+    - CompiledGraph: a list indexed by node id (faster than numpy in the search loops)
+    - dict graph: a dictionary of the labels, UNREACHED for any other label
+- next_hops[v]: first step of such a path
+    - CompiledGraph: arc id (NO_ARC for d and the unreached nodes), None when the
+      bounds were computed on a reversed graph
+    - dict graph: label of the next node
+"""
+EnergyBounds = namedtuple("EnergyBounds", ("d", "radius", "to_go", "next_hops"))
+
+
+class _Unbounded(dict):
+
+    def __missing__(self, v):
+        return UNREACHED
+
+
+"""
+least_energy_to
+- reverse Dijkstra on the energies of a CompiledGraph, from d
+- arguments:
+    - graph: a CompiledGraph
+    - d: integer node id
+    - radius: stop once every node needing at most this much energy is settled
+- output:
+    - EnergyBounds
+"""
+def least_energy_to(graph, d, radius=None):
+
+    reverse = graph.reverse()
+    offsets, tails, _, energy = reverse.views()
+    limit = UNREACHED if radius is None else radius
+
+    to_go = array("d", [UNREACHED]) * graph.num_nodes
+    next_hops = array("q", [NO_ARC]) * graph.num_nodes
+    settled = bytearray(graph.num_nodes)
+    to_go[d] = 0
+    visit_queue = [(0, d)]
+
+    while visit_queue:
+
+        energy_to_d, v = heappop(visit_queue)
+        if settled[v]:
+            continue
+        if energy_to_d > limit:
+            break                                # every node left needs more than radius
+        settled[v] = 1
+
+        # arcs u -> v of graph, stored at v in the reversed graph
+        for reverse_arc in range(offsets[v], offsets[v + 1]):
+            u = tails[reverse_arc]
+            if settled[u]:
+                continue
+            energy_from_u = energy_to_d + energy[reverse_arc]
+            if energy_from_u < to_go[u]:
+                to_go[u] = energy_from_u
+                next_hops[u] = reverse_arc
+                heappush(visit_queue, (energy_from_u, u))
+
+    # nodes reached but not settled only have an upper bound, and need more than radius
+    to_go = np.frombuffer(to_go, dtype=np.float64)
+    to_go[np.frombuffer(settled, dtype=np.uint8) == 0] = UNREACHED
+
+    arc_ids = getattr(reverse, "arc_ids", None)
+    if arc_ids is None:
+        next_hops = None
+    else:
+        next_hops = np.frombuffer(next_hops, dtype=np.int64)
+        next_hops = np.where(next_hops == NO_ARC, NO_ARC, arc_ids[np.maximum(next_hops, 0)])
+        next_hops = next_hops.tolist()
+
+    return EnergyBounds(d, radius, to_go.tolist(), next_hops)
+
+
+"""
+incoming_edges
+- the reversed adjacency of a dict graph: incoming[v] lists the nodes u with an edge u -> v
+"""
+def incoming_edges(graph):
+
+    incoming = {}
+    for u, neighbors in graph.items():
+        for v in neighbors:
+            incoming.setdefault(v, []).append(u)
+
+    return incoming
+
+
+"""
+least_energy_to_label
+- same as least_energy_to, on an adjacency list with its energy_func
+"""
+def least_energy_to_label(graph, d, energy_func, radius=None):
+
+    incoming = incoming_edges(graph)
+    limit = UNREACHED if radius is None else radius
+    to_go = {d: 0}
+    next_hops = {}
+    settled = _Unbounded()
+    visit_queue = [(0, d)]
+
+    while visit_queue:
+
+        energy_to_d, v = heappop(visit_queue)
+        if v in settled:
+            continue
+        if energy_to_d > limit:
+            break
+        settled[v] = energy_to_d
+
+        for u in incoming.get(v, ()):
+            if u in settled:
+                continue
+            energy_from_u = energy_to_d + energy_func(u, v)
+            if energy_from_u < to_go.get(u, UNREACHED):
+                to_go[u] = energy_from_u
+                next_hops[u] = v
+                heappush(visit_queue, (energy_from_u, u))
+
+    return EnergyBounds(d, radius, settled, next_hops)
+
+
+"""
+BoundsCache
+- the EnergyBounds of a CompiledGraph for its most recently asked targets
+- get(d, radius) reuses cached bounds computed for a radius at least as large
+"""
+class BoundsCache:
+
+    def __init__(self, graph, size=BOUNDS_CACHE_SIZE):
+        self.graph = graph
+        self.size = size
+        self.entries = OrderedDict()           # d -> EnergyBounds, most recently used last
+        self.hits = self.misses = 0
+        self._lock = Lock()
+
+    def get(self, d, radius=None):
+
+        with self._lock:
+            bounds = self.entries.get(d)
+            if bounds is not None and covers(bounds.radius, radius):
+                self.entries.move_to_end(d)
+                self.hits += 1
+                return bounds
+            self.misses += 1
+
+        bounds = least_energy_to(self.graph, d, radius)
+
+        with self._lock:
+            cached = self.entries.get(d)
+            if cached is None or not covers(cached.radius, radius):
+                self.entries[d] = bounds
+            self.entries.move_to_end(d)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+        return bounds
+
+
+def covers(radius, wanted):
+    return radius is None or (wanted is not None and wanted <= radius)
+
+
+"""
+lower_bounds
+- arguments:
+    - graph: an adjacency list or a CompiledGraph
+    - d: the target (integer id on a CompiledGraph)
+    - energy_budget: None or 0 for no budget
+    - energy_func: needed for an adjacency list
+- output:
+    - EnergyBounds up to energy_budget, None if there is no budget
+"""
+def lower_bounds(graph, d, energy_budget, energy_func=None):
+
+    if not energy_budget:
+        return None
+    if hasattr(graph, "bounds_cache"):
+        return graph.bounds_cache.get(d, energy_budget)
+
+    return least_energy_to_label(graph, d, energy_func, energy_budget)
+
+
+"""
+least_energy_arcs
+- arc ids of the least energy path from s to d of bounds on a CompiledGraph
+"""
+def least_energy_arcs(graph, bounds, s):
+
+    targets, next_hops = graph.targets, bounds.next_hops
+    arcs = []
+    v = s
+    while v != bounds.d:
+        arcs.append(next_hops[v])
+        v = int(targets[next_hops[v]])
+
+    return arcs
+
+
+"""
+least_energy_nodes
+- nodes of the least energy path from s to d of bounds on an adjacency list
+"""
+def least_energy_nodes(bounds, s):
+
+    nodes = [s]
+    while nodes[-1] != bounds.d:
+        nodes.append(bounds.next_hops[nodes[-1]])
+
+    return nodes
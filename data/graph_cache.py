@@ -0,0 +1,234 @@
+"""
+Binary cache of a CompiledGraph
+
+The json files are converted once into a directory of .npy files plus a small
+header.json. Loading memory-maps the .npy files read-only, so a process starts in
+milliseconds and every process on the same machine shares the same page cache.
+
+usage: python graph_cache.py <json folder> [cache folder]
+"""
+from pathlib import Path
+
+import hashlib
+import json
+import os
+import shutil
+import sys
+import numpy as np
+
+from compiled_graph import CompiledGraph
+
+# bump whenever the layout of the cache directory changes
+CACHE_VERSION = 1
+
+SOURCE_FILES = ("G.json", "Dist.json", "Cost.json", "Coord.json")
+ARRAYS = ("labels", "offsets", "targets", "tails", "dist", "energy", "coords")
+
+
+"""
+default_cache_folder
+- the cache lives next to the json files unless told otherwise
+"""
+def default_cache_folder(json_folder):
+    return Path(json_folder) / "compiled"
+
+
+"""
+file_checksum
+- sha256 of a file, read in chunks so large files are never fully in memory
+"""
+def file_checksum(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def source_info(json_folder):
+    sources = {}
+    for name in SOURCE_FILES:
+        path = Path(json_folder) / name
+        stat = path.stat()
+        sources[name] = {
+            "mtime": stat.st_mtime,
+            "size": stat.st_size,
+            "sha256": file_checksum(path),
+        }
+    return sources
+
+
+"""
+write_graph_cache
+- writes a CompiledGraph to cache_folder
+- arguments:
+    - graph: the CompiledGraph
+    - cache_folder: output directory, replaced if it already exists
+    - sources: information about the json files the graph was built from
+- the directory is written next to the target and renamed into place, see
+  new_tmp_folder
+"""
+def write_graph_cache(graph, cache_folder, sources=None):
+
+    cache_folder = Path(cache_folder)
+    tmp_folder = new_tmp_folder(cache_folder)
+
+    arrays = {
+        "labels": np.array([str(label) for label in graph.labels]),
+        "offsets": graph.offsets,
+        "targets": graph.targets,
+        "tails": graph.tails,
+        "dist": graph.dist,
+        "energy": graph.energy,
+        "coords": graph.coords,
+    }
+    for name, array in arrays.items():
+        if array is not None:
+            np.save(tmp_folder / f"{name}.npy", np.ascontiguousarray(array))
+
+    write_cache_header(tmp_folder, graph.num_nodes, graph.num_arcs, sources)
+    replace_folder(tmp_folder, cache_folder)
+
+
+"""
+new_tmp_folder / replace_folder
+- a cache is written to an empty <cache folder>.tmp next to it, then renamed over
+  cache_folder, so a reader never sees a half written cache
+"""
+def new_tmp_folder(cache_folder):
+    tmp_folder = cache_folder.with_name(cache_folder.name + ".tmp")
+    if tmp_folder.exists():
+        shutil.rmtree(tmp_folder)
+    tmp_folder.mkdir(parents=True)
+    return tmp_folder
+
+
+def replace_folder(tmp_folder, cache_folder):
+    if cache_folder.exists():
+        shutil.rmtree(cache_folder)
+    os.replace(tmp_folder, cache_folder)
+
+
+"""
+write_cache_header
+- writes header.json of a cache folder
+- extra: more information to keep in the header, e.g. how a synthetic graph was made
+"""
+def write_cache_header(cache_folder, num_nodes, num_arcs, sources=None, **extra):
+
+    header = {
+        "version": CACHE_VERSION,
+        "num_nodes": num_nodes,
+        "num_arcs": num_arcs,
+        "sources": sources or {},
+        **extra,
+    }
+    with open(Path(cache_folder) / "header.json", "w", encoding="utf8") as f:
+        json.dump(header, f, indent=2)
+
+
+"""
+convert_json_to_cache
+- one-time conversion of G.json/Dist.json/Cost.json/Coord.json to a binary cache
+- the files are streamed (see ingest.py), so they are never fully in memory
+- output:
+    - the cache folder
+"""
+def convert_json_to_cache(json_folder, cache_folder=None):
+
+    # imported here because ingest builds on this module
+    from ingest import ingest_json
+    return ingest_json(json_folder, cache_folder).cache_folder
+
+
+"""
+cache_is_current
+- checks the cache header against the json files
+- a source is only re-hashed when its mtime or size changed, so the common case
+  costs a few stat calls; a touched but unchanged file has its mtime refreshed
+"""
+def cache_is_current(cache_folder, json_folder):
+
+    header_path = Path(cache_folder) / "header.json"
+    if not header_path.exists():
+        return False
+
+    with open(header_path, encoding="utf8") as f:
+        header = json.load(f)
+    if header.get("version") != CACHE_VERSION:
+        return False
+
+    sources = header.get("sources", {})
+    refreshed = False
+    for name in SOURCE_FILES:
+        path = Path(json_folder) / name
+        if name not in sources:
+            return False
+        stat = path.stat()
+        recorded = sources[name]
+        if stat.st_mtime <= recorded["mtime"] and stat.st_size == recorded["size"]:
+            continue
+        if file_checksum(path) != recorded["sha256"]:
+            return False
+        recorded["mtime"] = stat.st_mtime
+        refreshed = True
+
+    if refreshed:
+        with open(header_path, "w", encoding="utf8") as f:
+            json.dump(header, f, indent=2)
+
+    return True
+
+
+"""
+load_graph_cache
+- memory-maps a cache written by write_graph_cache
+- arguments:
+    - cache_folder: the cache directory
+    - json_folder: optional - if given, the cache is (re)built from the json
+      files when it is missing, from an older version, or out of date
+- output:
+    - CompiledGraph backed by read-only memory maps
+"""
+def load_graph_cache(cache_folder=None, json_folder=None):
+
+    if cache_folder is None:
+        if json_folder is None:
+            raise ValueError("either cache_folder or json_folder is needed")
+        cache_folder = default_cache_folder(json_folder)
+    cache_folder = Path(cache_folder)
+
+    if json_folder is not None and not cache_is_current(cache_folder, json_folder):
+        convert_json_to_cache(json_folder, cache_folder)
+
+    with open(cache_folder / "header.json", encoding="utf8") as f:
+        header = json.load(f)
+    if header["version"] != CACHE_VERSION:
+        raise ValueError("{0} has cache version {1}, expected {2}".format(
+            cache_folder, header["version"], CACHE_VERSION))
+
+    arrays = {}
+    for name in ARRAYS:
+        path = cache_folder / f"{name}.npy"
+        arrays[name] = np.load(path, mmap_mode="r") if path.exists() else None
+
+    graph = CompiledGraph(
+        arrays["labels"],
+        arrays["offsets"],
+        arrays["targets"],
+        arrays["dist"],
+        arrays["energy"],
+        arrays["coords"],
+        arrays["tails"],
+    )
+    graph.cache_folder = cache_folder
+
+    return graph
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (2, 3):
+        print(__doc__.strip().splitlines()[-1])
+        sys.exit(1)
+    folder = convert_json_to_cache(*sys.argv[1:])
+    print("Wrote graph cache to", folder)
@@ -0,0 +1,83 @@
+from pathlib import Path
+from threading import Lock
+
+import json
+
+# G.json, Dist.json, Cost.json and Coord.json live next to the code
+DEFAULT_DATA_FOLDER = Path(__file__).resolve().parent
+
+
+"""
+GraphStore
+- lazy access to the data of one dataset folder
+- nothing is read until an attribute is first used:
+    - store.G, store.Dist, store.Cost, store.Coord: the json files
+    - store.compiled: the CompiledGraph, memory-mapped from the binary cache
+- use GraphStore.get(folder) so the whole process shares one store per folder
+"""
+class GraphStore:
+
+    _stores = {}
+    _stores_lock = Lock()
+
+    def __init__(self, folder=DEFAULT_DATA_FOLDER):
+        self.folder = Path(folder).resolve()
+        self._data = {}
+        self._lock = Lock()
+
+    """
+    get
+    - returns the store of folder, creating it on first use
+    """
+    @classmethod
+    def get(cls, folder=DEFAULT_DATA_FOLDER):
+        key = Path(folder).resolve()
+        with cls._stores_lock:
+            if key not in cls._stores:
+                cls._stores[key] = cls(key)
+            return cls._stores[key]
+
+    def _load(self, name):
+        if name not in self._data:
+            with self._lock:
+                if name not in self._data:
+                    self._data[name] = self._read(name)
+        return self._data[name]
+
+    def _read(self, name):
+        if name == "compiled":
+            # imported here so that importing the tasks does not import numpy
+            from graph_cache import load_graph_cache, default_cache_folder
+            if not (self.folder / "G.json").exists():
+                # a folder with only the binary cache, e.g. from synthetic_graph.py
+                return load_graph_cache(default_cache_folder(self.folder))
+            return load_graph_cache(json_folder=self.folder)
+        with open(self.folder / f"{name}.json", encoding="utf8") as f:
+            return json.load(f)
+
+    @property
+    def G(self):
+        return self._load("G")
+
+    @property
+    def Dist(self):
+        return self._load("Dist")
+
+    @property
+    def Cost(self):
+        return self._load("Cost")
+
+    @property
+    def Coord(self):
+        return self._load("Coord")
+
+    @property
+    def compiled(self):
+        return self._load("compiled")
+
+    # these functions read the distance and energy of an edge from the data respectively
+    def distance_func(self, u, v):
+        return self.Dist[f"{u},{v}"]
+
+    def energy_func(self, u, v):
+        return self.Cost[f"{u},{v}"]
@@ -0,0 +1,132 @@
+"""
+IndexedHeap
+- array backed 4-ary min heap of (priority, key) pairs with true decrease-key
+- every key is in the heap at most once: positions[key] is its index in the arrays,
+  so pushing a key that is already queued lowers its priority in place instead of
+  leaving a stale pair behind (as heapq and priorityDictionary do)
+- ties between equal priorities are broken by the key, like a heap of
+  (priority, key) tuples
+- pushes, pops, decreases and peak (largest size) are counted for benchmarking
+"""
+class IndexedHeap:
+
+    stale = 0                   # never any outdated pairs, see RadixHeap.stale
+
+    def __init__(self):
+        self.priorities = []
+        self.keys = []
+        self.positions = {}
+        self.pushes = 0
+        self.pops = 0
+        self.decreases = 0
+        self.peak = 0
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __bool__(self):
+        return bool(self.keys)
+
+    def __contains__(self, key):
+        return key in self.positions
+
+    def priority(self, key):
+        return self.priorities[self.positions[key]]
+
+    def peek(self):
+        return self.priorities[0], self.keys[0]
+
+    """
+    push
+    - inserts key, or lowers its priority if it is already queued with a higher one
+    - output:
+        - True if the heap changed
+    """
+    def push(self, key, priority):
+
+        position = self.positions.get(key)
+
+        if position is None:
+            self.pushes += 1
+            self.priorities.append(priority)
+            self.keys.append(key)
+            if len(self.keys) > self.peak:
+                self.peak = len(self.keys)
+            self._sift_up(len(self.keys) - 1, priority, key)
+            return True
+
+        if priority < self.priorities[position]:
+            self.decreases += 1
+            self._sift_up(position, priority, key)
+            return True
+
+        return False
+
+    """
+    pop
+    - removes and returns the (priority, key) pair with the smallest priority
+    """
+    def pop(self):
+
+        priorities, keys = self.priorities, self.keys
+        if not keys:
+            raise IndexError("pop from empty IndexedHeap")
+        self.pops += 1
+
+        top = (priorities[0], keys[0])
+        del self.positions[keys[0]]
+
+        priority, key = priorities.pop(), keys.pop()
+        if keys:
+            self._sift_down(0, priority, key)
+
+        return top
+
+    def _sift_up(self, position, priority, key):
+
+        priorities, keys, positions = self.priorities, self.keys, self.positions
+
+        while position > 0:
+            parent = (position - 1) >> 2
+            parent_priority = priorities[parent]
+            if parent_priority < priority or (parent_priority == priority and keys[parent] < key):
+                break
+            priorities[position] = parent_priority
+            keys[position] = keys[parent]
+            positions[keys[position]] = position
+            position = parent
+
+        priorities[position] = priority
+        keys[position] = key
+        positions[key] = position
+
+    def _sift_down(self, position, priority, key):
+
+        priorities, keys, positions = self.priorities, self.keys, self.positions
+        size = len(keys)
+
+        while True:
+            first = 4 * position + 1
+            if first >= size:
+                break
+
+            # smallest of the (up to) four children
+            child = first
+            child_priority = priorities[first]
+            for other in range(first + 1, min(first + 4, size)):
+                other_priority = priorities[other]
+                if other_priority < child_priority or (
+                        other_priority == child_priority and keys[other] < keys[child]):
+                    child = other
+                    child_priority = other_priority
+
+            if priority < child_priority or (priority == child_priority and key < keys[child]):
+                break
+            priorities[position] = child_priority
+            keys[position] = keys[child]
+            positions[keys[position]] = position
+            position = child
+
+        priorities[position] = priority
+        keys[position] = key
+        positions[key] = position
@@ -0,0 +1,423 @@
+"""
+Streaming conversion of road graphs into the binary cache of graph_cache.py
+
+CompiledGraph.from_json loads Dist.json and Cost.json as dictionaries with a string
+key per arc, several times the size of the compiled graph. The converters here read
+their input a chunk at a time and write node id arrays straight into the memory-mapped
+.npy files of the cache, so what they keep in memory grows with the number of nodes,
+not with the size of the text:
+    - ingest_dimacs: the DIMACS shortest path challenge files the NYC data comes
+      from: a distance .gr, an energy .gr listing the same arcs (e.g. the travel time
+      graph) and optionally a .co; .gz files are read directly
+    - ingest_json: G.json, Dist.json, Cost.json and Coord.json; the cache is the same
+      as the one written from CompiledGraph.from_json
+Both return an IngestReport with the time taken and the peak memory of the process.
+
+usage:
+    python ingest.py json <json folder> [cache folder]
+    python ingest.py dimacs <distance .gr> <energy .gr> <cache folder> [--co <.co file>]
+"""
+from array import array
+from collections import namedtuple
+from itertools import islice, zip_longest
+from pathlib import Path
+from time import perf_counter
+
+import argparse
+import gzip
+import json
+import os
+import sys
+import numpy as np
+from numpy.lib.format import open_memmap
+
+from graph_cache import (
+    default_cache_folder, new_tmp_folder, replace_folder, source_info, write_cache_header,
+)
+
+try:
+    import resource
+except ImportError:             # not available on windows
+    resource = None
+
+# rows of a DIMACS file or entries of a json file handled at a time
+CHUNK = 1 << 18
+
+
+"""
+IngestReport
+- cache_folder, num_nodes, num_arcs
+- seconds: time taken by the conversion
+- peak_memory: largest resident memory of the process in bytes (None where the
+  platform does not report it); this includes the pages of the memory-mapped
+  output, which the system can write back and drop at any time
+"""
+IngestReport = namedtuple(
+    "IngestReport", ("cache_folder", "num_nodes", "num_arcs", "seconds", "peak_memory"))
+
+
+def peak_memory():
+    if resource is None:
+        return None
+    # kilobytes on linux, bytes on macos
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+def describe(report):
+    text = "{0} nodes, {1} arcs in {2:.1f} s ({3:,.0f} arcs/s)".format(
+        report.num_nodes, report.num_arcs, report.seconds, report.num_arcs / max(report.seconds, 1e-9))
+    if report.peak_memory is not None:
+        text += ", peak memory {0:.0f} MB".format(report.peak_memory / 2 ** 20)
+    return text
+
+
+def open_text(path):
+    if Path(path).suffix == ".gz":
+        return gzip.open(path, "rt", encoding="ascii")
+    return open(path, encoding="ascii")
+
+
+"""
+write_labels
+- labels.npy with the label str(i + 1) of every node i, as in the DIMACS and NYC data
+"""
+def write_labels(folder, n):
+    labels = open_memmap(folder / "labels.npy", "w+", "<U{0}".format(len(str(n))), (n,))
+    for start in range(0, n, CHUNK):
+        stop = min(start + CHUNK, n)
+        labels[start:stop] = np.arange(start + 1, stop + 1).astype(str)
+    labels.flush()
+
+
+"""
+dimacs_problem
+- output:
+    - the numbers on the "p" line of a DIMACS file, e.g. (nodes, arcs) of a .gr file
+"""
+def dimacs_problem(path):
+    with open_text(path) as f:
+        for line in f:
+            if line.startswith("p "):
+                return tuple(int(word) for word in line.split() if word.isdigit())
+    raise ValueError("{0} has no problem line".format(path))
+
+
+"""
+read_dimacs
+- yields the lines of a DIMACS file starting with kind ("a" for arcs, "v" for
+  coordinates) as int64 arrays of shape (rows, 3), all but the last with exactly
+  rows rows, so two files listing the same arcs are chunked alike
+"""
+def read_dimacs(path, kind, rows=CHUNK):
+
+    prefix = kind + " "
+    pending = []
+
+    def parse(lines):
+        return np.fromstring("".join(lines), dtype=np.int64, sep=" ").reshape(-1, 3)
+
+    with open_text(path) as f:
+        while True:
+            lines = list(islice(f, rows))
+            if not lines:
+                break
+            pending.extend(line[2:] for line in lines if line.startswith(prefix))
+            while len(pending) >= rows:
+                yield parse(pending[:rows])
+                del pending[:rows]
+    if pending:
+        yield parse(pending)
+
+
+"""
+ingest_dimacs
+- converts DIMACS road graph files into a binary cache
+- arguments:
+    - dist_path: .gr file with the distance of every arc
+    - energy_path: .gr file with the energy of the same arcs in the same order
+    - coord_path: optional .co file with the coordinates of the nodes
+    - cache_folder: output directory, replaced if it already exists
+- reads the arcs twice: the first pass counts the arcs leaving every node (offsets),
+  the second writes each arc to its place, keeping the order of the file per node
+- output:
+    - IngestReport
+"""
+def ingest_dimacs(dist_path, energy_path, cache_folder, coord_path=None):
+
+    started = perf_counter()
+    cache_folder = Path(cache_folder)
+    tmp_folder = new_tmp_folder(cache_folder)
+    n = dimacs_problem(dist_path)[0]
+
+    # first pass: number of arcs leaving every node
+    counts = np.zeros(n, dtype=np.int64)
+    for arcs in read_dimacs(dist_path, "a"):
+        counts += np.bincount(arcs[:, 0] - 1, minlength=n)
+    offsets = open_memmap(tmp_folder / "offsets.npy", "w+", np.int64, (n + 1,))
+    offsets[0] = 0
+    np.cumsum(counts, out=offsets[1:])
+    num_arcs = int(offsets[n])
+    del counts
+
+    # second pass: next free arc of every node, advanced chunk by chunk
+    cursor = np.array(offsets[:-1])
+    arrays = {
+        "targets": open_memmap(tmp_folder / "targets.npy", "w+", np.int32, (num_arcs,)),
+        "tails": open_memmap(tmp_folder / "tails.npy", "w+", np.int32, (num_arcs,)),
+        "dist": open_memmap(tmp_folder / "dist.npy", "w+", np.int64, (num_arcs,)),
+        "energy": open_memmap(tmp_folder / "energy.npy", "w+", np.int64, (num_arcs,)),
+    }
+    for arcs, energy_arcs in zip_longest(read_dimacs(dist_path, "a"), read_dimacs(energy_path, "a")):
+        if arcs is None or energy_arcs is None or not np.array_equal(arcs[:, :2], energy_arcs[:, :2]):
+            raise ValueError("{0} and {1} do not list the same arcs in the same order".format(
+                dist_path, energy_path))
+
+        tails = arcs[:, 0] - 1
+        order = np.argsort(tails, kind="stable")
+        sorted_tails = tails[order]
+        # rank of every arc among the arcs of its tail in this chunk
+        rank = np.arange(len(order)) - np.searchsorted(sorted_tails, sorted_tails)
+        positions = np.empty_like(order)
+        positions[order] = cursor[sorted_tails] + rank
+        nodes, node_counts = np.unique(sorted_tails, return_counts=True)
+        cursor[nodes] += node_counts
+
+        arrays["tails"][positions] = tails
+        arrays["targets"][positions] = arcs[:, 1] - 1
+        arrays["dist"][positions] = arcs[:, 2]
+        arrays["energy"][positions] = energy_arcs[:, 2]
+    del cursor
+
+    if coord_path is not None:
+        coords = open_memmap(tmp_folder / "coords.npy", "w+", np.float64, (n, 2))
+        for rows in read_dimacs(coord_path, "v"):
+            coords[rows[:, 0] - 1] = rows[:, 1:]
+        coords.flush()
+        del coords
+
+    write_labels(tmp_folder, n)
+    for array in (offsets, *arrays.values()):
+        array.flush()
+    del offsets, arrays
+
+    sources = {"dimacs": [str(path) for path in (dist_path, energy_path, coord_path) if path]}
+    write_cache_header(tmp_folder, n, num_arcs, **sources)
+    replace_folder(tmp_folder, cache_folder)
+
+    return IngestReport(cache_folder, n, num_arcs, perf_counter() - started, peak_memory())
+
+
+"""
+iter_json_object
+- yields the (key, value) pairs of the json object in path one by one, reading the
+  file chunk_size characters at a time
+- the values are parsed by the C scanner of the json module
+"""
+def iter_json_object(path, chunk_size=1 << 20):
+
+    scan = json.JSONDecoder().scan_once
+    whitespace = " \t\n\r"
+
+    with open(path, encoding="utf8") as f:
+        buffer = f.read(chunk_size)
+        pos = len(buffer) - len(buffer.lstrip())
+        if buffer[pos:pos + 1] != "{":
+            raise ValueError("{0} does not hold a json object".format(path))
+        pos += 1
+        eof = False
+
+        while True:
+            try:
+                while buffer[pos] in whitespace:
+                    pos += 1
+                if buffer[pos] == "}":
+                    return
+                key, end = scan(buffer, pos)
+                while buffer[end] in whitespace:
+                    end += 1
+                if buffer[end] != ":":
+                    raise ValueError("':' expected at {0}".format(end))
+                end += 1
+                while buffer[end] in whitespace:
+                    end += 1
+                value, end = scan(buffer, end)
+                # the entry is complete once the "," or "}" after it has been read
+                while buffer[end] in whitespace:
+                    end += 1
+                if buffer[end] not in ",}":
+                    raise ValueError("',' or '}' expected at {0}".format(end))
+            except (StopIteration, ValueError, IndexError) as error:
+                if eof:
+                    raise ValueError("{0} is not a valid json object: {1!r}".format(path, error))
+                more = f.read(chunk_size)
+                eof = not more
+                buffer = buffer[pos:] + more
+                pos = 0
+                continue
+
+            yield key, value
+            pos = end + 1 if buffer[end] == "," else end
+
+
+"""
+fill_arc_values
+- writes the values of a Dist.json or Cost.json style file to the arcs of the cache
+- arguments:
+    - path: the json file, {"u,v": value}
+    - tmp_folder, name: where the values go, tmp_folder/name.npy
+    - index: node label -> node id
+    - arc_keys, arc_order: tail * n + target of every arc, sorted, and the arc of
+      each sorted key
+- the values are stored as int64 unless one of them is not an integer, in which
+  case the array is switched to float64 (np.array would do the same); entries of
+  edges that are not in G.json are ignored, as in CompiledGraph.from_dicts
+"""
+def fill_arc_values(path, tmp_folder, name, index, arc_keys, arc_order):
+
+    n = len(index)
+    num_arcs = len(arc_keys)
+    file_path = tmp_folder / f"{name}.npy"
+    values = open_memmap(file_path, "w+", np.int64, (num_arcs,))
+    filled = np.zeros(num_arcs, dtype=bool)
+
+    def flush(keys, chunk):
+        nonlocal values
+        chunk = np.array(chunk)
+        if chunk.dtype.kind == "f" and values.dtype.kind != "f":
+            widened = open_memmap(tmp_folder / f"{name}.float.npy", "w+", np.float64, (num_arcs,))
+            widened[:] = values
+            del values
+            os.replace(tmp_folder / f"{name}.float.npy", file_path)
+            values = widened
+        keys = np.array(keys, dtype=np.int64)
+        found = np.minimum(np.searchsorted(arc_keys, keys), num_arcs - 1)
+        known = (keys >= 0) & (arc_keys[found] == keys)
+        positions = arc_order[found[known]]
+        values[positions] = chunk[known]
+        filled[positions] = True
+
+    keys, chunk = [], []
+    for key, value in iter_json_object(path):
+        u, _, v = key.partition(",")
+        u, v = index.get(u), index.get(v)
+        keys.append(-1 if u is None or v is None else u * n + v)
+        chunk.append(value)
+        if len(chunk) == CHUNK:
+            flush(keys, chunk)
+            keys, chunk = [], []
+    if chunk:
+        flush(keys, chunk)
+
+    values.flush()
+    if not filled.all():
+        arc = int(np.flatnonzero(~filled)[0])
+        raise ValueError("{0} has no value for arc {1} of G.json".format(path, arc))
+
+
+"""
+ingest_json
+- converts G.json, Dist.json, Cost.json and Coord.json (if present) into a binary cache
+- nodes and arcs are numbered exactly as by CompiledGraph.from_json: the keys of G
+  in file order, then the nodes only seen as neighbours
+- output:
+    - IngestReport
+"""
+def ingest_json(json_folder, cache_folder=None):
+
+    started = perf_counter()
+    json_folder = Path(json_folder)
+    cache_folder = Path(cache_folder or default_cache_folder(json_folder))
+    tmp_folder = new_tmp_folder(cache_folder)
+
+    # first pass over G: the node labels and the number of arcs leaving each
+    labels = []
+    index = {}
+    degrees = array("q")
+    for u, neighbors in iter_json_object(json_folder / "G.json"):
+        index[u] = len(labels)
+        labels.append(u)
+        degrees.append(len(neighbors))
+    num_arcs = sum(degrees)
+
+    # second pass: the targets, numbering the nodes only seen as neighbours
+    targets = open_memmap(tmp_folder / "targets.npy", "w+", np.int32, (num_arcs,))
+    position = 0
+    pending = []
+    for u, neighbors in iter_json_object(json_folder / "G.json"):
+        for v in neighbors:
+            if v not in index:
+                index[v] = len(labels)
+                labels.append(v)
+            pending.append(index[v])
+        if len(pending) >= CHUNK:
+            targets[position:position + len(pending)] = pending
+            position += len(pending)
+            pending = []
+    targets[position:position + len(pending)] = pending
+    del pending
+
+    n = len(labels)
+    offsets = np.full(n + 1, num_arcs, dtype=np.int64)
+    offsets[0] = 0
+    np.cumsum(np.frombuffer(degrees, dtype=np.int64), out=offsets[1:len(degrees) + 1])
+    del degrees
+    tails = np.repeat(np.arange(n, dtype=np.int32), np.diff(offsets))
+    np.save(tmp_folder / "offsets.npy", offsets)
+    np.save(tmp_folder / "tails.npy", tails)
+
+    # the arc of every (tail, target) pair, for the weight files
+    arc_keys = tails.astype(np.int64) * n + targets
+    del tails
+    arc_order = np.argsort(arc_keys, kind="stable")
+    arc_keys = arc_keys[arc_order]
+    targets.flush()
+    del targets
+
+    for path, name in (("Dist.json", "dist"), ("Cost.json", "energy")):
+        fill_arc_values(json_folder / path, tmp_folder, name, index, arc_keys, arc_order)
+    del arc_keys, arc_order
+
+    if (json_folder / "Coord.json").exists():
+        coords = open_memmap(tmp_folder / "coords.npy", "w+", np.float64, (n, 2))
+        for u, xy in iter_json_object(json_folder / "Coord.json"):
+            if u in index:
+                coords[index[u]] = xy
+        coords.flush()
+        del coords
+
+    np.save(tmp_folder / "labels.npy", np.array(labels))
+    del labels, index
+
+    sources = source_info(json_folder) if (json_folder / "Coord.json").exists() else None
+    write_cache_header(tmp_folder, n, num_arcs, sources)
+    replace_folder(tmp_folder, cache_folder)
+
+    return IngestReport(cache_folder, n, num_arcs, perf_counter() - started, peak_memory())
+
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    formats = parser.add_subparsers(dest="format", required=True)
+
+    json_parser = formats.add_parser("json", help="G.json, Dist.json, Cost.json and Coord.json")
+    json_parser.add_argument("json_folder")
+    json_parser.add_argument("cache_folder", nargs="?")
+
+    dimacs_parser = formats.add_parser("dimacs", help="DIMACS .gr and .co files, optionally .gz")
+    dimacs_parser.add_argument("dist", help=".gr file of the distances")
+    dimacs_parser.add_argument("energy", help=".gr file of the energies, same arcs as dist")
+    dimacs_parser.add_argument("cache_folder")
+    dimacs_parser.add_argument("--co", help=".co file of the coordinates")
+
+    args = parser.parse_args(argv)
+    if args.format == "json":
+        report = ingest_json(args.json_folder, args.cache_folder)
+    else:
+        report = ingest_dimacs(args.dist, args.energy, args.cache_folder, args.co)
+    print("Wrote {0} to {1}".format(describe(report), report.cache_folder))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Optional counters and phase timings of the searches
+
+find_path(..., instrument=True), find_path_astar(..., instrument=True) and
+dijkstra_task1(..., stats=SearchStats()) count what the search did. The counters
+come back in PathInfo.stats (or in the SearchStats given to dijkstra_task1) and are
+also sent to every function registered with add_hook, e.g. to forward them to a
+metrics pipeline. Registering a hook turns the counters on for every search.
+
+When they are off, the searches only pass NO_STATS around: the callbacks are not
+wrapped and nothing is counted inside the search loops.
+"""
+from contextlib import contextmanager, nullcontext
+from time import perf_counter
+
+COUNTERS = (
+    "popped",               # nodes taken from the queue
+    "stale_pops",           # outdated queue entries skipped
+    "relaxations",          # arcs leaving the popped nodes
+    "pushes",               # nodes added to the queue
+    "decreases",            # queued nodes whose priority was lowered
+    "peak_heap",            # largest queue size
+    "cost_func_calls",
+    "energy_func_calls",
+    "heuristic_func_calls",
+    "iterations",           # searches run: 2 when the shortest path is over the budget
+)
+
+# functions called with (name of the search, stats dictionary) after each search
+hooks = []
+
+
+def add_hook(callback):
+    hooks.append(callback)
+
+
+def remove_hook(callback):
+    hooks.remove(callback)
+
+
+"""
+SearchStats
+- counters: dictionary of the COUNTERS
+- timings: seconds spent in each phase ("search", "budget_check", "extract")
+"""
+class SearchStats:
+
+    enabled = True
+
+    def __init__(self):
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.timings = {}
+        self._started = {}
+
+    """
+    count_calls
+    - output:
+        - func wrapped so that its calls are counted as name, None if func is None
+    """
+    def count_calls(self, func, name):
+        if func is None:
+            return None
+        counters = self.counters
+
+        def counted(*args):
+            counters[name] += 1
+            return func(*args)
+
+        return counted
+
+    """
+    start / stop
+    - the time between start(name) and stop(name) is added to timings[name]
+    """
+    def start(self, name):
+        self._started[name] = perf_counter()
+
+    def stop(self, name):
+        elapsed = perf_counter() - self._started.pop(name)
+        self.timings[name] = self.timings.get(name, 0.0) + elapsed
+
+    @contextmanager
+    def phase(self, name):
+        self.start(name)
+        try:
+            yield
+        finally:
+            self.stop(name)
+
+    """
+    add_search
+    - adds the counters of one search: its queue (IndexedHeap or RadixHeap) and the
+      number of arcs leaving its settled nodes
+    """
+    def add_search(self, queue, relaxations):
+        counters = self.counters
+        counters["iterations"] += 1
+        counters["popped"] += queue.pops
+        counters["stale_pops"] += queue.stale
+        counters["pushes"] += queue.pushes
+        counters["decreases"] += queue.decreases
+        counters["peak_heap"] = max(counters["peak_heap"], queue.peak)
+        counters["relaxations"] += relaxations
+
+    def as_dict(self):
+        result = dict(self.counters)
+        for name, seconds in self.timings.items():
+            result["time_" + name] = seconds
+        return result
+
+    def emit(self, name):
+        if hooks:
+            result = self.as_dict()
+            for callback in hooks:
+                callback(name, result)
+
+
+"""
+NoStats
+- stands in for SearchStats when the counters are off, every method does nothing
+- searches check enabled before add_search, so the counts are not even computed
+"""
+class NoStats:
+
+    enabled = False
+    counters = None
+
+    def count_calls(self, func, name):
+        return func
+
+    def start(self, name):
+        pass
+
+    def stop(self, name):
+        pass
+
+    def phase(self, name):
+        return nullcontext()
+
+    def emit(self, name):
+        pass
+
+
+NO_STATS = NoStats()
+
+
+"""
+search_stats
+- output:
+    - a new SearchStats if instrument is true or a hook is registered, NO_STATS otherwise
+"""
+def search_stats(instrument=False):
+    return SearchStats() if instrument or hooks else NO_STATS
@@ -0,0 +1,246 @@
+"""
+Exact shortest path within an energy budget (resource constrained shortest path)
+
+Each node keeps the (distance, energy) labels of the paths that reached it. A label
+is dropped when another label at the same node is at least as short and uses at
+most as much energy (it is dominated), or when its energy exceeds the budget.
+Labels are taken from the queue in (distance, energy) order, so the first label
+taken at d is the shortest path within the budget.
+
+A label is also dropped when even the least energy from its node to d would take it
+over the budget (see energy_bounds.py), which keeps the search to the labels that can
+still become a path within the budget.
+
+The label search only runs when the budget binds: a plain Dijkstra on the distances
+comes first, and its path is the answer whenever it meets the budget.
+
+Continuing the search after that gives every non-dominated (distance, energy)
+trade-off between s and d, i.e. the answer for every budget at once (pareto_frontier).
+"""
+from bisect import bisect_left
+from heapq import heappush, heappop
+
+from task2 import NoPathError, path_info_from_arcs, energy_lower_bounds, shortest_path_search_compiled
+from compiled_graph import require_compiled
+from energy_bounds import lower_bounds
+
+
+"""
+label_setting_shortest_path
+- arguments:
+    - graph: a CompiledGraph
+    - s, d: integer node ids
+    - energy_budget: maximum total energy, None or 0 for no budget
+    - upper_bound: optional distance of a known path within the budget, labels
+      longer than it are dropped (NoPathError if no path is at most as long)
+- output:
+    - arc ids of the shortest path from s to d within the budget
+"""
+def label_setting_shortest_path(graph, s, d, energy_budget=287932, upper_bound=None):
+
+    # the shortest path is the answer whenever it meets the budget, and one Dijkstra
+    # costs a fraction of the label search
+    with graph.workspaces.acquire() as workspace:
+        shortest_path_search_compiled(graph, s, d, energy_budget=None, workspace=workspace)
+        arcs = workspace.path_arcs(graph.tails, d)
+    if not energy_budget or graph.energy[arcs].sum() <= energy_budget:
+        if upper_bound is None or graph.dist[arcs].sum() <= upper_bound:
+            return arcs
+        raise NoPathError("Could not find a path from {0} to {1} within energy budget {2}".format(
+            graph.label(s), graph.label(d), energy_budget))
+
+    # raises NoPathError right away if s cannot reach d within the budget
+    energy_lower_bounds(graph, s, d, energy_budget)
+
+    label_arcs, label_parents = [], []
+    for _, _, label in pareto_labels(graph, s, d, energy_budget, upper_bound, label_arcs, label_parents):
+        return extract_arcs_from_labels(label_arcs, label_parents, label)
+
+    raise NoPathError("Could not find a path from {0} to {1} within energy budget {2}".format(
+        graph.label(s), graph.label(d), energy_budget))
+
+
+"""
+pareto_labels
+- the label setting search, continued after the first label at d
+- arguments:
+    - same as label_setting_shortest_path, plus
+    - label_arcs, label_parents: empty lists, filled with the arc used to reach each
+      label and its parent label (see extract_arcs_from_labels)
+- output:
+    - generator of (distance, energy, label) of the non-dominated labels at d, by
+      increasing distance and decreasing energy
+"""
+def pareto_labels(graph, s, d, energy_budget, upper_bound, label_arcs, label_parents):
+
+    offsets, targets, dist, energy = graph.views()
+    budget = energy_budget if energy_budget else float("inf")
+    longest = float("inf") if upper_bound is None else upper_bound
+
+    # least energy from each node to d, None without a budget
+    bounds = lower_bounds(graph, d, energy_budget)
+    to_go = bounds and bounds.to_go
+
+    # energy of the best label taken from the queue at each node so far
+    # a label at the node is dominated unless it uses strictly less energy
+    best_energy = {}
+
+    # a label using at least as much energy as the last label at d can only reach d dominated
+    energy_at_d = float("inf")
+
+    label_arcs.append(None)
+    label_parents.append(None)
+
+    # (distance, energy, node, label)
+    visit_queue = [(0, 0, s, 0)]
+
+    while visit_queue:
+
+        distance_to_u, energy_to_u, u, label = heappop(visit_queue)
+
+        if energy_to_u >= best_energy.get(u, energy_at_d):
+            continue                               # dominated by an earlier label at u
+        best_energy[u] = energy_to_u
+
+        if u == d:
+            energy_at_d = energy_to_u
+            yield distance_to_u, energy_to_u, label
+            continue
+
+        for arc in range(offsets[u], offsets[u + 1]):
+
+            energy_to_v = energy_to_u + energy[arc]
+            if energy_to_v > budget or energy_to_v >= energy_at_d:
+                continue
+
+            v = targets[arc]
+            if energy_to_v >= best_energy.get(v, energy_at_d):
+                continue
+            if to_go and energy_to_v + to_go[v] > budget:
+                continue                           # cannot reach d within the budget
+
+            distance_to_v = distance_to_u + dist[arc]
+            if distance_to_v > longest:
+                continue
+
+            label_arcs.append(arc)
+            label_parents.append(label)
+            heappush(visit_queue, (distance_to_v, energy_to_v, v, len(label_arcs) - 1))
+
+
+"""
+extract_arcs_from_labels
+- follows the parent labels back to s
+- output:
+    - arc ids of the path, from s to the label's node
+"""
+def extract_arcs_from_labels(label_arcs, label_parents, label):
+
+    arcs = []
+    while label_parents[label] is not None:
+        arcs.append(label_arcs[label])
+        label = label_parents[label]
+
+    arcs.reverse()
+
+    return arcs
+
+
+"""
+find_path_label_setting
+- same arguments and output as find_path, plus upper_bound (see label_setting_shortest_path)
+- graph must be a CompiledGraph, see require_compiled
+"""
+def find_path_label_setting(graph, s, d, energy_budget=287932, upper_bound=None):
+
+    graph = require_compiled(graph, "the label engine")
+    s, d = graph.node_id(s), graph.node_id(d)
+    arcs = label_setting_shortest_path(graph, s, d, energy_budget, upper_bound)
+
+    return path_info_from_arcs(graph, arcs, d)
+
+
+"""
+ParetoFrontier
+- the non-dominated paths from s to d, by increasing distance and decreasing energy
+- distances[i], energies[i] describe path i; frontier[i] is its PathInfo, whose nodes
+  are only extracted from the labels when it is first asked for
+"""
+class ParetoFrontier:
+
+    def __init__(self, graph, s, d, distances, energies, labels, label_arcs, label_parents):
+        self.graph = graph
+        self.s = s
+        self.d = d
+        self.distances = distances
+        self.energies = energies
+        self.labels = labels
+        self.label_arcs = label_arcs
+        self.label_parents = label_parents
+        self._paths = {}
+        # energies in increasing order, for bisect
+        self._negated_energies = [-e for e in energies]
+
+    def __len__(self):
+        return len(self.labels)
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if i not in self._paths:
+            arcs = extract_arcs_from_labels(self.label_arcs, self.label_parents, self.labels[i])
+            self._paths[i] = path_info_from_arcs(self.graph, arcs, self.d)
+        return self._paths[i]
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    """
+    index_for
+    - output:
+        - index of the shortest path using at most energy_budget (None or 0 for no
+          budget), None if there is none
+    """
+    def index_for(self, energy_budget):
+        if not energy_budget:
+            return 0 if self.labels else None
+        i = bisect_left(self._negated_energies, -energy_budget)
+        return i if i < len(self) else None
+
+    """
+    best_for
+    - same answer as find_path(..., energy_budget=energy_budget, engine="label"),
+      found by binary search
+    - raises NoPathError if no path meets the budget
+    """
+    def best_for(self, energy_budget):
+        i = self.index_for(energy_budget)
+        if i is None:
+            raise NoPathError("Could not find a path from {0} to {1} within energy budget {2}".format(
+                self.graph.label(self.s), self.graph.label(self.d), energy_budget))
+        return self[i]
+
+
+"""
+pareto_frontier
+- finds the shortest path within every energy budget in one search
+- arguments:
+    - graph: a CompiledGraph, see require_compiled
+    - s, d: same as find_path
+    - max_budget: paths using more energy are left out, None for no limit
+- output:
+    - ParetoFrontier, empty if d cannot be reached within max_budget
+"""
+def pareto_frontier(graph, s, d, max_budget=None):
+
+    graph = require_compiled(graph, "pareto_frontier")
+    s, d = graph.node_id(s), graph.node_id(d)
+
+    label_arcs, label_parents = [], []
+    distances, energies, labels = [], [], []
+    for distance, energy, label in pareto_labels(graph, s, d, max_budget, None, label_arcs, label_parents):
+        distances.append(distance)
+        energies.append(energy)
+        labels.append(label)
+
+    return ParetoFrontier(graph, s, d, distances, energies, labels, label_arcs, label_parents)
@@ -0,0 +1,361 @@
+"""
+ALT (A*, Landmarks, Triangle inequality) heuristic
+
+For a few landmark nodes L the exact distances dist(L, v) and dist(v, L) are
+computed once for every node v. By the triangle inequality
+    dist(v, t) >= dist(L, t) - dist(L, v)
+    dist(v, t) >= dist(v, L) - dist(t, L)
+so the largest of these over all landmarks is a lower bound on the distance from v
+to any target t. It is admissible and consistent, and usually much tighter than the
+straight line distance.
+
+usage: python landmarks.py [number of landmarks]
+"""
+from concurrent.futures import ProcessPoolExecutor
+from heapq import heappush, heappop
+from pathlib import Path
+
+import json
+import os
+import random
+import sys
+import numpy as np
+
+
+"""
+shortest_distances
+- plain Dijkstra from source over the whole graph
+- output:
+    - numpy array of the distance from source to every node, inf if unreachable
+"""
+def shortest_distances(graph, source):
+
+    offsets, targets, dist, _ = graph.views()
+    costs = {source: 0}
+    visited = set()
+    visit_queue = [(0, source)]
+
+    while visit_queue:
+
+        cost_of_s_to_u, u = heappop(visit_queue)
+        if u in visited:
+            continue
+        visited.add(u)
+
+        for arc in range(offsets[u], offsets[u + 1]):
+            v = targets[arc]
+            if v in visited:
+                continue
+            cost_of_s_to_u_plus_cost_of_e = cost_of_s_to_u + dist[arc]
+            if v not in costs or cost_of_s_to_u_plus_cost_of_e < costs[v]:
+                costs[v] = cost_of_s_to_u_plus_cost_of_e
+                heappush(visit_queue, (cost_of_s_to_u_plus_cost_of_e, v))
+
+    distances = np.full(graph.num_nodes, np.inf)
+    distances[list(costs)] = list(costs.values())
+
+    return distances
+
+
+"""
+both_directions
+- the distances from v and to v of every node: one Dijkstra on graph, one on its reverse
+"""
+def both_directions(graph, v):
+    return shortest_distances(graph, v), shortest_distances(graph.reverse(), v)
+
+
+"""
+select_landmarks
+- arguments:
+    - graph: a CompiledGraph
+    - k: number of landmarks
+    - method:
+        - "farthest": each landmark is the node farthest from the ones already chosen
+        - "avoid": each landmark is the leaf of the subtree of a random shortest path
+          tree whose nodes are worst served by the landmarks chosen so far
+          (Goldberg and Werneck)
+    - seed: seed of the random start node(s)
+- output:
+    - list of node ids
+"""
+def select_landmarks(graph, k, method="farthest", seed=0):
+    return choose_landmarks(graph, k, method, seed)[0]
+
+
+"""
+choose_landmarks
+- select_landmarks, also returning the distances from and to each landmark, which
+  both methods compute anyway to choose the next one
+- arguments:
+    - same as select_landmarks
+    - distances: distances(v) returns (distances from v, distances to v), see
+      both_directions (the default); build_landmarks runs the two in parallel
+- output:
+    - landmarks, forward, backward: as in Landmarks, forward and backward as lists
+"""
+def choose_landmarks(graph, k, method="farthest", seed=0, distances=None):
+
+    if method not in ("farthest", "avoid"):
+        raise ValueError("unknown landmark selection method {0!r}".format(method))
+    if distances is None:
+        distances = lambda v: both_directions(graph, v)
+
+    rng = random.Random(seed)
+    landmarks, forward, backward = [], [], []
+
+    def add(landmark):
+        from_landmark, to_landmark = distances(landmark)
+        landmarks.append(landmark)
+        forward.append(from_landmark)
+        backward.append(to_landmark)
+
+    if method == "farthest":
+        # distance in either direction, so the landmarks spread over one-way streets too
+        start = rng.randrange(graph.num_nodes)
+        closest = np.minimum(*distances(start))
+        for _ in range(k):
+            candidates = np.where(np.isfinite(closest), closest, -1)
+            add(int(np.argmax(candidates)))
+            closest = np.minimum(closest, np.minimum(forward[-1], backward[-1]))
+
+    else:
+        while len(landmarks) < k:
+            root = rng.randrange(graph.num_nodes)
+            add(avoid_leaf(graph, root, landmarks, forward, backward))
+
+    return landmarks, forward, backward
+
+
+"""
+avoid_leaf
+- one step of the "avoid" selection from root
+- weight(v) is how much the current landmarks underestimate dist(root, v), size(v) is the
+  total weight of v's subtree, or 0 if the subtree already contains a landmark
+- output:
+    - the leaf reached by following the child of largest size down from the node of
+      largest size
+"""
+def avoid_leaf(graph, root, landmarks, forward, backward):
+
+    offsets, targets, dist, _ = graph.views()
+
+    # shortest path tree from root
+    costs = {root: 0}
+    parents = {root: None}
+    order = []                      # nodes in the order they are settled
+    visited = set()
+    visit_queue = [(0, root)]
+    while visit_queue:
+        cost, u = heappop(visit_queue)
+        if u in visited:
+            continue
+        visited.add(u)
+        order.append(u)
+        for arc in range(offsets[u], offsets[u + 1]):
+            v = targets[arc]
+            if v not in visited and (v not in costs or cost + dist[arc] < costs[v]):
+                costs[v] = cost + dist[arc]
+                parents[v] = u
+                heappush(visit_queue, (costs[v], v))
+
+    nodes = np.array(order)
+    exact = np.array([costs[v] for v in order], dtype=np.float64)
+    bound = np.zeros(len(order))
+    for to_landmark, from_landmark in zip(backward, forward):
+        with np.errstate(invalid="ignore"):
+            bound = np.fmax(bound, from_landmark[nodes] - from_landmark[root])
+            bound = np.fmax(bound, to_landmark[root] - to_landmark[nodes])
+    weight = dict(zip(order, exact - np.minimum(bound, exact)))
+
+    # sizes, children first
+    size = dict(weight)
+    children = {v: [] for v in order}
+    has_landmark = {v: v in landmarks for v in order}
+    for v in reversed(order):
+        parent = parents[v]
+        if parent is not None:
+            children[parent].append(v)
+            size[parent] += size[v]
+            has_landmark[parent] = has_landmark[parent] or has_landmark[v]
+    for v in order:
+        if has_landmark[v]:
+            size[v] = 0
+
+    node = max(order, key=size.get)
+    while children[node]:
+        node = max(children[node], key=size.get)
+
+    return node
+
+
+"""
+Landmarks
+- landmark ids plus forward[i][v] = dist(landmarks[i], v) and
+  backward[i][v] = dist(v, landmarks[i])
+"""
+class Landmarks:
+
+    def __init__(self, graph, landmarks, forward, backward):
+        self.graph = graph
+        self.landmarks = landmarks
+        self.forward = forward
+        self.backward = backward
+
+    """
+    lower_bounds
+    - lower bound on the distance from every node to target (integer id), as one array
+    """
+    def lower_bounds(self, target):
+        with np.errstate(invalid="ignore"):
+            bounds = np.fmax(
+                self.forward[:, target][:, None] - self.forward,
+                self.backward - self.backward[:, target][:, None],
+            )
+            # inf - inf: neither node is reachable from / reaches the landmark
+            bounds[np.isnan(bounds)] = 0
+        return np.maximum(bounds.max(axis=0), 0)
+
+    """
+    lower_bounds_from
+    - lower bound on the distance from source (integer id) to every node, as one array
+    """
+    def lower_bounds_from(self, source):
+        with np.errstate(invalid="ignore"):
+            bounds = np.fmax(
+                self.forward - self.forward[:, source][:, None],
+                self.backward[:, source][:, None] - self.backward,
+            )
+            bounds[np.isnan(bounds)] = 0
+        return np.maximum(bounds.max(axis=0), 0)
+
+    """
+    heuristic
+    - drop-in heuristic_func for find_path_astar towards d (a node label)
+    """
+    def heuristic(self, d):
+        return ALTHeuristic(self, d)
+
+    """
+    save / load
+    - stored as .npy files in folder, next to the compiled graph by default
+    """
+    def save(self, folder=None):
+        folder = Path(folder or default_landmark_folder(self.graph))
+        folder.mkdir(parents=True, exist_ok=True)
+        np.save(folder / "landmarks.npy", np.array(self.landmarks, dtype=np.int32))
+        np.save(folder / "forward.npy", self.forward)
+        np.save(folder / "backward.npy", self.backward)
+        with open(folder / "header.json", "w", encoding="utf8") as f:
+            json.dump({"num_nodes": self.graph.num_nodes, "num_arcs": self.graph.num_arcs}, f)
+        return folder
+
+    @classmethod
+    def load(cls, graph, folder=None):
+        folder = Path(folder or default_landmark_folder(graph))
+        with open(folder / "header.json", encoding="utf8") as f:
+            header = json.load(f)
+        if header["num_nodes"] != graph.num_nodes or header["num_arcs"] != graph.num_arcs:
+            raise ValueError("{0} was computed for a different graph".format(folder))
+        return cls(
+            graph,
+            np.load(folder / "landmarks.npy").tolist(),
+            np.load(folder / "forward.npy", mmap_mode="r"),
+            np.load(folder / "backward.npy", mmap_mode="r"),
+        )
+
+
+"""
+ALTHeuristic
+- heuristic_func(alpha, v, target) for find_path_astar, estimating the distance from v
+  to any target (d when target is None), and heuristic_func.from_source(alpha, v, s)
+  the distance from s to v, as used by the bidirectional search (landmark bounds are not symmetric on a directed graph)
+- table(graph, d, alpha) gives the bounds of every node towards d (integer id) at once,
+  as used by the compiled A* search
+- bounds are computed for all nodes at once on first use and cached per node
+"""
+class ALTHeuristic:
+
+    def __init__(self, landmarks, d):
+        self.landmarks = landmarks
+        self.d = d
+        self._bounds = {}
+
+    def bounds(self, node, towards=True):
+        key = (node, towards)
+        if key not in self._bounds:
+            landmarks = self.landmarks
+            node_id = landmarks.graph.node_id(node)
+            if towards:
+                bounds = landmarks.lower_bounds(node_id)
+            else:
+                bounds = landmarks.lower_bounds_from(node_id)
+            self._bounds[key] = bounds.tolist()
+        return self._bounds[key]
+
+    def __call__(self, alpha, node, target=None):
+        graph = self.landmarks.graph
+        return alpha * self.bounds(self.d if target is None else target)[graph.node_id(node)]
+
+    def table(self, graph, d, alpha):
+        return alpha * self.landmarks.lower_bounds(d)
+
+    def from_source(self, alpha, node, source):
+        graph = self.landmarks.graph
+        return alpha * self.bounds(source, towards=False)[graph.node_id(node)]
+
+
+def default_landmark_folder(graph):
+    if graph.cache_folder is None:
+        raise ValueError("graph was not loaded from a cache, a landmark folder is needed")
+    return Path(graph.cache_folder) / "landmarks"
+
+
+# graph of each worker process, sent once when the worker starts
+worker_graph = None
+
+
+def init_worker(graph):
+    global worker_graph
+    worker_graph = graph
+
+
+def landmark_distances(landmark, direction):
+    graph = worker_graph if direction == "forward" else worker_graph.reverse()
+    return shortest_distances(graph, landmark)
+
+
+"""
+build_landmarks
+- arguments:
+    - graph: a CompiledGraph
+    - k, method, seed: see select_landmarks
+    - workers: number of processes; each landmark depends on the ones before it, so
+      at most the two searches of one landmark (from it and to it) run at a time
+- the distances computed to select the landmarks are the ones kept (see
+  choose_landmarks), so every search runs once
+- output:
+    - Landmarks
+"""
+def build_landmarks(graph, k=16, method="farthest", seed=0, workers=None):
+
+    with ProcessPoolExecutor(workers or min(2, os.cpu_count()), initializer=init_worker,
+                             initargs=(graph,)) as executor:
+
+        def distances(v):
+            forward = executor.submit(landmark_distances, v, "forward")
+            backward = executor.submit(landmark_distances, v, "backward")
+            return forward.result(), backward.result()
+
+        landmarks, forward, backward = choose_landmarks(graph, k, method, seed, distances)
+
+    return Landmarks(graph, landmarks, np.array(forward), np.array(backward))
+
+
+if __name__ == "__main__":
+    from graph_store import GraphStore
+
+    k = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    graph = GraphStore.get().compiled
+    folder = build_landmarks(graph, k).save()
+    print("Wrote", k, "landmarks to", folder)
@@ -0,0 +1,165 @@
+"""
+LARAC - lagrangian relaxation of the energy budget
+
+Instead of a constrained search, the plain Dijkstra search of task 2 is run on the
+combined weight distance + lam * energy. For any lam >= 0,
+    min over paths of (distance + lam * energy) - lam * energy_budget
+is a lower bound on the shortest distance within the budget, and every path found
+that meets the budget is an upper bound. lam is moved to close the gap between the
+two, and the search stops once the gap is small enough.
+
+When the shortest path does not meet the budget, the nodes from which d cannot be
+reached within it are left out of the searches that follow (see energy_bounds.py).
+Pruning by the energy of the path to a node as well, as the rerun engine does, would
+make the searches miss paths of lower combined weight.
+"""
+from task2 import *
+from compiled_graph import CompiledGraph
+from energy_bounds import least_energy_arcs, least_energy_nodes
+
+# relative round-off tolerated when comparing combined weights; a gap within it
+# counts as 0 (the path is the shortest within the budget)
+GAP_TOLERANCE = 1e-9
+
+
+"""
+combined_weight_search
+- arguments:
+    - same as find_path
+- output:
+    - a function search(lam) returning the PathInfo (true distance and energy)
+      of the shortest path under the weight distance + lam * energy, leaving out
+      the nodes that cannot reach d within energy_budget if one is given
+    - search(None) returns the path with the least energy
+- raises NoPathError right away if s cannot reach d within energy_budget
+"""
+def combined_weight_search(graph, s, d, cost_func=None, energy_func=None, energy_budget=None):
+
+    if isinstance(graph, CompiledGraph):
+        s, d = graph.node_id(s), graph.node_id(d)
+
+        bounds = energy_lower_bounds(graph, s, d, energy_budget)
+        if bounds:
+            # arcs into the nodes that cannot reach d within the budget
+            excluded = np.asarray(bounds.to_go)[graph.targets] > energy_budget
+
+        def search(lam):
+            if lam is None and bounds:
+                return path_info_from_arcs(graph, least_energy_arcs(graph, bounds, s), d)
+            weights = graph.energy if lam is None else graph.dist + lam * graph.energy
+            if bounds:
+                weights = np.where(excluded, np.inf, weights)
+            with graph.workspaces.acquire() as workspace:
+                shortest_path_search_compiled(
+                    graph.with_weights(weights), s, d, energy_budget=None, workspace=workspace)
+                return path_info_from_arcs(graph, workspace.path_arcs(graph.tails, d), d)
+
+        return search
+
+    bounds = energy_lower_bounds(graph, s, d, energy_budget, energy_func)
+
+    def search(lam):
+        if lam is None and bounds:
+            nodes = least_energy_nodes(bounds, s)
+            return path_info_of_nodes(nodes, cost_func, energy_func)
+        if lam is None:
+            weight_func = energy_func
+        else:
+            def weight_func(u, v):
+                return cost_func(u, v) + lam * energy_func(u, v)
+        if bounds:
+            weight_func = excluding(weight_func, bounds.to_go, energy_budget)
+        with workspace_pool(graph).acquire() as workspace:
+            shortest_path_search(graph, s, d, weight_func, energy_func, None, None, workspace=workspace)
+            nodes = path_info_from_edges(workspace.edges(d), d).nodes
+        return path_info_of_nodes(nodes, cost_func, energy_func)
+
+    return search
+
+
+def path_info_of_nodes(nodes, cost_func, energy_func):
+    edges = list(zip(nodes, nodes[1:]))
+    return PathInfo(
+        nodes,
+        sum(cost_func(u, v) for u, v in edges),
+        sum(energy_func(u, v) for u, v in edges),
+    )
+
+
+"""
+excluding
+- weight_func with an infinite weight for the edges into the nodes needing more than
+  energy_budget to reach d, so that the search never goes through them
+"""
+def excluding(weight_func, to_go, energy_budget):
+
+    def weight(u, v):
+        if to_go[v] > energy_budget:
+            return float("inf")
+        return weight_func(u, v)
+
+    return weight
+
+
+"""
+find_path_larac
+- arguments:
+    - same as find_path, plus
+    - max_gap: stop once (upper bound - lower bound) / upper bound <= max_gap
+    - max_iterations: stop after this many combined-weight searches
+- output:
+    - PathInfo of the best path found within the budget, with lower_bound and gap set
+"""
+def find_path_larac(
+    graph, s, d, cost_func=None, energy_func=None, energy_budget=287932,
+    max_gap=0.0, max_iterations=100
+):
+
+    search = combined_weight_search(graph, s, d, cost_func, energy_func)
+
+    # shortest path ignoring energy - optimal if it meets the budget
+    shortest = search(0)
+    if not energy_budget or shortest.energy <= energy_budget:
+        return shortest._replace(lower_bound=shortest.distance, gap=0.0)
+
+    # the budget matters: leave out the nodes that cannot reach d within it
+    search = combined_weight_search(graph, s, d, cost_func, energy_func, energy_budget)
+
+    # least energy path - if it does not meet the budget, no path does
+    feasible = search(None)
+    if feasible.energy > energy_budget:
+        raise NoPathError("Could not find a path from {0} to {1} within energy budget {2}".format(
+            s, d, energy_budget))
+
+    # shortest is the infeasible end, feasible the feasible end of the current lam interval
+    lower_bound = shortest.distance
+    for _ in range(max_iterations):
+
+        if gap_of(feasible.distance, lower_bound) <= max_gap:
+            break
+
+        # lam at which the two ends have the same combined weight
+        lam = (feasible.distance - shortest.distance) / (shortest.energy - feasible.energy)
+        path = search(lam)
+
+        combined = path.distance + lam * path.energy
+        lower_bound = max(lower_bound, combined - lam * energy_budget)
+
+        # no path is better than the two ends under lam - lam is optimal
+        if combined >= shortest.distance + lam * shortest.energy - GAP_TOLERANCE * abs(combined):
+            break
+
+        if path.energy <= energy_budget:
+            feasible = path
+        else:
+            shortest = path
+
+    lower_bound = min(lower_bound, feasible.distance)
+
+    return feasible._replace(lower_bound=lower_bound, gap=gap_of(feasible.distance, lower_bound))
+
+
+def gap_of(upper_bound, lower_bound):
+    if not upper_bound:
+        return 0.0
+    return (upper_bound - lower_bound) / upper_bound
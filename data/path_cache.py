@@ -0,0 +1,200 @@
+"""
+Budget aware cache of shortest paths within an energy budget
+
+An exact result for (s, d) found with budget B, of distance D and energy E, is the
+answer for every budget in [E, B]: the path meets any such budget, and a shorter
+path within it would also have been within B. So each (s, d) keeps a few of these
+intervals and answers any budget that falls inside one of them.
+
+A budget outside all intervals still gets bounds from the cache:
+    - a cached path with energy <= budget is feasible, so the answer is at most as
+      long (it is given to the label setting search as upper_bound)
+    - an interval starting above the budget proves the answer is at least as long
+      as its path, since a smaller budget never allows a shorter path
+when the two meet, the cached path is the answer without a search. Likewise a
+budget for which no path exists rules out every smaller budget.
+
+Only exact results are stored: the label engine, or larac when its gap is 0 up to
+round-off (larac.GAP_TOLERANCE).
+"""
+from collections import OrderedDict
+
+import sys
+
+from task2 import find_path, NoPathError
+from compiled_graph import as_compiled
+from larac import GAP_TOLERANCE
+
+EXACT_ENGINES = ("label", "larac")
+
+# rough size of one cached interval apart from its node list, in bytes
+INTERVAL_BYTES = 200
+
+
+"""
+CacheEntry
+- cached knowledge about one (s, d) pair
+- intervals: list of [lowest budget, highest budget, PathInfo]
+- infeasible: largest budget known to have no path, None if there is none
+"""
+class CacheEntry:
+
+    def __init__(self):
+        self.intervals = []
+        self.infeasible = None
+        self.size = 0
+
+
+"""
+PathCache
+- LRU cache of find_path results keyed by (s, d), see the module docstring
+- arguments:
+    - graph, cost_func, energy_func: same as find_path, the graph is compiled once
+    - engine: "label" (default) or "larac", the engine that answers misses
+    - max_bytes: approximate memory bound, the least recently used pairs are
+      evicted when it is exceeded
+    - engine_options: passed to find_path, e.g. max_gap for "larac"
+"""
+class PathCache:
+
+    def __init__(
+        self, graph, cost_func=None, energy_func=None, engine="label",
+        max_bytes=64 * 2**20, **engine_options
+    ):
+        if engine not in EXACT_ENGINES:
+            raise ValueError("PathCache needs an exact engine, one of {0}".format(EXACT_ENGINES))
+        self.graph = as_compiled(graph, cost_func, energy_func)
+        self.engine = engine
+        self.engine_options = engine_options
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.bounded = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    """
+    find_path
+    - same as find_path(graph, s, d, energy_budget=energy_budget, engine=engine)
+    - answered from the cache when possible
+    """
+    def find_path(self, s, d, energy_budget=287932):
+
+        budget = energy_budget if energy_budget else float("inf")
+        key = (s, d)
+        entry = self.entries.get(key)
+
+        incumbent = None
+        if entry is not None:
+            self.entries.move_to_end(key)
+            path, incumbent = self.lookup(entry, budget)
+            if path is not None or (entry.infeasible is not None and budget <= entry.infeasible):
+                self.hits += 1
+                if path is None:
+                    raise NoPathError("Could not find a path from {0} to {1} within energy budget {2}".format(
+                        s, d, energy_budget))
+                return path
+
+        self.misses += 1
+        options = dict(self.engine_options)
+        if incumbent is not None and self.engine == "label":
+            self.bounded += 1
+            options["upper_bound"] = incumbent.distance
+
+        try:
+            path = find_path(self.graph, s, d, energy_budget=energy_budget, engine=self.engine, **options)
+        except NoPathError:
+            if incumbent is None:
+                entry = self.entry(key)
+                entry.infeasible = budget if entry.infeasible is None else max(entry.infeasible, budget)
+                raise
+            path = incumbent            # nothing shorter than the cached path
+
+        if self.engine == "label" or path.gap <= GAP_TOLERANCE:
+            self.store(key, path, budget)
+
+        return path
+
+    """
+    lookup
+    - output:
+        - (PathInfo answering budget or None, shortest cached path within budget or None)
+    """
+    def lookup(self, entry, budget):
+
+        incumbent = None
+        lower_bound = None
+        for interval in entry.intervals:
+            lowest, highest, path = interval
+            if lowest <= budget <= highest:
+                return path, path
+            if lowest <= budget:
+                if incumbent is None or path.distance < incumbent.distance:
+                    incumbent = path
+            elif lower_bound is None or path.distance > lower_bound:
+                lower_bound = path.distance
+
+        if incumbent is not None and lower_bound is not None and incumbent.distance <= lower_bound:
+            # the bounds meet, so the incumbent is the answer for this budget too
+            for interval in entry.intervals:
+                if interval[2] is incumbent:
+                    interval[1] = max(interval[1], budget)
+            return incumbent, incumbent
+
+        return None, incumbent
+
+    def entry(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            entry = self.entries[key] = CacheEntry()
+            self.resize(entry, INTERVAL_BYTES)
+        return entry
+
+    """
+    store
+    - records that path is the answer for every budget from its energy up to budget
+    """
+    def store(self, key, path, budget):
+
+        entry = self.entry(key)
+        for interval in entry.intervals:
+            if interval[2].nodes == path.nodes:
+                interval[0] = min(interval[0], path.energy)
+                interval[1] = max(interval[1], budget)
+                return
+
+        entry.intervals.append([path.energy, budget, path])
+        self.resize(entry, INTERVAL_BYTES + sys.getsizeof(path.nodes))
+
+    def resize(self, entry, size):
+        entry.size += size
+        self.size += size
+        # evict least recently used pairs, but never the only one
+        while self.size > self.max_bytes and len(self.entries) > 1:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= evicted.size
+            self.evictions += 1
+
+    def clear(self):
+        self.entries.clear()
+        self.size = 0
+
+    """
+    stats
+    - output:
+        - dictionary of hits, misses (bounded: misses searched with a cached upper
+          bound), evictions, pairs and approximate bytes in use
+    """
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "bounded": self.bounded,
+            "evictions": self.evictions,
+            "pairs": len(self.entries),
+            "bytes": self.size,
+        }
@@ -0,0 +1,127 @@
+"""
+RadixHeap
+- monotone priority queue for non-negative integer priorities, with the same
+  push / pop interface as IndexedHeap
+- monotone: a pushed priority may not be smaller than the last popped one, which
+  always holds in Dijkstra's algorithm with non-negative integer edge weights
+- a pair (priority, key) is kept in bucket (priority ^ last).bit_length(), where last
+  is the last popped priority. Bucket 0 holds the pairs whose priority equals last.
+  When it runs empty, the first non-empty bucket is emptied into the smaller ones
+  around its minimum, so every pair moves down at most once per bit and no
+  comparisons between arbitrary pairs are needed
+- decrease-key leaves the old pair behind in its bucket, it is skipped when found
+  (queued holds the current priority of every key)
+- ties between equal priorities are broken by the key, like IndexedHeap
+- pushes, pops, decreases, stale (old pairs skipped) and peak (largest number of
+  queued keys) are counted
+"""
+from heapq import heapify, heappush, heappop
+
+
+class RadixHeap:
+
+    def __init__(self):
+        self.buckets = [[] for _ in range(65)]
+        self.current = []               # keys with priority == last, as a heap of keys
+        self.nonempty = 0               # bit i is set if buckets[i] may hold pairs
+        self.queued = {}                # key -> current priority
+        self.last = 0
+        self.pushes = 0
+        self.pops = 0
+        self.decreases = 0
+        self.stale = 0
+        self.peak = 0
+
+    def __len__(self):
+        return len(self.queued)
+
+    def __bool__(self):
+        return bool(self.queued)
+
+    def __contains__(self, key):
+        return key in self.queued
+
+    def priority(self, key):
+        return self.queued[key]
+
+    """
+    push
+    - inserts key, or lowers its priority if it is already queued with a higher one
+    - raises ValueError if priority is smaller than the last popped priority
+    - output:
+        - True if the heap changed
+    """
+    def push(self, key, priority):
+
+        queued = self.queued.get(key)
+        if queued is not None and priority >= queued:
+            return False
+        if priority < self.last:
+            raise ValueError(
+                "RadixHeap priorities must not decrease, got {0} after {1}".format(priority, self.last))
+
+        if queued is None:
+            self.pushes += 1
+            if len(self.queued) >= self.peak:
+                self.peak = len(self.queued) + 1
+        else:
+            self.decreases += 1
+        self.queued[key] = priority
+
+        if priority == self.last:
+            heappush(self.current, key)
+        else:
+            index = (priority ^ self.last).bit_length()
+            self.buckets[index].append((priority, key))
+            self.nonempty |= 1 << index
+        return True
+
+    """
+    pop
+    - removes and returns the (priority, key) pair with the smallest priority
+    """
+    def pop(self):
+
+        queued = self.queued
+        if not queued:
+            raise IndexError("pop from empty RadixHeap")
+
+        while True:
+            while self.current:
+                key = heappop(self.current)
+                # a key in current may be stale if it was pushed again after a pop
+                if queued.get(key) == self.last:
+                    self.pops += 1
+                    del queued[key]
+                    return self.last, key
+                self.stale += 1
+            self._refill()
+
+    # empties the first non-empty bucket into the smaller ones around its minimum
+    def _refill(self):
+
+        queued, buckets = self.queued, self.buckets
+        while True:
+            index = (self.nonempty & -self.nonempty).bit_length() - 1
+            bucket = buckets[index]
+            buckets[index] = []
+            self.nonempty ^= 1 << index
+            # drop the pairs left behind by decrease-key
+            live = [(priority, key) for priority, key in bucket if queued.get(key) == priority]
+            self.stale += len(bucket) - len(live)
+            if live:
+                break
+
+        last = self.last = min(live)[0]
+        current = []
+        nonempty = self.nonempty
+        for priority, key in live:
+            if priority == last:
+                current.append(key)
+            else:
+                index = (priority ^ last).bit_length()
+                buckets[index].append((priority, key))
+                nonempty |= 1 << index
+        self.nonempty = nonempty
+        heapify(current)
+        self.current = current
@@ -0,0 +1,236 @@
+"""
+Array backed state of the searches, reused from query to query
+
+The searches used to keep dictionaries and sets keyed by node: costs, visited, and
+predecessors holding (u, edge_cost, edge_energy) tuples, a few hundred bytes per
+reached node, allocated again for every query and every search of it.
+Here every node has a dense integer id and the state lives in arrays indexed by it,
+held by a workspace that is reused:
+    - SearchWorkspace: for a CompiledGraph, whose nodes already are ids 0..n-1;
+      the arrays are allocated once, sized to the graph
+    - LabelWorkspace: for dict graphs, whose nodes are labels; a node gets its id
+      the first time a search sees it and keeps it for later searches
+Instead of clearing the arrays, reset() starts a new generation: every node carries
+the generation it was last reached or settled in, and anything older counts as not
+reached. So a reset costs O(1), whatever the size of the graph.
+
+A workspace serves one search at a time. workspace_pool(graph) hands out the
+workspaces of a graph to concurrent searches, e.g. threads of a service.
+"""
+from array import array
+from collections import OrderedDict
+from contextlib import contextmanager
+from threading import Lock
+
+import numpy as np
+
+UNREACHED = float("inf")        # cost of a node not reached yet
+NO_ARC = -1                     # predecessor of s
+
+# dict graphs whose workspace pools are kept, see workspace_pool
+LABEL_POOLS = 4
+
+
+"""
+SearchWorkspace
+- state of a search on a graph of size nodes:
+    - costs[v]: best known cost of reaching v, only valid once v is reached
+    - predecessors[v]: id of the arc used to reach v (NO_ARC for s)
+    - energies[v]: energy of the path to v, only kept by searches pruned with the
+      energy lower bounds (see energy_bounds.py)
+    - stamps[v]: reached (v has a cost) or settled (v is visited) in the current
+      generation, anything lower: not reached yet
+- reset() starts a search and returns the (reached, settled) stamps of its generation
+"""
+class SearchWorkspace:
+
+    def __init__(self, size=0):
+        self.costs = array("d", [UNREACHED]) * size
+        self.predecessors = array("q", [NO_ARC]) * size
+        self.energies = array("d", [0]) * size
+        self.stamps = array("I", [0]) * size
+        self.generation = 0
+        self.resets = 0
+
+    def __len__(self):
+        return len(self.stamps)
+
+    def reset(self):
+        self.resets += 1
+        self.generation += 2
+        if self.generation + 1 >= 1 << (8 * self.stamps.itemsize):
+            # the stamps would overflow: clear them once (in place, searches hold
+            # references to the array) and start over
+            self.stamps[:] = array("I", [0]) * len(self.stamps)
+            self.generation = 2
+        return self.generation, self.generation + 1
+
+    def reached(self, v):
+        return self.stamps[v] >= self.generation
+
+    """
+    reached_nodes / settled_nodes
+    - ids of the nodes reached / settled by the current search
+    """
+    def reached_nodes(self):
+        return np.flatnonzero(np.frombuffer(self.stamps, dtype=np.uint32) >= self.generation)
+
+    def settled_nodes(self):
+        return np.flatnonzero(np.frombuffer(self.stamps, dtype=np.uint32) == self.generation + 1)
+
+    """
+    path_arcs
+    - arc ids of the path from s to d found by the current search, in order
+    - tails: tails of the arcs of the graph searched (CompiledGraph.tails)
+    """
+    def path_arcs(self, tails, d):
+        predecessors = self.predecessors
+        arcs = []
+        arc = predecessors[d]
+        while arc != NO_ARC:
+            arcs.append(arc)
+            arc = predecessors[int(tails[arc])]
+        arcs.reverse()
+        return arcs
+
+    """
+    predecessor_dict
+    - the predecessors of the current search as a dictionary of node id -> id of the
+      arc used to reach it (None for s), for every reached node
+    """
+    def predecessor_dict(self):
+        predecessors = self.predecessors
+        return {
+            v: None if predecessors[v] == NO_ARC else predecessors[v]
+            for v in self.reached_nodes().tolist()
+        }
+
+
+"""
+LabelWorkspace
+- SearchWorkspace of a dict graph, whose nodes are labels
+    - labels[i], ids[label]: label of node id i, and back; intern(label) gives a
+      new node its id, the arrays grow with it
+    - predecessors[i]: id of the node i was reached from (NO_ARC for s)
+    - edge_costs[i], edge_energies[i]: cost and energy of the edge from predecessors[i]
+- ids are kept from search to search, so a graph that gains nodes is still fine
+"""
+class LabelWorkspace(SearchWorkspace):
+
+    def __init__(self):
+        super().__init__()
+        self.labels = []
+        self.ids = {}
+        self.edge_costs = []
+        self.edge_energies = []
+
+    def intern(self, label):
+        i = self.ids[label] = len(self.labels)
+        self.labels.append(label)
+        self.costs.append(UNREACHED)
+        self.predecessors.append(NO_ARC)
+        self.energies.append(0)
+        self.stamps.append(0)
+        self.edge_costs.append(None)
+        self.edge_energies.append(None)
+        return i
+
+    def __contains__(self, label):
+        i = self.ids.get(label)
+        return i is not None and self.reached(i)
+
+    def settled(self):
+        return [self.labels[i] for i in self.settled_nodes()]
+
+    """
+    predecessor_dict
+    - the predecessors of the current search as a dictionary of label ->
+      (predecessor, edge_cost, edge_energy), (None, None, None) for s, for every
+      reached node
+    """
+    def predecessor_dict(self):
+        labels, predecessors = self.labels, self.predecessors
+        return {
+            labels[i]: (None, None, None) if predecessors[i] == NO_ARC
+            else (labels[predecessors[i]], self.edge_costs[i], self.edge_energies[i])
+            for i in self.reached_nodes().tolist()
+        }
+
+    """
+    edges
+    - the edges of the path from s to d found by the current search, walking back from d
+    - output:
+        - iterator of (u, edge_cost, edge_energy), u being the tail of the edge
+    """
+    def edges(self, d):
+        labels, predecessors = self.labels, self.predecessors
+        v = self.ids[d]
+        while predecessors[v] != NO_ARC:
+            yield labels[predecessors[v]], self.edge_costs[v], self.edge_energies[v]
+            v = predecessors[v]
+
+
+"""
+WorkspacePool
+- hands out workspaces made by factory, one per concurrent search
+- with pool.acquire() as workspace: ... returns the workspace to the pool afterwards
+"""
+class WorkspacePool:
+
+    def __init__(self, factory):
+        self.factory = factory
+        self.free = []
+        self.created = 0
+        self._lock = Lock()
+
+    @contextmanager
+    def acquire(self):
+        with self._lock:
+            if self.free:
+                workspace = self.free.pop()
+            else:
+                workspace = None
+                self.created += 1
+        if workspace is None:
+            workspace = self.factory()
+        try:
+            yield workspace
+        finally:
+            with self._lock:
+                self.free.append(workspace)
+
+
+"""
+settled_arcs
+- number of arcs leaving the nodes settled by the current search of workspace on
+  a CompiledGraph, for the counters
+"""
+def settled_arcs(graph, workspace):
+    settled = workspace.settled_nodes()
+    return int((graph.offsets[settled + 1] - graph.offsets[settled]).sum())
+
+
+_label_pools = OrderedDict()        # id(graph) -> (graph, pool), most recently used last
+_label_pools_lock = Lock()
+
+
+"""
+workspace_pool
+- the WorkspacePool of graph
+    - CompiledGraph: graph.workspaces, kept with the graph
+    - dict graph: kept for the LABEL_POOLS most recently searched graphs (which
+      are referenced until they drop out, so their ids are not reused)
+"""
+def workspace_pool(graph):
+
+    if hasattr(graph, "workspaces"):
+        return graph.workspaces
+
+    with _label_pools_lock:
+        entry = _label_pools.get(id(graph))
+        if entry is None or entry[0] is not graph:
+            entry = _label_pools[id(graph)] = (graph, WorkspacePool(LabelWorkspace))
+            while len(_label_pools) > LABEL_POOLS:
+                _label_pools.popitem(last=False)
+        _label_pools.move_to_end(id(graph))
+        return entry[1]
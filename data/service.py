@@ -0,0 +1,290 @@
+"""
+Resident routing service: HTTP/JSON front end on asyncio, searches on a process pool
+
+The compiled graph is loaded once and shared with the workers (see batch.SharedGraph),
+so every request only pays for its search.
+
+    POST /find_path        {"s": "1", "d": "50", "budget": 287932, "engine": "rerun"}
+    POST /find_path_astar  {"s": "1", "d": "50", "budget": 287932, "alpha": 1}
+    GET  /stats            counters of the service
+    GET  /health
+
+A found path is answered with 200 and {"nodes", "distance", "energy", "lower_bound",
+"gap", "stats"}. Errors are answered with {"error": message}:
+    - 400: malformed request, 404: unknown node or no path within the budget
+    - 503: too many searches pending (backpressure), retry later
+    - 504: the search did not finish within the timeout
+Identical queries that arrive while one is being searched share its result.
+
+usage: python service.py [--data folder] [--port 8080] [--workers n] (see --help)
+"""
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlsplit
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+import batch
+from batch import SharedGraph, init_worker
+from graph_store import GraphStore, DEFAULT_DATA_FOLDER
+from task3 import *
+
+ENGINES = {
+    "find_path": ("rerun", "label", "larac", "incremental"),
+    "find_path_astar": ("rerun", "incremental"),
+}
+MAX_BODY = 1 << 16
+
+REASONS = {
+    200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable",
+    504: "Gateway Timeout",
+}
+
+
+class BadRequest(Exception):
+    pass
+
+
+def init_service_worker(description):
+    init_worker(description)
+    # build the label index before the first query arrives
+    batch.worker_graph.node_id(batch.worker_graph.label(0))
+
+
+def json_value(value):
+    return value.item() if hasattr(value, "item") else str(value)
+
+
+"""
+solve
+- runs in a worker process: answers one query on the worker's graph
+- output:
+    - (http status, json-ready body)
+"""
+def solve(kind, s, d, energy_budget, alpha, engine):
+
+    graph = batch.worker_graph
+    for node in (s, d):
+        try:
+            graph.node_id(node)
+        except KeyError:
+            return 404, {"error": "unknown node {0!r}".format(node)}
+
+    # any other error is a bug, answered with 500 by RoutingService.answer
+    try:
+        if kind == "find_path_astar":
+            path = find_path_astar(graph, s, d, alpha=alpha, energy_budget=energy_budget, engine=engine)
+        else:
+            path = find_path(graph, s, d, energy_budget=energy_budget, engine=engine)
+    except NoPathError as error:
+        return 404, {"error": str(error) or "no path within the energy budget"}
+
+    return 200, json.loads(json.dumps(path._asdict(), default=json_value))
+
+
+"""
+parse_query
+- output:
+    - the arguments of solve for a request body, BadRequest if they are invalid
+"""
+def parse_query(kind, body):
+
+    try:
+        request = json.loads(body or b"{}")
+    except ValueError:
+        raise BadRequest("the body is not valid json")
+    if not isinstance(request, dict):
+        raise BadRequest("the body must be a json object")
+
+    if "s" not in request or "d" not in request:
+        raise BadRequest("s and d are required")
+    energy_budget = request.get("budget", 287932)
+    alpha = request.get("alpha", 1)
+    engine = request.get("engine", "rerun")
+    if energy_budget is not None and not isinstance(energy_budget, (int, float)):
+        raise BadRequest("budget must be a number or null")
+    if not isinstance(alpha, (int, float)):
+        raise BadRequest("alpha must be a number")
+    if engine not in ENGINES[kind]:
+        raise BadRequest("{0} supports the engines {1}".format(kind, ", ".join(ENGINES[kind])))
+
+    return kind, str(request["s"]), str(request["d"]), energy_budget, alpha, engine
+
+
+"""
+RoutingService
+- arguments:
+    - graph: the CompiledGraph to answer queries on
+    - workers: number of worker processes (default: number of CPUs)
+    - max_pending: searches queued or running at most; more are answered with 503
+    - timeout: seconds a request waits for its search before it is answered with 504;
+      the search itself keeps its worker until it finishes, and a retry of the same
+      query joins it
+- use as an async context manager, or call close()
+"""
+class RoutingService:
+
+    def __init__(self, graph, workers=None, max_pending=64, timeout=10.0):
+        self.workers = workers or os.cpu_count()
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.shared = SharedGraph(graph)
+        self.executor = ProcessPoolExecutor(
+            self.workers, initializer=init_service_worker, initargs=(self.shared.description,))
+        # query -> future of its search, while the search runs
+        self.in_flight = {}
+        self.counters = dict.fromkeys(
+            ("requests", "searches", "coalesced", "rejected", "timeouts", "errors"), 0)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        self.shared.close()
+
+    def stats(self):
+        return dict(self.counters, pending=len(self.in_flight), workers=self.workers,
+                    max_pending=self.max_pending)
+
+    """
+    answer
+    - answers one parsed query, see parse_query
+    - output:
+        - (http status, json-ready body)
+    """
+    async def answer(self, query):
+
+        future = self.in_flight.get(query)
+        if future is not None:
+            self.counters["coalesced"] += 1
+        else:
+            if len(self.in_flight) >= self.max_pending:
+                self.counters["rejected"] += 1
+                return 503, {"error": "too many searches pending, retry later"}
+            future = asyncio.get_running_loop().run_in_executor(self.executor, solve, *query)
+            self.in_flight[query] = future
+            future.add_done_callback(lambda _: self.in_flight.pop(query, None))
+            self.counters["searches"] += 1
+
+        try:
+            # shielded, so a timeout does not cancel the search shared with other requests
+            return await asyncio.wait_for(asyncio.shield(future), self.timeout)
+        except asyncio.TimeoutError:
+            self.counters["timeouts"] += 1
+            return 504, {"error": "no answer within {0} seconds".format(self.timeout)}
+        except Exception as error:
+            self.counters["errors"] += 1
+            return 500, {"error": "{0}: {1}".format(type(error).__name__, error)}
+
+    async def route(self, method, target, body):
+
+        path = urlsplit(target).path.rstrip("/")
+        kind = path.lstrip("/")
+        if kind in ENGINES:
+            if method != "POST":
+                return 405, {"error": "use POST"}
+            self.counters["requests"] += 1
+            try:
+                query = parse_query(kind, body)
+            except BadRequest as error:
+                return 400, {"error": str(error)}
+            return await self.answer(query)
+        if path == "/stats" and method == "GET":
+            return 200, self.stats()
+        if path == "/health" and method == "GET":
+            return 200, {"status": "ok"}
+        return 404, {"error": "unknown path {0}".format(path or "/")}
+
+    """
+    handle_connection
+    - minimal HTTP/1.1: one request after another on each connection (keep-alive),
+      bodies given with Content-Length
+    """
+    async def handle_connection(self, reader, writer):
+
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if not line.strip():
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                    length = int(headers.get("content-length", 0))
+                except ValueError:
+                    write_response(writer, 400, {"error": "malformed request"}, False)
+                    break
+                if length > MAX_BODY:
+                    write_response(writer, 413, {"error": "body too large"}, False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                status, payload = await self.route(method, target, body)
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=8080):
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        async with server:
+            await server.serve_forever()
+
+
+def write_response(writer, status, payload, keep_alive):
+    body = json.dumps(payload).encode("utf8")
+    head = "HTTP/1.1 {0} {1}\r\nContent-Type: application/json\r\nContent-Length: {2}\r\n".format(
+        status, REASONS[status], len(body))
+    if status == 503:
+        head += "Retry-After: 1\r\n"
+    head += "Connection: {0}\r\n\r\n".format("keep-alive" if keep_alive else "close")
+    writer.write(head.encode("latin-1") + body)
+
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--data", default=DEFAULT_DATA_FOLDER, help="folder of G.json etc.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, help="worker processes, default: number of CPUs")
+    parser.add_argument("--max-pending", type=int, default=64, help="searches queued or running at most")
+    parser.add_argument("--timeout", type=float, default=10.0, help="seconds per request")
+    args = parser.parse_args(argv)
+
+    graph = GraphStore.get(args.data).compiled
+
+    async def run():
+        async with RoutingService(graph, args.workers, args.max_pending, args.timeout) as service:
+            print("Serving {0} nodes on http://{1}:{2} with {3} workers".format(
+                graph.num_nodes, args.host, args.port, service.workers), file=sys.stderr)
+            await service.serve(args.host, args.port)
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
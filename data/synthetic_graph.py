@@ -0,0 +1,297 @@
+"""
+Synthetic road-like graphs for scale testing
+
+The graph is a perturbed grid: node (x, y) sits near (x, y) * spacing, and
+neighbouring nodes are joined by a street with probability keep (plus an occasional
+diagonal), so dead ends, degree 2 and degree 3 nodes are common as on real roads.
+Some streets are one-way. The distance of an arc is its straight line length times a
+curvature factor >= 1, so the straight line heuristic stays admissible. Its energy
+grows with the distance and with the climb on a smooth elevation field, so
+distance and energy are correlated and uphill costs more than downhill.
+
+Everything about row y of the grid is drawn from a random generator seeded with
+(seed, y), so any row can be generated again on its own. The writers never hold more
+than a few rows in memory:
+    - write_json: G.json, Dist.json, Cost.json and Coord.json, in the NYC schema
+    - write_compiled: the binary cache of graph_cache.py, in two passes: the first
+      counts the arcs of every node (offsets), the second fills the memory-mapped
+      arrays row by row
+
+usage: python synthetic_graph.py json|compiled <folder> <number of nodes> [seed]
+"""
+from pathlib import Path
+
+import json
+import math
+import sys
+import numpy as np
+from numpy.lib.format import open_memmap
+
+from graph_cache import default_cache_folder, new_tmp_folder, replace_folder, write_cache_header
+
+# same kind of numbers as the NYC data
+ORIGIN = (-73990000, 40700000)
+
+
+"""
+RoadGrid
+- arguments:
+    - width, height: nodes per row and number of rows
+    - seed: the same seed always gives the same graph
+    - spacing: distance between neighbouring grid points
+    - jitter: how far a node may move from its grid point, as a fraction of spacing
+    - keep: probability of a street between two neighbouring nodes
+    - diagonal: probability of a diagonal street
+    - oneway: probability that a street is one-way
+- nodes are numbered row by row, the label of node i is str(i + 1) as in the NYC data
+"""
+class RoadGrid:
+
+    def __init__(self, width, height, seed=0, spacing=1000, jitter=0.3, keep=0.8, diagonal=0.05,
+                 oneway=0.1):
+        self.width = width
+        self.height = height
+        self.seed = seed
+        self.spacing = spacing
+        self.jitter = jitter
+        self.keep = keep
+        self.diagonal = diagonal
+        self.oneway = oneway
+
+        # elevation field: a few smooth waves with random phases
+        rng = np.random.default_rng([seed, 2])
+        self.phases = rng.uniform(0, 2 * math.pi, 3)
+
+    """
+    with_nodes
+    - a square-ish RoadGrid with about num_nodes nodes
+    """
+    @classmethod
+    def with_nodes(cls, num_nodes, seed=0, **options):
+        width = max(2, int(math.sqrt(num_nodes)))
+        return cls(width, max(2, -(-num_nodes // width)), seed, **options)
+
+    @property
+    def num_nodes(self):
+        return self.width * self.height
+
+    def parameters(self):
+        return {
+            "width": self.width, "height": self.height, "seed": self.seed,
+            "spacing": self.spacing, "jitter": self.jitter, "keep": self.keep,
+            "diagonal": self.diagonal, "oneway": self.oneway,
+        }
+
+    """
+    coords
+    - (width, 2) array of the coordinates of row y, rounded like the NYC data
+    """
+    def coords(self, y):
+        rng = np.random.default_rng([self.seed, 0, y])
+        offsets = rng.uniform(-self.jitter, self.jitter, (self.width, 2))
+        grid = np.column_stack((np.arange(self.width), np.full(self.width, y)))
+        return np.round((grid + offsets) * self.spacing + ORIGIN)
+
+    def elevation(self, coords):
+        x = (coords[:, 0] - ORIGIN[0]) / self.spacing
+        y = (coords[:, 1] - ORIGIN[1]) / self.spacing
+        p = self.phases
+        return self.spacing * (
+            np.sin(x / 40 + p[0]) + np.sin(y / 55 + p[1]) + 0.5 * np.sin((x + y) / 17 + p[2]))
+
+    """
+    streets
+    - the streets owned by row y, each a dictionary of arrays over x:
+        - "east": (x, y) - (x + 1, y)
+        - "north": (x, y) - (x, y + 1)
+        - "diagonal": (x, y) - (x + 1, y + 1)
+    - per street: present, direction (0 both ways, 1 forward only, 2 backward only),
+      curvature, and an energy noise factor for each direction
+    """
+    def streets(self, y):
+        rng = np.random.default_rng([self.seed, 1, y])
+        width = self.width
+        streets = {}
+        for kind, count, probability in (
+            ("east", width - 1, self.keep),
+            ("north", width, self.keep),
+            ("diagonal", width - 1, self.diagonal),
+        ):
+            # every kind is drawn even on the last row, so the draws never depend on the height
+            present = rng.random(count) < probability
+            if kind != "east" and y == self.height - 1:
+                present[:] = False
+            oneway = rng.random(count) < self.oneway
+            direction = np.where(oneway, 1 + (rng.random(count) < 0.5), 0)
+            streets[kind] = {
+                "present": present,
+                "direction": direction,
+                "curvature": rng.uniform(1.0, 1.3, count),
+                "noise": rng.lognormal(0.0, 0.2, (2, count)),
+            }
+        return streets
+
+    """
+    row_arcs
+    - the arcs leaving the nodes of row y, in CSR order (by tail, then target)
+    - output:
+        - (tails, targets, dist, energy) arrays with node ids
+    """
+    def row_arcs(self, y):
+
+        width = self.width
+        here = self.streets(y)
+        below = self.streets(y - 1) if y > 0 else None
+        x = np.arange(width)
+
+        # (tail x, target id, curvature, noise) of every candidate arc
+        parts = []
+
+        def add(street, forward, tail_x, target_id):
+            allowed = street["present"] & (street["direction"] != (2 if forward else 1))
+            parts.append((
+                tail_x[allowed], target_id[allowed], street["curvature"][allowed],
+                street["noise"][0 if forward else 1][allowed],
+            ))
+
+        row = y * width
+        add(here["east"], True, x[:-1], row + x[1:])                     # east
+        add(here["east"], False, x[1:], row + x[:-1])                    # west
+        add(here["north"], True, x, row + width + x)                     # north
+        add(here["diagonal"], True, x[:-1], row + width + x[1:])         # north east
+        if below is not None:
+            add(below["north"], False, x, row - width + x)               # south
+            add(below["diagonal"], False, x[1:], row - width + x[:-1])   # south west
+
+        tail_x, targets, curvature, noise = (np.concatenate(values) for values in zip(*parts))
+        order = np.lexsort((targets, tail_x))
+        tail_x, targets, curvature, noise = tail_x[order], targets[order], curvature[order], noise[order]
+
+        # coordinates of the tails and targets, from rows y - 1 .. y + 1
+        rows = {r: self.coords(r) for r in (y - 1, y, y + 1) if 0 <= r < self.height}
+        tail_coords = rows[y][tail_x]
+        target_coords = np.empty((len(targets), 2))
+        for r, coords in rows.items():
+            in_row = targets // width == r
+            target_coords[in_row] = coords[targets[in_row] % width]
+
+        length = np.hypot(*(target_coords - tail_coords).T)
+        dist = np.ceil(length * curvature).astype(np.int64)
+        climb = np.maximum(self.elevation(target_coords) - self.elevation(tail_coords), 0)
+        energy = np.maximum(np.round(dist * 0.8 * noise + 4 * climb), 1).astype(np.int64)
+
+        return (row + tail_x).astype(np.int32), targets.astype(np.int32), dist, energy
+
+
+"""
+write_json
+- writes G.json, Dist.json, Cost.json and Coord.json of grid to folder, row by row
+"""
+def write_json(grid, folder):
+
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    names = ("G", "Dist", "Cost", "Coord")
+    files = {name: open(folder / f"{name}.json", "w", encoding="utf8") for name in names}
+    # ", " goes before every entry of a file but its first
+    separators = dict.fromkeys(names, "")
+
+    try:
+        for f in files.values():
+            f.write("{")
+
+        for y in range(grid.height):
+            tails, targets, dist, energy = grid.row_arcs(y)
+            coords = grid.coords(y).astype(np.int64).tolist()
+            starts = np.searchsorted(tails, y * grid.width + np.arange(grid.width + 1))
+            labels = (targets + 1).astype(str).tolist()
+            dist, energy = dist.tolist(), energy.tolist()
+
+            chunks = {name: [] for name in names}
+
+            def add(name, key, value):
+                chunks[name].append("{0}{1}: {2}".format(separators[name], json.dumps(key), json.dumps(value)))
+                separators[name] = ", "
+
+            for x in range(grid.width):
+                u = str(y * grid.width + x + 1)
+                neighbours = labels[starts[x]:starts[x + 1]]
+                add("G", u, neighbours)
+                add("Coord", u, coords[x])
+                for arc, v in enumerate(neighbours, starts[x]):
+                    add("Dist", f"{u},{v}", dist[arc])
+                    add("Cost", f"{u},{v}", energy[arc])
+
+            for name in names:
+                files[name].write("".join(chunks[name]))
+
+        for f in files.values():
+            f.write("}")
+    finally:
+        for f in files.values():
+            f.close()
+
+
+"""
+write_compiled
+- writes grid as a binary graph cache (see graph_cache.py) to cache_folder,
+  default folder/compiled, so that load_graph_cache and GraphStore can read it
+- output:
+    - the cache folder
+"""
+def write_compiled(grid, folder, cache_folder=None):
+
+    cache_folder = Path(cache_folder or default_cache_folder(folder))
+    tmp_folder = new_tmp_folder(cache_folder)
+
+    n, width = grid.num_nodes, grid.width
+
+    # first pass: number of arcs leaving every node
+    offsets = open_memmap(tmp_folder / "offsets.npy", "w+", np.int64, (n + 1,))
+    offsets[0] = 0
+    for y in range(grid.height):
+        tails = grid.row_arcs(y)[0]
+        counts = np.bincount(tails - y * width, minlength=width)
+        offsets[y * width + 1:(y + 1) * width + 1] = offsets[y * width] + np.cumsum(counts)
+    num_arcs = int(offsets[n])
+
+    # second pass: the arcs themselves
+    arrays = {
+        "targets": open_memmap(tmp_folder / "targets.npy", "w+", np.int32, (num_arcs,)),
+        "tails": open_memmap(tmp_folder / "tails.npy", "w+", np.int32, (num_arcs,)),
+        "dist": open_memmap(tmp_folder / "dist.npy", "w+", np.int64, (num_arcs,)),
+        "energy": open_memmap(tmp_folder / "energy.npy", "w+", np.int64, (num_arcs,)),
+    }
+    coords = open_memmap(tmp_folder / "coords.npy", "w+", np.float64, (n, 2))
+    labels = open_memmap(tmp_folder / "labels.npy", "w+", "<U{0}".format(len(str(n))), (n,))
+    for y in range(grid.height):
+        tails, targets, dist, energy = grid.row_arcs(y)
+        first, last = offsets[y * width], offsets[(y + 1) * width]
+        arrays["tails"][first:last] = tails
+        arrays["targets"][first:last] = targets
+        arrays["dist"][first:last] = dist
+        arrays["energy"][first:last] = energy
+        coords[y * width:(y + 1) * width] = grid.coords(y)
+        labels[y * width:(y + 1) * width] = np.arange(y * width + 1, (y + 1) * width + 1).astype(str)
+
+    for array in (offsets, coords, labels, *arrays.values()):
+        array.flush()
+    del offsets, coords, labels, arrays
+
+    write_cache_header(tmp_folder, n, num_arcs, generator=grid.parameters())
+    replace_folder(tmp_folder, cache_folder)
+
+    return cache_folder
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (4, 5) or sys.argv[1] not in ("json", "compiled"):
+        print(__doc__.strip().splitlines()[-1])
+        sys.exit(1)
+    grid = RoadGrid.with_nodes(int(sys.argv[3]), int(sys.argv[4]) if len(sys.argv) == 5 else 0)
+    if sys.argv[1] == "json":
+        write_json(grid, sys.argv[2])
+        print("Wrote {0} nodes to {1}".format(grid.num_nodes, sys.argv[2]))
+    else:
+        folder = write_compiled(grid, sys.argv[2])
+        print("Wrote {0} nodes to {1}".format(grid.num_nodes, folder))
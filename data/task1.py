@@ -1,44 +1,42 @@
 """
-Please ensure that you have import the priority_dictionary.py
+Please ensure that you have import the indexed_heap.py
 """
-from priority_dictionary import *
-from pathlib import Path
+from indexed_heap import IndexedHeap
+from graph_store import GraphStore
+from instrumentation import search_stats
 
-import os
-import json
-print(os.getcwd())
 
+def dijkstra_task1(graph, start, end, Dist=None, Cost=None, store=None, verbose=True, stats=None):
+    """Find all shortest paths from start node to a non-specific end, eg: each other node.
 
-data_folder = Path("source_data/text_files/")
+    The edge distances and energies are read from Dist and Cost. Any that are not
+    given come from store, which defaults to the process-wide GraphStore.
+    Returns (shortest_path, shortest_distance, total_energy); the results are
+    printed unless verbose is False. Pass a SearchStats (see instrumentation.py)
+    as stats to have the search counted and timed."""
 
-file_to_open = data_folder / "raw_data.txt"
+    if stats is None:
+        stats = search_stats()
+    stats.start("search")
 
-
-# # read data
-with open(r"../data/G.json", encoding="utf8") as f:
-    G = json.load(f)
-with open(r"../data/Dist.json", encoding="utf8") as f:
-    Dist = json.load(f)
-with open(r"../data/Cost.json", encoding="utf8") as f:
-    Cost = json.load(f)
-with open(r"../data/Coord.json", encoding="utf8") as f:
-    Coord = json.load(f)
-
-
-def dijkstra_task1(graph, start, end):
-    """Find all shortest paths from start node to a non-specific end, eg: each other node."""
+    if Dist is None or Cost is None:
+        if store is None:
+            store = GraphStore.get()
+        Dist = store.Dist if Dist is None else Dist
+        Cost = store.Cost if Cost is None else Cost
 
     current_total_distances = {}    # dictionary of total distances so far
     # dictionary of candidate nodes, where the key is neighbour node, value is current node
     candidate_nodes = {}
-    # estimated total distance of so far
-    estimated_total_distances = priorityDictionary()
+    # estimated total distance of so far - each node is queued at most once, decrease-key updates it
+    estimated_total_distances = IndexedHeap()
     # initialize the distance at start node is 0
-    estimated_total_distances[start] = 0
+    estimated_total_distances.push(start, 0)
 
     # outer loop
-    for current_node in estimated_total_distances:
-        current_total_distances[current_node] = estimated_total_distances[current_node]
+    while estimated_total_distances:
+        distance, current_node = estimated_total_distances.pop()
+        current_total_distances[current_node] = distance
         if current_node == end:      # if we have reached the end node
             break
 
@@ -61,11 +59,17 @@ def dijkstra_task1(graph, start, end):
 
             # if the neighbour node is not visited
             # or if the updated path length is shorter than the estimated total distance from start node to neighbour node
-            elif neighbour not in estimated_total_distances or path_length < estimated_total_distances[neighbour]:
-                # add the neighbour and path_length as key-value pair into the dictionary
-                estimated_total_distances[neighbour] = path_length
+            elif neighbour not in estimated_total_distances or path_length < estimated_total_distances.priority(neighbour):
+                # add the neighbour with path_length, or lower its queued distance
+                estimated_total_distances.push(neighbour, path_length)
                 # add neighbour and current_node into dictionary
                 candidate_nodes[neighbour] = current_node
+    stats.stop("search")
+    if stats.enabled:
+        stats.add_search(estimated_total_distances,
+                         sum(len(graph[node]) for node in current_total_distances if node != end))
+
+    stats.start("extract")
     # use candidate_nodes to generate shortest path
     shortest_path = []
     while True:
@@ -78,19 +82,25 @@ def dijkstra_task1(graph, start, end):
     # reverse order to get final path
     shortest_path.reverse()
 
-    # print out the shortest path
-    print("Shortest path:", end='')
-    for i in range(0, len(shortest_path)-1):
-        print(shortest_path[i], "->", end='')
-    print(shortest_path[-1], ".")
-
-    # obtain the value in the estimtaed_total_distances dictionary, the end node is the key
-    print("Shortest distance:",
-          estimated_total_distances[shortest_path[-1]], ".")
+    shortest_distance = current_total_distances[shortest_path[-1]]
 
     # calculate total energy
     total_energy = 0
     for i in range(0, len(shortest_path)-1):
         total_energy += Cost[f"{shortest_path[i]},{shortest_path[i+1]}"]
-    print("Total energy cost:", total_energy, ".")
     # Task 1 does not satisfy the energy constraint
+    stats.stop("extract")
+    stats.emit("dijkstra_task1")
+
+    if verbose:
+        # print out the shortest path
+        print("Shortest path:", end='')
+        for i in range(0, len(shortest_path)-1):
+            print(shortest_path[i], "->", end='')
+        print(shortest_path[-1], ".")
+
+        # obtain the value in the estimtaed_total_distances dictionary, the end node is the key
+        print("Shortest distance:", shortest_distance, ".")
+        print("Total energy cost:", total_energy, ".")
+
+    return shortest_path, shortest_distance, total_energy
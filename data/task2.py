@@ -1,9 +1,18 @@
 
 """
-Please ensure that you have these two modules.
+Please ensure that you have these modules.
 """
 from collections import namedtuple
-from heapq import heappush, heappop
+import numpy as np
+
+from compiled_graph import CompiledGraph
+from indexed_heap import IndexedHeap
+from radix_heap import RadixHeap
+from instrumentation import NO_STATS, search_stats
+from search_state import (
+    SearchWorkspace, LabelWorkspace, workspace_pool, settled_arcs, NO_ARC,
+)
+from energy_bounds import lower_bounds
 
 """
 PathInfo 
@@ -11,77 +20,200 @@ PathInfo
 - nodes: nodes of the shortest path
 - distance: total distance of the path
 - energy: total energy of the path
+- lower_bound: proven lower bound on the shortest distance within the budget
+  (only set by engines that compute one)
+- gap: (distance - lower_bound) / distance, 0 when the path is provably the shortest
+- stats: dictionary of engine specific counters, None if the engine keeps none
+    - "queue": priority queue used by the rerun engine on a CompiledGraph
+    - "expanded": nodes expanded by each search of the incremental engine
+    - with instrument=True, the counters of instrumentation.py and the phase
+      timings, as "time_<phase>" in seconds
 """
-PathInfo = namedtuple("PathInfo", ("nodes", "distance", "energy"))
+PathInfo = namedtuple(
+    "PathInfo", ("nodes", "distance", "energy", "lower_bound", "gap", "stats"),
+    defaults=(None, None, None))
 
 
 
 """
 find_path
 - finds shortest path from s to d
-- wrapper for single_source_shortest_paths
+- wrapper for shortest_path_search
 - arguments:
-    - graph: an adjacency list
-    - cost_func: returns distance from u to v
+    - graph: an adjacency list or a CompiledGraph
+    - cost_func: returns distance from u to v (not needed for a CompiledGraph)
     - heuristic_func: returns estimated distance from v to d
-    - energy_func: returns energy from u to v
-    - energy_budget: energy_budget
+    - energy_func: returns energy from u to v (not needed for a CompiledGraph)
+    - energy_budget: energy_budget; once a path over the budget is found (from the
+      start for the label engine), the engines drop the nodes from which d cannot be
+      reached within it, and raise NoPathError right away if s is one of them
+      (see energy_bounds.py)
+    - engine: how the budget is handled
+        - "rerun": if the shortest path is over the budget, search once more, not
+          following any path that the least energy to d takes over the budget (fast,
+          but the path found may not be the shortest)
+        - "label": exact label-setting search, see label_setting.py
+        - "larac": lagrangian relaxation with a reported optimality gap, see larac.py
+        - "incremental": the unpruned edge-removal loop, which deletes the most energy
+          intensive edge of the path and searches again until a path meets the
+          budget; each search only repairs the part of the previous one below the
+          removed edge, see dynamic_search.py
+    - engine_options: extra arguments of the engine, e.g. max_gap for "larac", or
+      queue for "rerun" on a CompiledGraph (see select_queue); ValueError for an
+      engine or graph that takes none
+    - direction: "forward", or "bidirectional" to search from both s and d
+      (rerun engine only, see bidirectional.py)
+    - the label and incremental engines and the bidirectional search need a
+      CompiledGraph (ValueError otherwise, see compiled_graph.require_compiled)
+    - instrument: add the search counters and phase timings to PathInfo.stats
+      (forward rerun engine only, ValueError otherwise; see instrumentation.py)
 - Output:
-    - PathInfo
+    - PathInfo, with stats["queue"] naming the priority queue used on a CompiledGraph,
+      or stats["expanded"] the nodes expanded by each search of the incremental engine
 """
 def find_path(
-    graph, s, d, cost_func, energy_func, heuristic_func=None, energy_budget=287932
+    graph, s, d, cost_func=None, energy_func=None, heuristic_func=None, energy_budget=287932,
+    engine="rerun", direction="forward", instrument=False, **engine_options
 ):
 
-    predecessors = single_source_shortest_paths(
-        graph, s, d, cost_func, energy_func, heuristic_func, energy_budget
-    )
+    if instrument and (direction != "forward" or engine != "rerun"):
+        raise ValueError("instrument is only supported by the forward rerun engine")
+
+    if direction == "bidirectional":
+        if engine != "rerun" or heuristic_func:
+            raise ValueError("the bidirectional search supports the rerun engine without heuristic")
+        if engine_options:
+            raise ValueError("the bidirectional search takes no engine options")
+        from bidirectional import find_path_bidirectional
+        return find_path_bidirectional(graph, s, d, energy_budget=energy_budget)
+    elif direction != "forward":
+        raise ValueError("unknown direction {0!r}".format(direction))
+
+    # the engines are imported here because they use the helpers of this module
+    if engine == "label":
+        from label_setting import find_path_label_setting
+        return find_path_label_setting(graph, s, d, energy_budget, **engine_options)
+    elif engine == "larac":
+        from larac import find_path_larac
+        return find_path_larac(
+            graph, s, d, cost_func, energy_func, energy_budget, **engine_options)
+    elif engine == "incremental":
+        if engine_options:
+            raise ValueError("the incremental engine takes no engine options")
+        from dynamic_search import find_path_incremental
+        return find_path_incremental(graph, s, d, energy_budget=energy_budget)
+    elif engine != "rerun":
+        raise ValueError("unknown engine {0!r}".format(engine))
+
+    stats = search_stats(instrument)
+
+    # compiled graphs read the edge weights straight from their arrays
+    if isinstance(graph, CompiledGraph):
+        s, d = graph.node_id(s), graph.node_id(d)
+        queue = select_queue(graph, heuristic_func, **engine_options)
+        # the predecessors live in the workspace, so the path is extracted before it is returned
+        with graph.workspaces.acquire() as workspace:
+            shortest_path_search_compiled(
+                graph, s, d, heuristic_func, energy_budget, queue, stats, workspace
+            )
+            with stats.phase("extract"):
+                path = path_info_from_arcs(graph, workspace.path_arcs(graph.tails, d), d)
+        return with_search_stats(path._replace(stats={"queue": queue}), stats, "find_path")
+
+    if engine_options:
+        raise ValueError("the rerun engine takes no engine options on an adjacency list")
+
+    with workspace_pool(graph).acquire() as workspace:
+        shortest_path_search(
+            graph, s, d, cost_func, energy_func, heuristic_func, energy_budget, stats, workspace
+        )
+
+        with stats.phase("extract"):
+            path = path_info_from_edges(workspace.edges(d), d)
+
+    return with_search_stats(path, stats, "find_path")
+
+
+"""
+with_search_stats
+- adds the counters of stats (see instrumentation.py) to path.stats and sends them
+  to the hooks, unless stats is NO_STATS
+"""
+def with_search_stats(path, stats, name):
+
+    if not stats.enabled:
+        return path
+
+    stats.emit(name)
+    merged = dict(path.stats or {})
+    merged.update(stats.as_dict())
 
-    return extract_shortest_path_from_predecessor_list(predecessors, d)
+    return path._replace(stats=merged)
 
 
 """
-single_source_shortest_paths
-- finds shortest path from s to d
-- wrapper for single_source_shortest_paths
+shortest_path_search
+- finds shortest path from s to d, the search of find_path on an adjacency list
 - arguments:
     - same as find_path
+    - stats: SearchStats filled with the counters of the search, see instrumentation.py
+    - workspace: LabelWorkspace holding the state of the search (see search_state.py),
+      a new one by default
+- if the shortest path is over the budget, the search runs once more without reaching
+  a node on a path whose energy plus the least energy from the node to d exceeds the
+  budget (see energy_lower_bounds), so the path it finds meets the budget. It still
+  finds one: each node reached keeps a path that the least energy path from the node
+  completes within the budget, so the next node of that path is reached as well, up to d
 - Output:
-    - predecessors: a dictionary of predecessors i.e (predecessor, edge_cost, edge_energy)
+    - the workspace, holding the predecessor, edge_cost and edge_energy of every
+      reached node until its next search (workspace.edges(d) walks the path)
 """
-def single_source_shortest_paths(
-    graph, s, d, cost_func, energy_func, heuristic_func=None, energy_budget=287932
+def shortest_path_search(
+    graph, s, d, cost_func, energy_func, heuristic_func=None, energy_budget=287932,
+    stats=NO_STATS, workspace=None
 ):
 
-    # optional - allows the algorithm to rerun multiple times
-    graph = graph.copy()
-
-    while True:
-
-        """
-        following block of code:
-            - finds the shortest path 
-            - shortest path information is found in predecessors
-        """
-        costs = {
-            s: 0}                               # Current known costs of paths from s to all nodes
-        # (predecessor, edge_cost, edge_energy)
-        predecessors = {s: (None, None, None)}
-        visit_queue = [(0, s)]                       # (cost_of_s_to_u, node)
-        # visited nodes - guaranteed with the lowest cost_of_s_to_u
-        visited = set()
+    # callbacks are only wrapped (and counted) when the counters are on
+    cost_func = stats.count_calls(cost_func, "cost_func_calls")
+    energy_func = stats.count_calls(energy_func, "energy_func_calls")
+    heuristic_func = stats.count_calls(heuristic_func, "heuristic_func_calls")
+
+    # costs, predecessors and reached / settled stamps by node id, see search_state.py;
+    # the same arrays serve both searches
+    if workspace is None:
+        workspace = LabelWorkspace()
+    ids, intern = workspace.ids, workspace.intern
+    costs, parents, stamps = workspace.costs, workspace.predecessors, workspace.stamps
+    edge_costs, edge_energies = workspace.edge_costs, workspace.edge_energies
+    energies = workspace.energies
+    source = ids[s] if s in ids else intern(s)
+
+    """
+    search
+    - finds the shortest path, its information is found in workspace
+    - to_go: least energy from each node to d, None for a search ignoring the budget
+    """
+    def search(to_go):
+
+        stats.start("search")
+
+        reached, settled = workspace.reset()
+        costs[source], parents[source], stamps[source] = 0, NO_ARC, reached
+        energies[source] = 0
+        visit_queue = IndexedHeap()                  # node -> cost_of_s_to_u, with decrease-key
+        visit_queue.push(s, 0)
 
         while visit_queue:
 
             # gets lowest cost_of_s_to_u
-            cost_of_s_to_u, u = heappop(visit_queue)
+            cost_of_s_to_u, u = visit_queue.pop()
 
             if u == d:                               # if u==d, the shortest path is found
                 break
 
-            if u in visited:                           # visited nodes are guaranteed to be part of the shortest path
-                continue                               # so we don't visit again
-            visited.add(u)
+            # each node is queued at most once, so a popped node is never visited yet
+            i = ids[u]
+            stamps[i] = settled
 
             # get the neighbours
             neighbors = graph[u]
@@ -91,8 +223,13 @@ def single_source_shortest_paths(
             # Check each of u's neighboring nodes to see if we can update costs
             for v in neighbors:
 
+                j = ids.get(v)
+                if j is None:
+                    j = intern(v)
+
                 # (visited nodes are guaranteed to have lowest costs already)
-                if v in visited:
+                stamp = stamps[j]
+                if stamp == settled:
                     continue
 
                 cost_of_u_to_v = cost_func(u, v)
@@ -102,36 +239,230 @@ def single_source_shortest_paths(
                     # add "estimated" cost from v to d    ( f = g + h )
                     cost_of_s_to_u_plus_cost_of_e += heuristic_func(v)
 
-                # If there are no existing costs, UPDATE.
+                # If there are no existing costs (v not reached in this search), UPDATE.
                 # If the new cost found is lower, UPDATE.
-                if v not in costs or cost_of_s_to_u_plus_cost_of_e < costs[v]:
+                if stamp != reached or cost_of_s_to_u_plus_cost_of_e < costs[j]:
+                    energy_of_u_to_v = energy_func(u, v)
+                    if to_go:
+                        # prune v if d cannot be reached from it within the budget
+                        energy_of_s_to_v = energies[i] + energy_of_u_to_v
+                        if energy_of_s_to_v + to_go[v] > energy_budget:
+                            continue
+                        energies[j] = energy_of_s_to_v
                     # update with lower found cost
-                    costs[v] = cost_of_s_to_u_plus_cost_of_e
-                    predecessors[v] = (u, cost_of_u_to_v, energy_func(u, v))
-                    # push to queue
-                    heappush(visit_queue, (cost_of_s_to_u_plus_cost_of_e, v))
-
-        """
-        following block of code:
-            - checks if shortest path found exceed the budget
-            - if so, remove the most energy intensive edge of the shortest path from the Graph
-            - restart 
-        """
-        if energy_budget:
-            if extract_energy_from_predecessor_list(predecessors, d) > energy_budget:
-                most_energy_intensive_edge = extract_most_energy_intensive_edge(
-                    predecessors, d)
-                a, b = most_energy_intensive_edge.split(",")
-                graph[a].remove(b)
-            else:
-                break                    # break if budget requirement is met
-        else:
-            break                        # break if there is no budget requirement
-
-    if d is not None and d not in costs:
+                    stamps[j] = reached
+                    costs[j] = cost_of_s_to_u_plus_cost_of_e
+                    parents[j] = i
+                    edge_costs[j] = cost_of_u_to_v
+                    edge_energies[j] = energy_of_u_to_v
+                    # push to queue, or lower its queued cost
+                    visit_queue.push(v, cost_of_s_to_u_plus_cost_of_e)
+
+        stats.stop("search")
+        if stats.enabled:
+            stats.add_search(visit_queue, sum(len(graph[u]) for u in workspace.settled()))
+
+    search(None)
+
+    """
+    following block of code:
+        - checks if shortest path found exceed the budget
+        - if so, searches again, pruned by the least energy from each node to d
+    """
+    if energy_budget and d in workspace:
+        with stats.phase("budget_check"):
+            over_budget = sum(edge_energy for _, _, edge_energy in workspace.edges(d)) > energy_budget
+        if over_budget:
+            search(energy_lower_bounds(graph, s, d, energy_budget, energy_func).to_go)
+
+    if d is not None and d not in workspace:
         raise NoPathError("Could not find a path from {0} to {1}".format(s, d))
 
-    return predecessors
+    return workspace
+
+
+"""
+single_source_shortest_paths
+- finds shortest path from s to d
+- wrapper for shortest_path_search
+- arguments:
+    - same as find_path, on an adjacency list
+- Output:
+    - predecessors: a dictionary of predecessors i.e (predecessor, edge_cost, edge_energy)
+"""
+def single_source_shortest_paths(
+    graph, s, d, cost_func, energy_func, heuristic_func=None, energy_budget=287932
+):
+
+    with workspace_pool(graph).acquire() as workspace:
+        shortest_path_search(
+            graph, s, d, cost_func, energy_func, heuristic_func, energy_budget, workspace=workspace)
+        return workspace.predecessor_dict()
+
+
+"""
+energy_lower_bounds
+- least energy from every node to d, for pruning a budgeted search, see energy_bounds.py
+- arguments:
+    - graph, s, d: an adjacency list and labels, or a CompiledGraph and integer ids
+    - energy_budget: None or 0 for no budget
+    - energy_func: needed for an adjacency list
+- output:
+    - EnergyBounds, None without a budget or without d
+    - raises NoPathError right away if even the least energy path from s to d needs
+      more than energy_budget
+"""
+def energy_lower_bounds(graph, s, d, energy_budget, energy_func=None):
+
+    if d is None:
+        return None
+
+    bounds = lower_bounds(graph, d, energy_budget, energy_func)
+    if bounds and bounds.to_go[s] > energy_budget:
+        if isinstance(graph, CompiledGraph):
+            s, d = graph.label(s), graph.label(d)
+        raise NoPathError("Could not find a path from {0} to {1} within energy budget {2}".format(
+            s, d, energy_budget))
+
+    return bounds
+
+
+"""
+select_queue
+- picks the priority queue of single_source_shortest_paths_compiled
+- arguments:
+    - graph: a CompiledGraph
+    - heuristic_func: same as find_path
+    - queue: "auto", "radix" or "binary"
+- output:
+    - "radix" (RadixHeap) if queue is "auto" and the graph has non-negative integer
+      distances and no heuristic is added to them, "binary" (IndexedHeap) otherwise
+"""
+def select_queue(graph, heuristic_func=None, queue="auto"):
+
+    if queue == "auto":
+        return "radix" if graph.integral_weights and not heuristic_func else "binary"
+    if queue == "radix" and (not graph.integral_weights or heuristic_func):
+        raise ValueError("the radix queue needs integer distances and no heuristic")
+    if queue not in ("radix", "binary"):
+        raise ValueError("unknown queue {0!r}".format(queue))
+    return queue
+
+
+QUEUES = {"radix": RadixHeap, "binary": IndexedHeap}
+
+
+"""
+shortest_path_search_compiled
+- same search as shortest_path_search, on a CompiledGraph
+- arguments:
+    - graph: a CompiledGraph
+    - s, d: integer node ids
+    - heuristic_func, energy_budget: same as find_path
+    - queue: priority queue, see select_queue
+    - stats: same as shortest_path_search
+    - workspace: SearchWorkspace sized to graph (see search_state.py), a new one by default
+- a path over the budget is searched again pruned, as in shortest_path_search
+- Output:
+    - the workspace, whose predecessors array holds the id of the arc used to reach each
+      node (NO_ARC for s) until its next search (workspace.path_arcs walks the path)
+"""
+def shortest_path_search_compiled(
+    graph, s, d, heuristic_func=None, energy_budget=287932, queue="auto", stats=NO_STATS,
+    workspace=None
+):
+
+    offsets, targets, dist, energy = graph.views()
+    Queue = QUEUES[select_queue(graph, heuristic_func, queue)]
+    heuristic_func = stats.count_calls(heuristic_func, "heuristic_func_calls")
+
+    # current known costs, arc used to reach each node and reached / settled stamps,
+    # by node id; the same arrays serve both searches
+    if workspace is None:
+        workspace = SearchWorkspace(graph.num_nodes)
+    costs, predecessors, stamps = workspace.costs, workspace.predecessors, workspace.stamps
+    energies = workspace.energies
+
+    # one search, see shortest_path_search
+    def search(to_go):
+
+        stats.start("search")
+
+        reached, settled = workspace.reset()
+        costs[s], predecessors[s], stamps[s], energies[s] = 0, NO_ARC, reached, 0
+        visit_queue = Queue()                   # node -> cost_of_s_to_u, with decrease-key
+        visit_queue.push(s, 0)
+
+        while visit_queue:
+
+            cost_of_s_to_u, u = visit_queue.pop()
+
+            if u == d:
+                break
+
+            stamps[u] = settled
+
+            # arcs leaving u are offsets[u] .. offsets[u+1]-1
+            for arc in range(offsets[u], offsets[u + 1]):
+
+                v = targets[arc]
+                stamp = stamps[v]
+                if stamp == settled:
+                    continue
+
+                cost_of_s_to_u_plus_cost_of_e = cost_of_s_to_u + dist[arc]
+
+                if heuristic_func:
+                    cost_of_s_to_u_plus_cost_of_e += heuristic_func(graph.label(v))
+
+                if stamp != reached or cost_of_s_to_u_plus_cost_of_e < costs[v]:
+                    if to_go:
+                        energy_of_s_to_v = energies[u] + energy[arc]
+                        if energy_of_s_to_v + to_go[v] > energy_budget:
+                            continue
+                        energies[v] = energy_of_s_to_v
+                    stamps[v] = reached
+                    costs[v] = cost_of_s_to_u_plus_cost_of_e
+                    predecessors[v] = arc
+                    visit_queue.push(v, cost_of_s_to_u_plus_cost_of_e)
+
+        stats.stop("search")
+        if stats.enabled:
+            stats.add_search(visit_queue, settled_arcs(graph, workspace))
+
+    search(None)
+
+    # same budget check as shortest_path_search, on arc ids
+    if energy_budget and workspace.reached(d):
+        with stats.phase("budget_check"):
+            over_budget = graph.energy[workspace.path_arcs(graph.tails, d)].sum() > energy_budget
+        if over_budget:
+            search(energy_lower_bounds(graph, s, d, energy_budget).to_go)
+
+    if not workspace.reached(d):
+        raise NoPathError("Could not find a path from {0} to {1}".format(
+            graph.label(s), graph.label(d)))
+
+    return workspace
+
+
+"""
+single_source_shortest_paths_compiled
+- same as single_source_shortest_paths, on a CompiledGraph
+- wrapper for shortest_path_search_compiled
+- arguments:
+    - same as shortest_path_search_compiled
+- Output:
+    - predecessors: a dictionary of node id -> id of the arc used to reach it (None for s)
+"""
+def single_source_shortest_paths_compiled(
+    graph, s, d, heuristic_func=None, energy_budget=287932, queue="auto", stats=NO_STATS
+):
+
+    with graph.workspaces.acquire() as workspace:
+        shortest_path_search_compiled(
+            graph, s, d, heuristic_func, energy_budget, queue, stats, workspace)
+        return workspace.predecessor_dict()
 
 
 """
@@ -143,18 +474,44 @@ extract_shortest_path_from_predecessor_list:
         - PathInfo: contains shortest path, total distance, total energy
 """
 def extract_shortest_path_from_predecessor_list(predecessors, d):
+    return path_info_from_edges(predecessor_edges(predecessors, d), d)
+
+
+"""
+predecessor_edges:
+    - arguments:
+        - same as extract_shortest_path_from_predecessor_list
+    - output:
+        - iterator of the (u, edge_cost, edge_energy) of the edges of the shortest path,
+          walking back from d (as LabelWorkspace.edges)
+"""
+def predecessor_edges(predecessors, d):
 
-    nodes = [d]    # Nodes on the shortest path from s to d
-    costs = []     # costs/distances for shortest path from s to d
-    energies = []  # energies for shortest path from s to d
     u, edge_cost, edge_energy = predecessors[d]
 
     while u is not None:
+        yield u, edge_cost, edge_energy
+        u, edge_cost, edge_energy = predecessors[u]
+
+
+"""
+path_info_from_edges:
+    - arguments:
+        - edges: (u, edge_cost, edge_energy) of the edges of a path, walking back from d
+        - d: destination
+    - output:
+        - PathInfo: contains shortest path, total distance, total energy
+"""
+def path_info_from_edges(edges, d):
 
+    nodes = [d]    # Nodes on the shortest path from s to d
+    costs = []     # costs/distances for shortest path from s to d
+    energies = []  # energies for shortest path from s to d
+
+    for u, edge_cost, edge_energy in edges:
         nodes.append(u)
         costs.append(edge_cost)
         energies.append(edge_energy)
-        u, edge_cost, edge_energy = predecessors[u]
 
     nodes.reverse()
 
@@ -171,15 +528,7 @@ extract_energy_from_predecessor_list:
 """
 def extract_energy_from_predecessor_list(predecessors, d):
 
-    energies = []  # energies for shortest path from s to d
-
-    u, _, edge_energy = predecessors[d]
-
-    while u is not None:
-        energies.append(edge_energy)
-        u, _, edge_energy = predecessors[u]
-
-    return sum(energies)
+    return sum(edge_energy for _, _, edge_energy in predecessor_edges(predecessors, d))
 
 
 """
@@ -191,18 +540,81 @@ extract_most_energy_intensive_edge:
 """
 def extract_most_energy_intensive_edge(predecessors, d):
     current_most_intensive = (0, 0, 0)
-    temp = None
-    u, edge_cost, edge_energy = predecessors[d]
-    while u is not None:
+    temp = d
+    for u, edge_cost, edge_energy in predecessor_edges(predecessors, d):
         if edge_energy > current_most_intensive[2]:
             current_most_intensive = (u, edge_cost, edge_energy)
             key = temp
         temp = u
-        u, edge_cost, edge_energy = predecessors[u]
     return f"{current_most_intensive[0]},{key}"
 
 
 
+"""
+extract_arcs_from_predecessor_arcs:
+    - arguments:
+        - graph: a CompiledGraph
+        - predecessors: output of single_source_shortest_paths_compiled
+        - d: destination (integer id)
+    - output:
+        - arc ids of the shortest path, from s to d
+"""
+def extract_arcs_from_predecessor_arcs(graph, predecessors, d):
+
+    tails = graph.tails
+    arcs = []
+    arc = predecessors[d]
+
+    while arc is not None:
+        arcs.append(arc)
+        arc = predecessors[int(tails[arc])]
+
+    arcs.reverse()
+
+    return arcs
+
+
+"""
+extract_path_info_from_predecessor_arcs:
+    - same as extract_shortest_path_from_predecessor_list, for a CompiledGraph
+    - node ids are converted back to the original labels
+"""
+def extract_path_info_from_predecessor_arcs(graph, predecessors, d):
+    return path_info_from_arcs(
+        graph, extract_arcs_from_predecessor_arcs(graph, predecessors, d), d)
+
+
+"""
+path_info_from_arcs:
+    - arguments:
+        - graph: a CompiledGraph
+        - arcs: arc ids of a path, in order
+        - d: destination (integer id), used when the path has no arcs
+    - output:
+        - PathInfo with the original node labels
+"""
+def path_info_from_arcs(graph, arcs, d):
+
+    if not arcs:
+        return PathInfo([graph.label(d)], 0, 0)
+
+    nodes = [graph.label(graph.tails[arcs[0]])]
+    nodes.extend(graph.label(v) for v in graph.targets[arcs])
+
+    return PathInfo(nodes, graph.dist[arcs].sum().item(), graph.energy[arcs].sum().item())
+
+
+"""
+extract_energy_from_predecessor_arcs:
+    - same as extract_energy_from_predecessor_list, for a CompiledGraph
+"""
+def extract_energy_from_predecessor_arcs(graph, predecessors, d):
+
+    arcs = extract_arcs_from_predecessor_arcs(graph, predecessors, d)
+
+    return graph.energy[arcs].sum().item()
+
+
 class DijkstarError(Exception):
     """Base class for Dijkstar errors."""
 
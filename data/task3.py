@@ -4,112 +4,381 @@ import json
 
 # use util functions from task 2
 from task2 import *
-from heapq import heappush
 
 
+"""
+find_path_astar
+- finds shortest path from s to d with A* search
+- arguments: same as find_path, plus
+    - heuristic_func: heuristic_func(alpha, v, d) estimates the distance from v to d,
+      like heuristic_sl_distance in main.py (on a CompiledGraph it may be None for the
+      straight line distance, see heuristic_table)
+    - alpha: weight of the heuristic
+    - engine: "rerun" or "incremental", see find_path
+    - direction: "forward", or "bidirectional" for bidirectional A* (rerun engine only),
+      which also calls heuristic_func(alpha, v, s) - see bidirectional.py
+    - instrument: same as find_path
+- graph may be a CompiledGraph, in which case cost_func and energy_func are not needed
+"""
 def find_path_astar(
-    graph, s, d, cost_func, energy_func, heuristic_func, alpha, energy_budget=287932
+    graph, s, d, cost_func=None, energy_func=None, heuristic_func=None, alpha=1, energy_budget=287932,
+    engine="rerun", direction="forward", instrument=False
 ):
 
-    predecessors = astar(
-        graph, s, d, cost_func, energy_func, heuristic_func, alpha, energy_budget
-    )
+    if instrument and (direction != "forward" or engine != "rerun"):
+        raise ValueError("instrument is only supported by the forward rerun engine")
 
-    return extract_shortest_path_from_predecessor_list(predecessors, d)
+    if direction == "bidirectional":
+        if engine != "rerun":
+            raise ValueError("the bidirectional search supports the rerun engine only")
+        from bidirectional import find_path_bidirectional
+        return find_path_bidirectional(graph, s, d, heuristic_func, alpha, energy_budget)
+    elif direction != "forward":
+        raise ValueError("unknown direction {0!r}".format(direction))
 
+    if engine == "incremental":
+        # imported here because dynamic_search uses the helpers of task 2
+        from dynamic_search import find_path_incremental
+        return find_path_incremental(graph, s, d, heuristic_func, alpha, energy_budget)
+    elif engine != "rerun":
+        raise ValueError("unknown engine {0!r}".format(engine))
 
-def astar(graph, s, d, cost_func, energy_func, heuristic_func, alpha, energy_budget=287932):
-    # optional - allows the algorithm to rerun multiple times
-    graph = graph.copy()
+    stats = search_stats(instrument)
+
+    # compiled graphs read the edge weights straight from their arrays
+    if isinstance(graph, CompiledGraph):
+        s, d = graph.node_id(s), graph.node_id(d)
+        # the predecessors live in the workspace, so the path is extracted before it is returned
+        with graph.workspaces.acquire() as workspace:
+            astar_search_compiled(
+                graph, s, d, heuristic_func, alpha, energy_budget, stats, workspace
+            )
+            with stats.phase("extract"):
+                path = path_info_from_arcs(graph, workspace.path_arcs(graph.tails, d), d)
+        return with_search_stats(path, stats, "find_path_astar")
+
+    with workspace_pool(graph).acquire() as workspace:
+        astar_search(
+            graph, s, d, cost_func, energy_func, heuristic_func, alpha, energy_budget, stats, workspace
+        )
+
+        with stats.phase("extract"):
+            path = path_info_from_edges(workspace.edges(d), d)
+
+    return with_search_stats(path, stats, "find_path_astar")
+
+
+"""
+astar_search
+- the search of find_path_astar on an adjacency list
+- arguments:
+    - same as find_path_astar
+    - stats, workspace: same as shortest_path_search
+- Output:
+    - the workspace, same as shortest_path_search
+"""
+def astar_search(
+    graph, s, d, cost_func, energy_func, heuristic_func, alpha, energy_budget=287932,
+    stats=NO_STATS, workspace=None
+):
+    # callbacks are only wrapped (and counted) when the counters are on, see instrumentation.py
+    cost_func = stats.count_calls(cost_func, "cost_func_calls")
+    energy_func = stats.count_calls(energy_func, "energy_func_calls")
+    if heuristic_func is None:
+        raise ValueError("A* on an adjacency list needs a heuristic_func")
+    if not hasattr(heuristic_func, "table"):
+        heuristic_func = stats.count_calls(heuristic_func, "heuristic_func_calls")
+
+    # heuristic values are computed once per node and reused by both searches
+    heuristic = heuristic_table(graph, d, heuristic_func, alpha)
 
-    while True:
+    # same state as shortest_path_search, see search_state.py
+    if workspace is None:
+        workspace = LabelWorkspace()
+    ids, intern = workspace.ids, workspace.intern
+    costs, parents, stamps = workspace.costs, workspace.predecessors, workspace.stamps
+    edge_costs, edge_energies = workspace.edge_costs, workspace.edge_energies
+    energies = workspace.energies
+    source = ids[s] if s in ids else intern(s)
+
+    # one search, pruned by to_go if given, see shortest_path_search
+    def search(to_go):
+
+        stats.start("search")
         """
         following block of code:
             - finds the shortest path 
-            - shortest path information is found in predecessors
+            - shortest path information is found in workspace
         """
-        costs = {
-            s: 0}                               # Current known costs of paths from s to all nodes
-        # (predecessor, edge_cost, edge_energy)
-        predecessors = {s: (None, None, None)}
-
-        # (f_score of u, cost_of_s_to_u, node)
-        visit_queue = [(heuristic_func(alpha, s), 0, s)]
+        reached, settled = workspace.reset()
+        costs[source], parents[source], stamps[source] = 0, NO_ARC, reached
+        energies[source] = 0
 
-        # visited nodes - guaranteed with the lowest cost_of_s_to_u
-        visited = set()
+        # node -> (f_score of u, cost_of_s_to_u), with decrease-key
+        visit_queue = IndexedHeap()
+        visit_queue.push(s, (heuristic[s], 0))
 
         while visit_queue:
 
-            # gets lowest cost_of_s_to_u
-            _, cost_of_s_to_u, u = heappop(visit_queue)
+            # gets lowest f_score
+            (_, cost_of_s_to_u), u = visit_queue.pop()
 
             if u == d:
                 # if u==d, the shortest path is found
                 break
 
-            if u in visited:                           # visited nodes are guaranteed to be part of the shortest path
-                continue                               # so we don't visit again
-            visited.add(u)
+            # each node is queued at most once, so a popped node is never visited yet
+            i = ids[u]
+            stamps[i] = settled
 
             # get the neighbours
             neighbors = graph[u]
             if not neighbors:                                # continue if there are no neighbours
                 continue
 
-            # sort neighbours based on heuristic
-            neighbors = sort_neighbors(neighbors, heuristic_func, alpha)
+            # neighbours are not sorted by heuristic: ties in the queue are broken by
+            # (f_score, cost, node), so the order they are pushed in does not matter
 
             # Check each of u's neighboring nodes to see if we can update costs
             for v in neighbors:
 
+                j = ids.get(v)
+                if j is None:
+                    j = intern(v)
+
                 # (visited nodes are guaranteed to have lowest costs already)
-                if v in visited:
+                stamp = stamps[j]
+                if stamp == settled:
                     continue
 
                 cost_of_u_to_v = cost_func(u, v)
                 cost_of_s_to_u_plus_cost_of_e = cost_of_s_to_u + cost_of_u_to_v
 
-                # add "estimated" cost from v to d    ( f = g + h )
-
-                f_score = cost_of_s_to_u_plus_cost_of_e + \
-                    heuristic_func(alpha, v)
-
                 # If there are no existing costs, UPDATE.
                 # If the new cost found is lower, UPDATE.
-                if v not in costs or cost_of_s_to_u_plus_cost_of_e < costs[v]:
+                if stamp != reached or cost_of_s_to_u_plus_cost_of_e < costs[j]:
+                    energy_of_u_to_v = energy_func(u, v)
+                    if to_go:
+                        # prune v if d cannot be reached from it within the budget
+                        energy_of_s_to_v = energies[i] + energy_of_u_to_v
+                        if energy_of_s_to_v + to_go[v] > energy_budget:
+                            continue
+                        energies[j] = energy_of_s_to_v
                     # update with lower found cost
-                    costs[v] = cost_of_s_to_u_plus_cost_of_e
-                    predecessors[v] = (u, cost_of_u_to_v, energy_func(u, v))
-                    # push to queue
+                    stamps[j] = reached
+                    costs[j] = cost_of_s_to_u_plus_cost_of_e
+                    parents[j] = i
+                    edge_costs[j] = cost_of_u_to_v
+                    edge_energies[j] = energy_of_u_to_v
 
-                    heappush(
-                        visit_queue, (f_score, cost_of_s_to_u_plus_cost_of_e, v))
+                    # add "estimated" cost from v to d    ( f = g + h )
+                    f_score = cost_of_s_to_u_plus_cost_of_e + heuristic[v]
 
-        """
-        following block of code:
-            - checks if shortest path found exceed the budget
-            - if so, remove the most energy intensive edge of the shortest path from the Graph
-            - restart 
-        """
-        if energy_budget:
-            if extract_energy_from_predecessor_list(predecessors, d) > energy_budget:
-                most_energy_intensive_edge = extract_most_energy_intensive_edge(
-                    predecessors, d)
-                a, b = most_energy_intensive_edge.split(",")
-                graph[a].remove(b)
-            else:
-                break                    # break if budget requirement is met
-        else:
-            break                        # break if there is no budget requirement
-
-    if d is not None and d not in costs:
+                    # push to queue, or lower its queued f_score
+                    visit_queue.push(v, (f_score, cost_of_s_to_u_plus_cost_of_e))
+
+        stats.stop("search")
+        if stats.enabled:
+            stats.add_search(visit_queue, sum(len(graph[u]) for u in workspace.settled()))
+
+    search(None)
+
+    """
+    following block of code:
+        - checks if shortest path found exceed the budget
+        - if so, searches again, pruned by the least energy from each node to d
+    """
+    if energy_budget and d in workspace:
+        with stats.phase("budget_check"):
+            over_budget = sum(edge_energy for _, _, edge_energy in workspace.edges(d)) > energy_budget
+        if over_budget:
+            search(energy_lower_bounds(graph, s, d, energy_budget, energy_func).to_go)
+
+    if d is not None and d not in workspace:
         raise NoPathError("Could not find a path from {0} to {1}".format(s, d))
 
-    return predecessors
+    return workspace
+
+
+"""
+astar_search_compiled
+- same search as astar_search, on a CompiledGraph with integer node ids
+- the heuristic of every node towards d is computed up front, see heuristic_table
+- workspace: same as shortest_path_search_compiled
+- Output:
+    - the workspace, same as shortest_path_search_compiled
+"""
+def astar_search_compiled(
+    graph, s, d, heuristic_func, alpha, energy_budget=287932, stats=NO_STATS, workspace=None
+):
+
+    offsets, targets, dist, energy = graph.views()
+    if not hasattr(heuristic_func, "table"):
+        # only a heuristic called node by node is counted
+        heuristic_func = stats.count_calls(heuristic_func, "heuristic_func_calls")
+    heuristic = heuristic_table(graph, d, heuristic_func, alpha)
+
+    if workspace is None:
+        workspace = SearchWorkspace(graph.num_nodes)
+    costs, predecessors, stamps = workspace.costs, workspace.predecessors, workspace.stamps
+    energies = workspace.energies
+
+    # one search, see shortest_path_search
+    def search(to_go):
+
+        stats.start("search")
+
+        reached, settled = workspace.reset()
+        costs[s], predecessors[s], stamps[s], energies[s] = 0, NO_ARC, reached, 0
+
+        # node -> (f_score of u, cost_of_s_to_u), with decrease-key
+        visit_queue = IndexedHeap()
+        visit_queue.push(s, (heuristic[s], 0))
+
+        while visit_queue:
+
+            (_, cost_of_s_to_u), u = visit_queue.pop()
+
+            if u == d:
+                break
+
+            stamps[u] = settled
+
+            for arc in range(offsets[u], offsets[u + 1]):
+
+                v = targets[arc]
+                stamp = stamps[v]
+                if stamp == settled:
+                    continue
+
+                cost_of_s_to_u_plus_cost_of_e = cost_of_s_to_u + dist[arc]
+
+                if stamp != reached or cost_of_s_to_u_plus_cost_of_e < costs[v]:
+                    if to_go:
+                        energy_of_s_to_v = energies[u] + energy[arc]
+                        if energy_of_s_to_v + to_go[v] > energy_budget:
+                            continue
+                        energies[v] = energy_of_s_to_v
+                    stamps[v] = reached
+                    costs[v] = cost_of_s_to_u_plus_cost_of_e
+                    predecessors[v] = arc
+                    visit_queue.push(
+                        v, (cost_of_s_to_u_plus_cost_of_e + heuristic[v], cost_of_s_to_u_plus_cost_of_e))
+
+        stats.stop("search")
+        if stats.enabled:
+            stats.add_search(visit_queue, settled_arcs(graph, workspace))
+
+    search(None)
+
+    if energy_budget and workspace.reached(d):
+        with stats.phase("budget_check"):
+            over_budget = graph.energy[workspace.path_arcs(graph.tails, d)].sum() > energy_budget
+        if over_budget:
+            search(energy_lower_bounds(graph, s, d, energy_budget).to_go)
+
+    if not workspace.reached(d):
+        raise NoPathError("Could not find a path from {0} to {1}".format(
+            graph.label(s), graph.label(d)))
+
+    return workspace
+
+
+"""
+astar / astar_compiled
+- same as single_source_shortest_paths / single_source_shortest_paths_compiled,
+  with the A* search
+- Output:
+    - predecessors: same as single_source_shortest_paths / single_source_shortest_paths_compiled
+"""
+def astar(graph, s, d, cost_func, energy_func, heuristic_func, alpha, energy_budget=287932):
+
+    with workspace_pool(graph).acquire() as workspace:
+        astar_search(
+            graph, s, d, cost_func, energy_func, heuristic_func, alpha, energy_budget,
+            workspace=workspace)
+        return workspace.predecessor_dict()
+
+
+def astar_compiled(graph, s, d, heuristic_func, alpha, energy_budget=287932, stats=NO_STATS):
+
+    with graph.workspaces.acquire() as workspace:
+        astar_search_compiled(graph, s, d, heuristic_func, alpha, energy_budget, stats, workspace)
+        return workspace.predecessor_dict()
+
+
+"""
+LazyHeuristic
+- heuristic[v] is heuristic_func(alpha, v, d), computed the first time v is needed
+"""
+class LazyHeuristic(dict):
+
+    def __init__(self, heuristic_func, alpha, d, label=None):
+        super().__init__()
+        self.heuristic_func = heuristic_func
+        self.alpha = alpha
+        self.d = d                      # label of the target
+        self.label = label              # maps a node id to the label heuristic_func expects
+
+    def __missing__(self, v):
+        value = self[v] = self.heuristic_func(
+            self.alpha, v if self.label is None else self.label(v), self.d)
+        return value
+
+
+"""
+StraightLineHeuristic
+- straight line distance between the coordinates of two nodes, times alpha
+- heuristic_func(alpha, node1, node2) with node labels, like heuristic_sl_distance in main.py
+- table(graph, d, alpha) gives the distance from every node to d in one numpy operation:
+    - CompiledGraph: an array indexed by node id, from graph.coords
+    - adjacency list: a dictionary of the labels of Coord
+"""
+class StraightLineHeuristic:
+
+    def __init__(self, Coord=None):
+        self.Coord = Coord
+        self._labels = self._coords = None      # Coord as arrays, built on first use
+
+    def __call__(self, alpha, node1, node2):
+        return alpha * math.dist(self.Coord[node1], self.Coord[node2])
+
+    def table(self, graph, d, alpha):
+
+        if isinstance(graph, CompiledGraph):
+            offsets = graph.coords - graph.coords[d]
+            return alpha * np.hypot(offsets[:, 0], offsets[:, 1])
+
+        if self._labels is None:
+            self._labels = list(self.Coord)
+            self._coords = np.array([self.Coord[v] for v in self._labels], dtype=np.float64)
+        offsets = self._coords - np.asarray(self.Coord[d], dtype=np.float64)
+        return dict(zip(self._labels, (alpha * np.hypot(offsets[:, 0], offsets[:, 1])).tolist()))
+
+
+"""
+heuristic_table
+- the heuristic of every node towards d: indexed by node id on a CompiledGraph, by
+  label on an adjacency list
+- arguments:
+    - heuristic_func:
+        - None: straight line distance on graph.coords (CompiledGraph only)
+        - an object with a table(graph, d, alpha) method (StraightLineHeuristic,
+          the ALT heuristic of landmarks.py): one vectorised call
+        - any other heuristic_func(alpha, v, d): called lazily with node labels
+"""
+def heuristic_table(graph, d, heuristic_func, alpha):
+
+    if not isinstance(graph, CompiledGraph):
+        if hasattr(heuristic_func, "table"):
+            return heuristic_func.table(graph, d, alpha)
+        return LazyHeuristic(heuristic_func, alpha, d)
+
+    if heuristic_func is None:
+        heuristic_func = StraightLineHeuristic()
 
+    if hasattr(heuristic_func, "table"):
+        # a list indexes faster than a numpy array in the search loop
+        return np.asarray(heuristic_func.table(graph, d, alpha), dtype=np.float64).tolist()
 
-def sort_neighbors(neighbors, heuristic_func, alpha):
-    neighbor_dict = {v: heuristic_func(alpha, v) for v in neighbors}
-    sorted_neighbors = sorted(neighbors, key=neighbor_dict.get)
-    return sorted_neighbors
\ No newline at end of file
+    return LazyHeuristic(heuristic_func, alpha, graph.label(d), graph.label)
@@ -0,0 +1,84 @@
+"""
+Shared fixtures of the tests: small seeded RoadGrid graphs, as json, as an adjacency
+list with its cost_func / energy_func (GraphStore) and as a CompiledGraph
+
+Run from the data folder:
+    python -m pytest tests
+"""
+from pathlib import Path
+
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from synthetic_graph import RoadGrid, write_json
+from compiled_graph import CompiledGraph
+from graph_store import GraphStore
+from reference import dijkstra, path_weights
+
+# the budget binds on most pairs of GRID; every path of TINY_GRID can be listed
+GRID = {"width": 12, "height": 12, "seed": 7}
+TINY_GRID = {"width": 4, "height": 4, "seed": 5, "diagonal": 0.3}
+
+
+@pytest.fixture(scope="session")
+def grid_folder(tmp_path_factory):
+    folder = tmp_path_factory.mktemp("grid")
+    write_json(RoadGrid(**GRID), folder)
+    return folder
+
+
+@pytest.fixture(scope="session")
+def store(grid_folder):
+    return GraphStore.get(grid_folder)
+
+
+@pytest.fixture(scope="session")
+def compiled(grid_folder):
+    return CompiledGraph.from_json(grid_folder)
+
+
+@pytest.fixture(scope="session")
+def tiny_store(tmp_path_factory):
+    folder = tmp_path_factory.mktemp("tiny")
+    write_json(RoadGrid(**TINY_GRID), folder)
+    return GraphStore.get(folder)
+
+
+"""
+queries
+- (s, d, energy_budget) with budgets around the least energy of the pair: below it
+  (no path), exactly it, and between it and the energy of the shortest path (binding)
+"""
+@pytest.fixture(scope="session")
+def queries(store):
+    rng = random.Random(11)
+    labels = sorted(store.G)
+    result = []
+    while len(result) < 48:
+        s, d = rng.sample(labels, 2)
+        least_energy = dijkstra(store, s, d, weight="energy")
+        if least_energy is None:
+            continue
+        shortest = dijkstra(store, s, d)
+        energy_of_shortest = path_weights(store, shortest[1])[1]
+        for energy_budget in (least_energy[0] * 0.98, least_energy[0],
+                              (least_energy[0] + energy_of_shortest) / 2):
+            result.append((s, d, energy_budget))
+    return result
+
+
+"""
+binding_query
+- the first (s, d, energy_budget) of queries whose shortest path is over the budget
+  although a path within it exists
+"""
+@pytest.fixture(scope="session")
+def binding_query(compiled, queries):
+    from task2 import find_path
+    for s, d, energy_budget in queries[2::3]:
+        if find_path(compiled, s, d, energy_budget=None).energy > energy_budget:
+            return s, d, energy_budget
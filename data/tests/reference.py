@@ -0,0 +1,117 @@
+"""
+Reference answers for the tests, computed straight from the json data without any
+of the engines under test
+"""
+from heapq import heappush, heappop
+
+import itertools
+
+import pytest
+
+
+"""
+dijkstra
+- reference Dijkstra on the json data of store, written for the tests
+- weight: "distance" or "energy"
+- output:
+    - (total weight, nodes) of the lightest path from s to d, None if there is none
+"""
+def dijkstra(store, s, d, weight="distance"):
+
+    weights = store.Dist if weight == "distance" else store.Cost
+    costs = {s: 0}
+    predecessors = {s: None}
+    visited = set()
+    queue = [(0, s)]
+
+    while queue:
+        cost, u = heappop(queue)
+        if u in visited:
+            continue
+        visited.add(u)
+        if u == d:
+            nodes = [d]
+            while predecessors[nodes[-1]] is not None:
+                nodes.append(predecessors[nodes[-1]])
+            return cost, nodes[::-1]
+        for v in store.G.get(u, ()):
+            new_cost = cost + weights[f"{u},{v}"]
+            if v not in costs or new_cost < costs[v]:
+                costs[v] = new_cost
+                predecessors[v] = u
+                heappush(queue, (new_cost, v))
+
+    return None
+
+
+"""
+simple_paths
+- every simple path from s to d of a small graph, as (distance, energy, nodes)
+"""
+def simple_paths(store, s, d):
+
+    paths = []
+    nodes = [s]
+
+    def extend(u):
+        if u == d:
+            distance, energy = path_weights(store, nodes)
+            paths.append((distance, energy, list(nodes)))
+            return
+        for v in store.G.get(u, ()):
+            if v not in nodes:
+                nodes.append(v)
+                extend(v)
+                nodes.pop()
+
+    extend(s)
+    return paths
+
+
+"""
+shortest_within
+- distance of the shortest of paths (see simple_paths) using at most energy_budget,
+  None if none does
+"""
+def shortest_within(paths, energy_budget):
+    distances = [distance for distance, energy, _ in paths if energy <= energy_budget]
+    return min(distances) if distances else None
+
+
+"""
+budgets
+- budgets below, at and between the energies of paths (see simple_paths)
+"""
+def budgets(paths):
+    energies = sorted({energy for _, energy, _ in paths})
+    return [energies[0] - 1] + energies + [(a + b) / 2 for a, b in zip(energies, energies[1:])]
+
+
+"""
+pairs
+- every fifth (s, d) pair of a small graph with a path from s to d
+"""
+def pairs(store):
+    labels = sorted(store.G, key=int)
+    return [(s, d) for s, d in itertools.permutations(labels, 2) if simple_paths(store, s, d)][::5]
+
+
+def path_weights(store, nodes):
+    edges = list(zip(nodes, nodes[1:]))
+    return (sum(store.Dist[f"{u},{v}"] for u, v in edges),
+            sum(store.Cost[f"{u},{v}"] for u, v in edges))
+
+
+"""
+check_path
+- asserts that path (a PathInfo) is a path of store from s to d whose distance and
+  energy are those of its edges
+"""
+def check_path(store, path, s, d):
+
+    assert path.nodes[0] == s and path.nodes[-1] == d
+    for u, v in zip(path.nodes, path.nodes[1:]):
+        assert v in store.G[u], "{0} -> {1} is not an edge".format(u, v)
+    distance, energy = path_weights(store, path.nodes)
+    assert path.distance == pytest.approx(distance)
+    assert path.energy == pytest.approx(energy)
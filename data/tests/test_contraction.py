@@ -0,0 +1,34 @@
+"""
+Contraction hierarchy queries against the reference Dijkstra
+"""
+import pytest
+
+from contraction import ContractionHierarchy, build_contraction_hierarchy
+from reference import dijkstra, check_path
+
+
+@pytest.fixture(scope="module")
+def hierarchy(compiled):
+    return build_contraction_hierarchy(compiled)
+
+
+def test_contraction_hierarchy(store, queries, hierarchy, tmp_path):
+
+    loaded = ContractionHierarchy.load(hierarchy.save(tmp_path / "ch.npz"))
+    for s, d, _ in queries[::3]:
+        distance, _ = dijkstra(store, s, d)
+        for ch in (hierarchy, loaded):
+            path = ch.query(s, d)
+            # the shortcuts are unpacked into the original edges
+            check_path(store, path, s, d)
+            assert path.distance == pytest.approx(distance)
+
+
+def test_every_pair_from_one_node(store, hierarchy):
+
+    s = sorted(store.G)[0]
+    for d in store.G:
+        reference = dijkstra(store, s, d)
+        if d == s or reference is None:
+            continue
+        assert hierarchy.query(s, d).distance == pytest.approx(reference[0])
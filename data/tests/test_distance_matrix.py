@@ -0,0 +1,21 @@
+"""
+Many-to-many distance matrices against the reference Dijkstra
+"""
+from contraction import build_contraction_hierarchy
+from distance_matrix import distance_matrix
+from reference import dijkstra
+
+
+def test_distance_matrix(store, compiled):
+
+    labels = sorted(store.G)[:12]
+    hierarchy = build_contraction_hierarchy(compiled)
+    for distances, energies in (distance_matrix(compiled, labels, labels, workers=1),
+                                distance_matrix(compiled, labels, labels, hierarchy=hierarchy)):
+        for i, s in enumerate(labels):
+            for j, d in enumerate(labels):
+                reference = dijkstra(store, s, d)
+                assert distances[i, j] == (reference[0] if reference else float("inf"))
+                # the energy of a shortest path, so at least the least energy
+                least_energy = dijkstra(store, s, d, weight="energy")
+                assert energies[i, j] >= (least_energy[0] if least_energy else float("inf"))
@@ -0,0 +1,118 @@
+"""
+The least energy bounds of energy_bounds.py against the reference Dijkstra on the
+energies
+"""
+import pytest
+
+from energy_bounds import (
+    BoundsCache, incoming_edges, least_energy_arcs, least_energy_nodes, least_energy_to,
+    least_energy_to_label, lower_bounds,
+)
+from search_state import UNREACHED, NO_ARC
+from task2 import find_path, NoPathError
+from reference import dijkstra, path_weights
+
+
+def targets(store):
+    return sorted(store.G, key=int)[::29]
+
+
+def least_energy(store, v, d):
+    reference = dijkstra(store, v, d, weight="energy")
+    return UNREACHED if reference is None else reference[0]
+
+
+def test_least_energy_to(store, compiled):
+
+    for d in targets(store):
+        bounds = least_energy_to(compiled, compiled.node_id(d))
+        for v in store.G:
+            assert bounds.to_go[compiled.node_id(v)] == least_energy(store, v, d), (v, d)
+
+
+def test_least_energy_to_label(store):
+
+    for d in targets(store):
+        bounds = least_energy_to_label(store.G, d, store.energy_func)
+        for v in store.G:
+            assert bounds.to_go[v] == least_energy(store, v, d), (v, d)
+
+
+def test_next_hops_follow_least_energy_paths(store, compiled):
+
+    for d in targets(store):
+        d_id = compiled.node_id(d)
+        bounds = least_energy_to(compiled, d_id)
+        label_bounds = least_energy_to_label(store.G, d, store.energy_func)
+        assert bounds.next_hops[d_id] == NO_ARC
+        for v in store.G:
+            v_id = compiled.node_id(v)
+            if v == d or bounds.to_go[v_id] == UNREACHED:
+                continue
+            arcs = least_energy_arcs(compiled, bounds, v_id)
+            assert compiled.energy[arcs].sum() == bounds.to_go[v_id]
+            nodes = least_energy_nodes(label_bounds, v)
+            assert nodes[0] == v and nodes[-1] == d
+            assert path_weights(store, nodes)[1] == label_bounds.to_go[v]
+
+
+def test_radius_leaves_farther_nodes_unreached(store, compiled):
+
+    d = targets(store)[1]
+    full = least_energy_to_label(store.G, d, store.energy_func)
+    radius = sorted(full.to_go.values())[len(full.to_go) // 3]
+
+    bounds = least_energy_to(compiled, compiled.node_id(d), radius)
+    label_bounds = least_energy_to_label(store.G, d, store.energy_func, radius)
+    for v in store.G:
+        expected = full.to_go[v] if full.to_go[v] <= radius else UNREACHED
+        assert bounds.to_go[compiled.node_id(v)] == expected
+        assert label_bounds.to_go[v] == expected
+
+
+def test_bounds_cache(store, compiled):
+
+    cache = BoundsCache(compiled, size=2)
+    d = compiled.node_id(targets(store)[0])
+
+    small = cache.get(d, 1000)
+    # a larger radius is computed again, a smaller one reuses it
+    large = cache.get(d, 5000)
+    assert large is not small
+    assert cache.get(d, 2000) is large
+    assert cache.get(d) is not large
+    assert cache.get(d, 5000) is cache.get(d)
+    assert (cache.hits, cache.misses) == (3, 3)
+
+    for other in targets(store)[1:3]:
+        cache.get(compiled.node_id(other))
+    assert d not in cache.entries and len(cache.entries) == 2
+
+    assert lower_bounds(compiled, d, None) is None
+    assert lower_bounds(compiled, d, 1000).radius == 1000
+
+
+def test_incoming_edges(store):
+
+    incoming = incoming_edges(store.G)
+    for u, neighbors in store.G.items():
+        for v in neighbors:
+            assert u in incoming[v]
+    assert sum(map(len, incoming.values())) == sum(map(len, store.G.values()))
+
+
+def test_graph_changed_between_queries():
+
+    G = {"a": ["b"], "b": ["c"], "c": []}
+    distances = {("a", "b"): 10, ("b", "c"): 10, ("a", "c"): 30}
+    energies = {("a", "b"): 10, ("b", "c"): 10, ("a", "c"): 1}
+    distance_func = lambda u, v: distances[u, v]
+    energy_func = lambda u, v: energies[u, v]
+
+    with pytest.raises(NoPathError):
+        find_path(G, "a", "c", distance_func, energy_func, energy_budget=15)
+
+    # the bounds of the next query see the new, longer but cheaper edge
+    G["a"].append("c")
+    path = find_path(G, "a", "c", distance_func, energy_func, energy_budget=15)
+    assert path.nodes == ["a", "c"]
@@ -0,0 +1,150 @@
+"""
+Every engine of find_path / find_path_astar against the reference Dijkstra without a
+budget, and against the exact label setting engine with a budget
+"""
+import math
+
+import pytest
+
+from task3 import *
+from compiled_graph import as_compiled
+from label_setting import pareto_frontier
+from reference import dijkstra, check_path
+
+
+def straight_line(store):
+    def heuristic(alpha, v, d):
+        return alpha * math.dist(store.Coord[v], store.Coord[d])
+    return heuristic
+
+
+"""
+ENGINES
+- name -> function(store, compiled, s, d, energy_budget) returning a PathInfo
+"""
+ENGINES = {
+    "rerun": lambda store, compiled, s, d, energy_budget: find_path(
+        store.G, s, d, store.distance_func, store.energy_func, energy_budget=energy_budget),
+    "rerun_compiled": lambda store, compiled, s, d, energy_budget: find_path(
+        compiled, s, d, energy_budget=energy_budget),
+    "rerun_binary_queue": lambda store, compiled, s, d, energy_budget: find_path(
+        compiled, s, d, energy_budget=energy_budget, queue="binary"),
+    "astar": lambda store, compiled, s, d, energy_budget: find_path_astar(
+        store.G, s, d, store.distance_func, store.energy_func, straight_line(store),
+        energy_budget=energy_budget),
+    "astar_table": lambda store, compiled, s, d, energy_budget: find_path_astar(
+        store.G, s, d, store.distance_func, store.energy_func,
+        StraightLineHeuristic(store.Coord), energy_budget=energy_budget),
+    "astar_compiled": lambda store, compiled, s, d, energy_budget: find_path_astar(
+        compiled, s, d, energy_budget=energy_budget),
+    "bidirectional": lambda store, compiled, s, d, energy_budget: find_path(
+        compiled, s, d, energy_budget=energy_budget, direction="bidirectional"),
+    "bidirectional_astar": lambda store, compiled, s, d, energy_budget: find_path_astar(
+        compiled, s, d, heuristic_func=straight_line(store), energy_budget=energy_budget,
+        direction="bidirectional"),
+    "larac": lambda store, compiled, s, d, energy_budget: find_path(
+        compiled, s, d, energy_budget=energy_budget, engine="larac"),
+    "larac_dict": lambda store, compiled, s, d, energy_budget: find_path(
+        store.G, s, d, store.distance_func, store.energy_func, energy_budget=energy_budget,
+        engine="larac"),
+    "label": lambda store, compiled, s, d, energy_budget: find_path(
+        compiled, s, d, energy_budget=energy_budget, engine="label"),
+    "pareto": lambda store, compiled, s, d, energy_budget: pareto_frontier(
+        compiled, s, d).best_for(energy_budget),
+}
+EXACT_ENGINES = ("label", "pareto")
+
+
+def answer(engine, store, compiled, s, d, energy_budget):
+    try:
+        return engine(store, compiled, s, d, energy_budget)
+    except NoPathError:
+        return None
+
+
+@pytest.mark.parametrize("name", sorted(ENGINES))
+def test_shortest_path_without_budget(name, store, compiled, queries):
+
+    for s, d, _ in queries[::3]:
+        distance, _ = dijkstra(store, s, d)
+        path = ENGINES[name](store, compiled, s, d, None)
+        check_path(store, path, s, d)
+        assert path.distance == pytest.approx(distance)
+
+
+@pytest.mark.parametrize("name", sorted(ENGINES))
+def test_budget_against_label_engine(name, store, compiled, queries):
+
+    for s, d, energy_budget in queries:
+        exact = answer(ENGINES["label"], store, compiled, s, d, energy_budget)
+        path = answer(ENGINES[name], store, compiled, s, d, energy_budget)
+
+        # every engine finds a path within the budget whenever there is one
+        assert (path is None) == (exact is None), (s, d, energy_budget)
+        if path is None:
+            continue
+        check_path(store, path, s, d)
+        assert path.energy <= energy_budget
+        if name in EXACT_ENGINES:
+            assert path.distance == pytest.approx(exact.distance)
+        else:
+            assert path.distance >= exact.distance - 1e-6
+
+
+def test_budget_binds_on_the_queries(store, compiled, queries):
+
+    # otherwise the test above would not exercise the pruned searches
+    binding = 0
+    for s, d, energy_budget in queries:
+        if find_path(compiled, s, d, energy_budget=None).energy > energy_budget:
+            binding += 1
+    assert binding >= len(queries) // 2
+
+
+def test_larac_bounds(store, compiled, queries):
+
+    for s, d, energy_budget in queries:
+        exact = answer(ENGINES["label"], store, compiled, s, d, energy_budget)
+        if exact is None:
+            continue
+        path = find_path(compiled, s, d, energy_budget=energy_budget, engine="larac")
+        assert path.lower_bound <= exact.distance + 1e-6 <= path.distance + 2e-6
+        assert path.gap == pytest.approx((path.distance - path.lower_bound) / path.distance)
+        assert path.gap >= 0
+
+
+def test_radix_queue_is_used_for_integral_weights(compiled, queries):
+
+    s, d, energy_budget = queries[2]
+    assert compiled.integral_weights
+    assert find_path(compiled, s, d, energy_budget=energy_budget).stats["queue"] == "radix"
+    assert find_path(compiled, s, d, energy_budget=energy_budget, queue="binary").stats["queue"] == "binary"
+    with pytest.raises(ValueError):
+        find_path(compiled, s, d, heuristic_func=lambda v: 0, queue="radix")
+
+
+def test_compiled_graph_only_engines(store, queries):
+
+    s, d, energy_budget = queries[0]
+    for options in ({"engine": "label"}, {"engine": "incremental"}, {"direction": "bidirectional"}):
+        with pytest.raises(ValueError, match="CompiledGraph"):
+            find_path(store.G, s, d, store.distance_func, store.energy_func,
+                      energy_budget=energy_budget, **options)
+    with pytest.raises(ValueError, match="CompiledGraph"):
+        pareto_frontier(store.G, s, d)
+
+    # compiled once by the caller, then reused
+    compiled = as_compiled(store.G, store.distance_func, store.energy_func)
+    assert find_path(compiled, s, d, energy_budget=None, engine="label").distance == \
+        find_path(store.G, s, d, store.distance_func, store.energy_func, energy_budget=None).distance
+
+
+def test_compiled_graph_matches_the_json(store, compiled):
+
+    assert compiled.num_nodes == len(store.G)
+    assert compiled.num_arcs == sum(map(len, store.G.values()))
+    for u, neighbors in store.G.items():
+        for v in neighbors:
+            arc = compiled.arc(compiled.node_id(u), compiled.node_id(v))
+            assert compiled.dist[arc] == store.Dist[f"{u},{v}"]
+            assert compiled.energy[arc] == store.Cost[f"{u},{v}"]
@@ -0,0 +1,57 @@
+"""
+The binary cache of graph_cache.py: round trip of a CompiledGraph and rebuilds when
+the json files change
+"""
+import json
+import os
+import shutil
+
+import numpy as np
+
+from graph_cache import cache_is_current, load_graph_cache, write_graph_cache
+
+ARRAYS = ("offsets", "targets", "tails", "dist", "energy", "coords")
+
+
+def assert_same_graph(graph, expected):
+    assert list(graph.labels) == list(expected.labels)
+    for name in ARRAYS:
+        assert np.array_equal(getattr(graph, name), getattr(expected, name)), name
+
+
+def test_round_trip(compiled, tmp_path):
+
+    write_graph_cache(compiled, tmp_path / "cache")
+    graph = load_graph_cache(tmp_path / "cache")
+    assert_same_graph(graph, compiled)
+    assert graph.cache_folder == tmp_path / "cache"
+    assert isinstance(graph.dist, np.memmap)
+
+
+def test_cache_is_rebuilt_when_the_json_changes(grid_folder, compiled, tmp_path):
+
+    folder = tmp_path / "json"
+    shutil.copytree(grid_folder, folder)
+    cache = tmp_path / "cache"
+
+    graph = load_graph_cache(cache, folder)
+    assert_same_graph(graph, compiled)
+    assert cache_is_current(cache, folder)
+
+    # touched but unchanged: still current
+    os.utime(folder / "Dist.json")
+    assert cache_is_current(cache, folder)
+
+    with open(folder / "Dist.json") as f:
+        dist = json.load(f)
+    key = next(iter(dist))
+    dist[key] += 1
+    with open(folder / "Dist.json", "w") as f:
+        json.dump(dist, f)
+    assert not cache_is_current(cache, folder)
+
+    rebuilt = load_graph_cache(cache, folder)
+    assert cache_is_current(cache, folder)
+    u, v = key.split(",")
+    arc = rebuilt.arc(rebuilt.node_id(u), rebuilt.node_id(v))
+    assert rebuilt.dist[arc] == graph.dist[arc] + 1
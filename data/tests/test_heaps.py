@@ -0,0 +1,94 @@
+"""
+RadixHeap and IndexedHeap against a sorted list, on the push / decrease / pop pattern
+of Dijkstra's algorithm
+"""
+import random
+
+import pytest
+
+from indexed_heap import IndexedHeap
+from radix_heap import RadixHeap
+
+
+"""
+dijkstra_like
+- random operations in which no pushed priority is below the last popped one
+- output:
+    - the (priority, key) pairs popped by heap, and the ones a sorted list pops
+"""
+def dijkstra_like(heap, seed, operations=3000, keys=300):
+
+    rng = random.Random(seed)
+    expected = {}                 # key -> queued priority
+    popped, reference = [], []
+    last = 0
+
+    for _ in range(operations):
+        if expected and rng.random() < 0.4:
+            pair = heap.pop()
+            popped.append(pair)
+            priority, key = min((priority, key) for key, priority in expected.items())
+            reference.append((priority, key))
+            del expected[key]
+            last = priority
+        else:
+            key = rng.randrange(keys)
+            priority = last + rng.choice((0, 1, 2, 7, 100, 1 << rng.randrange(40)))
+            heap.push(key, priority)
+            if key not in expected or priority < expected[key]:
+                expected[key] = priority
+
+    while expected:
+        popped.append(heap.pop())
+        priority, key = min((priority, key) for key, priority in expected.items())
+        reference.append((priority, key))
+        del expected[key]
+
+    return popped, reference
+
+
+@pytest.mark.parametrize("Heap", (RadixHeap, IndexedHeap))
+@pytest.mark.parametrize("seed", range(5))
+def test_pops_in_priority_order(Heap, seed):
+
+    popped, reference = dijkstra_like(Heap(), seed)
+    assert popped == reference
+
+
+def test_radix_heap_is_monotone():
+
+    heap = RadixHeap()
+    heap.push("a", 5)
+    heap.push("b", 9)
+    assert heap.pop() == (5, "a")
+    with pytest.raises(ValueError):
+        heap.push("c", 4)
+    # a priority equal to the last popped one is allowed
+    heap.push("c", 5)
+    assert heap.pop() == (5, "c")
+    assert heap.pop() == (9, "b")
+    assert not heap
+    with pytest.raises(IndexError):
+        heap.pop()
+
+
+@pytest.mark.parametrize("Heap", (RadixHeap, IndexedHeap))
+def test_counters(Heap):
+
+    heap = Heap()
+    heap.push(1, 10)
+    heap.push(2, 20)
+    heap.push(2, 15)              # decrease-key
+    heap.push(2, 30)              # not lower, ignored
+    heap.pop()
+    heap.pop()
+    assert (heap.pushes, heap.decreases, heap.pops, heap.peak) == (2, 1, 2, 2)
+
+
+@pytest.mark.parametrize("Heap", (RadixHeap, IndexedHeap))
+def test_pop_from_an_empty_heap(Heap):
+
+    heap = Heap()
+    assert not heap
+    with pytest.raises(IndexError):
+        heap.pop()
@@ -0,0 +1,105 @@
+"""
+The incremental engine against the edge-removal loop run from scratch on the json data
+"""
+from heapq import heappush, heappop
+
+import math
+
+import pytest
+
+from task3 import *
+from reference import check_path, path_weights
+
+
+"""
+removal_loop
+- the budget loop of the original task 2: while the shortest path is over the budget,
+  delete its most energy intensive edge (the one closest to d on ties) and search again
+- output:
+    - (distance, number of edges removed), None if d becomes unreachable
+"""
+def removal_loop(store, s, d, energy_budget):
+
+    removed = set()
+    while True:
+        costs, visited, queue = {s: 0}, set(), [(0, s)]
+        predecessors = {s: None}
+        while queue:
+            cost, u = heappop(queue)
+            if u in visited:
+                continue
+            visited.add(u)
+            if u == d:
+                break
+            for v in store.G[u]:
+                new_cost = cost + store.Dist[f"{u},{v}"]
+                if (u, v) not in removed and (v not in costs or new_cost < costs[v]):
+                    costs[v] = new_cost
+                    predecessors[v] = u
+                    heappush(queue, (new_cost, v))
+        if d not in visited:
+            return None
+
+        nodes = [d]
+        while predecessors[nodes[-1]] is not None:
+            nodes.append(predecessors[nodes[-1]])
+        nodes.reverse()
+        distance, energy = path_weights(store, nodes)
+        if energy <= energy_budget:
+            return distance, len(removed)
+
+        edges = list(zip(nodes, nodes[1:]))[::-1]
+        removed.add(max(edges, key=lambda edge: store.Cost["{0},{1}".format(*edge)]))
+
+
+def test_incremental_against_the_removal_loop(store, compiled, queries):
+
+    repairs = 0
+    for s, d, energy_budget in queries:
+        try:
+            least_energy = find_path(compiled, s, d, energy_budget=energy_budget, engine="label")
+        except NoPathError:
+            # raised right away, without removing edges
+            with pytest.raises(NoPathError):
+                find_path(compiled, s, d, energy_budget=energy_budget, engine="incremental")
+            continue
+
+        expected = removal_loop(store, s, d, energy_budget)
+        try:
+            path = find_path(compiled, s, d, energy_budget=energy_budget, engine="incremental")
+        except NoPathError:
+            assert expected is None
+            continue
+        check_path(store, path, s, d)
+        assert path.energy <= energy_budget
+        assert path.distance >= least_energy.distance
+        assert (path.distance, len(path.stats["expanded"]) - 1) == expected
+
+        # a repair re-expands only part of a full search
+        first, *repaired = path.stats["expanded"]
+        assert all(count <= first for count in repaired)
+        repairs += len(repaired)
+    assert repairs > 0
+
+
+def test_incremental_astar(store, compiled, queries):
+
+    def straight_line(alpha, v, d):
+        return alpha * math.dist(store.Coord[v], store.Coord[d])
+
+    for s, d, energy_budget in queries[2::3]:
+        try:
+            expected = find_path(compiled, s, d, energy_budget=energy_budget, engine="incremental")
+        except NoPathError:
+            continue
+        path = find_path_astar(compiled, s, d, heuristic_func=straight_line,
+                               energy_budget=energy_budget, engine="incremental")
+        assert path.distance == expected.distance
+
+
+def test_incremental_rejects_options(compiled):
+
+    with pytest.raises(ValueError):
+        find_path(compiled, "1", "2", engine="incremental", queue="binary")
+    with pytest.raises(ValueError):
+        find_path_astar(compiled, "1", "2", engine="incremental", instrument=True)
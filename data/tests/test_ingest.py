@@ -0,0 +1,118 @@
+"""
+The streaming converters of ingest.py against CompiledGraph.from_json
+"""
+from functools import partial
+
+import json
+
+import numpy as np
+import pytest
+
+from graph_cache import load_graph_cache
+import ingest
+from ingest import ingest_dimacs, ingest_json, iter_json_object
+
+ARRAYS = ("offsets", "targets", "tails", "dist", "energy", "coords")
+
+
+def assert_same_graph(graph, expected):
+    assert list(graph.labels) == list(expected.labels)
+    for name in ARRAYS:
+        assert np.array_equal(getattr(graph, name), getattr(expected, name)), name
+
+
+"""
+write_dimacs
+- writes graph as a distance .gr, an energy .gr and a .co file, numbering node id i as
+  i + 1
+- output:
+    - the three paths
+"""
+def write_dimacs(graph, folder, shuffle=None):
+
+    arcs = list(range(graph.num_arcs))
+    if shuffle is not None:
+        shuffle(arcs)
+    paths = []
+    for name, weights in (("dist", graph.dist), ("energy", graph.energy)):
+        path = folder / f"{name}.gr"
+        with open(path, "w") as f:
+            f.write("c {0} of a test grid\n".format(name))
+            f.write("p sp {0} {1}\n".format(graph.num_nodes, graph.num_arcs))
+            for arc in arcs:
+                f.write("a {0} {1} {2}\n".format(
+                    graph.tails[arc] + 1, graph.targets[arc] + 1, weights[arc]))
+        paths.append(path)
+
+    path = folder / "coords.co"
+    with open(path, "w") as f:
+        f.write("p aux sp co {0}\n".format(graph.num_nodes))
+        for v, (x, y) in enumerate(graph.coords):
+            f.write("v {0} {1} {2}\n".format(v + 1, int(x), int(y)))
+    paths.append(path)
+
+    return paths
+
+
+def test_iter_json_object(grid_folder):
+
+    with open(grid_folder / "Dist.json") as f:
+        expected = json.load(f)
+    assert dict(iter_json_object(grid_folder / "Dist.json", chunk_size=64)) == expected
+
+
+def test_iter_json_object_rejects_other_json(tmp_path):
+
+    for text in ('["a", "b"]', '{"a": 1 "b": 2}', '{"a" 1}'):
+        (tmp_path / "bad.json").write_text(text)
+        with pytest.raises(ValueError):
+            list(iter_json_object(tmp_path / "bad.json"))
+
+
+def test_ingest_json_matches_from_json(grid_folder, compiled, tmp_path):
+
+    report = ingest_json(grid_folder, tmp_path / "cache")
+    assert (report.num_nodes, report.num_arcs) == (compiled.num_nodes, compiled.num_arcs)
+    assert_same_graph(load_graph_cache(tmp_path / "cache"), compiled)
+
+
+def test_ingest_dimacs_matches_from_json(compiled, tmp_path):
+
+    dist_path, energy_path, coord_path = write_dimacs(compiled, tmp_path)
+    report = ingest_dimacs(dist_path, energy_path, tmp_path / "cache", coord_path)
+    assert (report.num_nodes, report.num_arcs) == (compiled.num_nodes, compiled.num_arcs)
+
+    graph = load_graph_cache(tmp_path / "cache")
+    assert list(graph.labels) == [str(v + 1) for v in range(compiled.num_nodes)]
+    for name in ARRAYS:
+        assert np.array_equal(getattr(graph, name), getattr(compiled, name)), name
+
+
+def test_ingest_dimacs_keeps_the_file_order_per_node(compiled, tmp_path, monkeypatch):
+
+    # arcs in any order, over several chunks: the arcs of every node keep their order
+    monkeypatch.setattr(ingest, "read_dimacs", partial(ingest.read_dimacs, rows=50))
+    rng = np.random.default_rng(3)
+    dist_path, energy_path, _ = write_dimacs(compiled, tmp_path, shuffle=rng.shuffle)
+    ingest_dimacs(dist_path, energy_path, tmp_path / "cache")
+    graph = load_graph_cache(tmp_path / "cache")
+
+    rows = np.loadtxt(dist_path, dtype=np.int64, comments=("c", "p"), usecols=(1, 2, 3))
+    assert np.array_equal(graph.offsets, compiled.offsets)
+    for u in range(compiled.num_nodes):
+        mine = rows[rows[:, 0] == u + 1]
+        arcs = range(graph.offsets[u], graph.offsets[u + 1])
+        assert [(graph.targets[arc] + 1, graph.dist[arc]) for arc in arcs] == \
+            [(v, w) for _, v, w in mine]
+
+
+def test_ingest_dimacs_rejects_mismatched_files(compiled, tmp_path):
+
+    dist_path, energy_path, _ = write_dimacs(compiled, tmp_path)
+    lines = energy_path.read_text().splitlines()
+    # swap two arcs of the energy file
+    lines[-1], lines[-2] = lines[-2], lines[-1]
+    energy_path.write_text("\n".join(lines) + "\n")
+    with pytest.raises(ValueError):
+        ingest_dimacs(dist_path, energy_path, tmp_path / "cache")
+    assert not (tmp_path / "cache").exists()
@@ -0,0 +1,77 @@
+"""
+The search counters and hooks of instrumentation.py, and the arguments of find_path /
+find_path_astar that would leave them unused
+"""
+import pytest
+
+from instrumentation import add_hook, remove_hook
+from task3 import *
+
+
+@pytest.mark.parametrize("options", (
+    {"direction": "bidirectional", "instrument": True},
+    {"engine": "label", "instrument": True},
+    {"engine": "larac", "instrument": True},
+    {"direction": "bidirectional", "queue": "binary"},
+    {"direction": "sideways"},
+    {"engine": "fastest"},
+))
+def test_find_path_rejects_ignored_options(options, compiled):
+
+    with pytest.raises(ValueError):
+        find_path(compiled, "1", "2", **options)
+
+
+def test_engine_options_on_an_adjacency_list(store):
+
+    with pytest.raises(ValueError):
+        find_path(store.G, "1", "2", store.distance_func, store.energy_func, queue="binary")
+    # the larac engine takes its options on either graph
+    path = find_path(store.G, "1", "2", store.distance_func, store.energy_func,
+                     engine="larac", max_gap=0.5)
+    assert path.nodes[0] == "1"
+
+
+@pytest.mark.parametrize("options", (
+    {"direction": "bidirectional", "instrument": True},
+    {"engine": "label"},
+    {"direction": "sideways"},
+))
+def test_find_path_astar_rejects_ignored_options(options, compiled):
+
+    with pytest.raises(ValueError):
+        find_path_astar(compiled, "1", "2", **options)
+
+
+@pytest.mark.parametrize("search", (find_path, find_path_astar))
+def test_instrument_counts_the_searches(search, store, compiled, binding_query):
+
+    s, d, energy_budget = binding_query
+    # A* needs a heuristic on an adjacency list; a null one leaves the searches unchanged
+    heuristic = {"heuristic_func": lambda alpha, v, d: 0} if search is find_path_astar else {}
+    for graph, funcs in ((compiled, {}),
+                         (store.G, dict(cost_func=store.distance_func, energy_func=store.energy_func,
+                                        **heuristic))):
+        path = search(graph, s, d, energy_budget=energy_budget, instrument=True, **funcs)
+        # the shortest path is over the budget: one more, pruned search
+        assert path.stats["iterations"] == 2
+        assert path.stats["popped"] > 0
+
+        path = search(graph, s, d, energy_budget=None, instrument=True, **funcs)
+        assert path.stats["iterations"] == 1
+
+    assert "iterations" not in find_path(compiled, s, d, energy_budget=energy_budget).stats
+
+
+def test_hooks_receive_the_stats(compiled, binding_query):
+
+    received = []
+    callback = lambda name, stats: received.append((name, stats["iterations"]))
+    s, d, energy_budget = binding_query
+    add_hook(callback)
+    try:
+        find_path(compiled, s, d, energy_budget=energy_budget)
+        find_path_astar(compiled, s, d, energy_budget=None)
+    finally:
+        remove_hook(callback)
+    assert received == [("find_path", 2), ("find_path_astar", 1)]
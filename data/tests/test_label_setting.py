@@ -0,0 +1,71 @@
+"""
+The exact engines (label setting, pareto_frontier) against every path of a tiny graph
+"""
+import pytest
+
+from task2 import find_path, NoPathError
+from label_setting import find_path_label_setting, pareto_frontier
+from compiled_graph import CompiledGraph
+from reference import simple_paths, budgets, pairs, shortest_within
+
+
+def test_label_engine_against_every_path(tiny_store):
+
+    compiled = CompiledGraph.from_dicts(tiny_store.G, tiny_store.Dist, tiny_store.Cost)
+    for s, d in pairs(tiny_store):
+        paths = simple_paths(tiny_store, s, d)
+        for energy_budget in budgets(paths):
+            expected = shortest_within(paths, energy_budget)
+            try:
+                path = find_path(compiled, s, d, energy_budget=energy_budget, engine="label")
+            except NoPathError:
+                path = None
+            assert (path is None) == (expected is None), (s, d, energy_budget)
+            if path is not None:
+                assert path.distance == expected
+                assert path.energy <= energy_budget
+
+
+def test_pareto_frontier_against_every_path(tiny_store):
+
+    compiled = CompiledGraph.from_dicts(tiny_store.G, tiny_store.Dist, tiny_store.Cost)
+    for s, d in pairs(tiny_store):
+        paths = simple_paths(tiny_store, s, d)
+        frontier = pareto_frontier(compiled, s, d)
+
+        # by increasing distance and strictly decreasing energy
+        assert frontier.distances == sorted(frontier.distances)
+        assert all(a > b for a, b in zip(frontier.energies, frontier.energies[1:]))
+
+        # exactly the paths no other path beats on both distance and energy
+        non_dominated = {
+            (distance, energy) for distance, energy, _ in paths
+            if not any(other_distance <= distance and other_energy <= energy
+                       and (other_distance, other_energy) != (distance, energy)
+                       for other_distance, other_energy, _ in paths)
+        }
+        assert set(zip(frontier.distances, frontier.energies)) == non_dominated
+
+        for path, distance, energy in zip(frontier, frontier.distances, frontier.energies):
+            assert (path.distance, path.energy) == (distance, energy)
+
+        # the same frontier cut at a budget
+        for energy_budget in budgets(paths):
+            cut = pareto_frontier(compiled, s, d, max_budget=energy_budget)
+            assert cut.distances == [
+                distance for distance, energy in zip(frontier.distances, frontier.energies)
+                if energy <= energy_budget]
+
+
+def test_budget_that_does_not_bind(store, compiled, queries):
+
+    # answered by the plain Dijkstra run before any label search
+    for s, d, _ in queries[::3]:
+        shortest = find_path(compiled, s, d, energy_budget=None)
+        for energy_budget in (None, shortest.energy):
+            path = find_path_label_setting(compiled, s, d, energy_budget=energy_budget)
+            assert (path.distance, path.energy) == (shortest.distance, shortest.energy)
+        assert find_path_label_setting(
+            compiled, s, d, energy_budget=None, upper_bound=shortest.distance).distance == shortest.distance
+        with pytest.raises(NoPathError):
+            find_path_label_setting(compiled, s, d, energy_budget=None, upper_bound=shortest.distance - 1)
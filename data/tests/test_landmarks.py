@@ -0,0 +1,63 @@
+"""
+ALT landmarks: exact distances, admissible bounds and the A* searches using them
+"""
+import numpy as np
+import pytest
+
+from task3 import *
+from landmarks import Landmarks, build_landmarks, select_landmarks, shortest_distances
+from reference import dijkstra
+
+
+@pytest.fixture(scope="module")
+def landmarks(compiled):
+    ids = select_landmarks(compiled, 4)
+    return Landmarks(
+        compiled, ids,
+        np.array([shortest_distances(compiled, i) for i in ids]),
+        np.array([shortest_distances(compiled.reverse(), i) for i in ids]),
+    )
+
+
+@pytest.mark.parametrize("method", ("farthest", "avoid"))
+def test_select_landmarks(compiled, method):
+
+    ids = select_landmarks(compiled, 4, method)
+    assert len(set(ids)) == 4
+    assert all(0 <= i < compiled.num_nodes for i in ids)
+    assert select_landmarks(compiled, 4, method) == ids
+
+
+@pytest.mark.parametrize("method", ("farthest", "avoid"))
+def test_build_landmarks(compiled, landmarks, method):
+
+    # the distances kept from the selection are those of a fresh search
+    built = build_landmarks(compiled, 4, method, workers=2)
+    assert built.landmarks == select_landmarks(compiled, 4, method)
+    if method == "farthest":
+        assert built.landmarks == landmarks.landmarks
+    for i, landmark in enumerate(built.landmarks):
+        assert np.array_equal(built.forward[i], shortest_distances(compiled, landmark))
+        assert np.array_equal(built.backward[i], shortest_distances(compiled.reverse(), landmark))
+
+
+def test_alt_heuristic(store, compiled, queries, landmarks):
+
+    for s, d, energy_budget in queries[::3]:
+        distance, _ = dijkstra(store, s, d)
+        path = find_path_astar(compiled, s, d, heuristic_func=landmarks.heuristic(d), energy_budget=None)
+        assert path.distance == pytest.approx(distance)
+        # the lower bounds never overestimate
+        d_id = compiled.node_id(d)
+        for v in (s, d, sorted(store.G)[0]):
+            reference = dijkstra(store, v, d)
+            bound = landmarks.lower_bounds(d_id)[compiled.node_id(v)]
+            assert bound <= (reference[0] if reference else np.inf) + 1e-6
+
+
+def test_save_and_load(compiled, landmarks, tmp_path):
+
+    loaded = Landmarks.load(compiled, landmarks.save(tmp_path / "landmarks"))
+    assert loaded.landmarks == landmarks.landmarks
+    assert np.array_equal(loaded.forward, landmarks.forward)
+    assert np.array_equal(loaded.backward, landmarks.backward)
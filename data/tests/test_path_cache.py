@@ -0,0 +1,41 @@
+"""
+PathCache against the engines it caches and against every path of a tiny graph
+"""
+import pytest
+
+from task2 import find_path, NoPathError
+from path_cache import PathCache
+from reference import simple_paths, budgets, pairs, shortest_within
+
+
+def test_path_cache_answers(tiny_store):
+
+    for engine in ("label", "larac"):
+        cache = PathCache(tiny_store.G, tiny_store.distance_func, tiny_store.energy_func, engine=engine)
+        for s, d in pairs(tiny_store):
+            paths = simple_paths(tiny_store, s, d)
+            # every budget twice, in an order mixing cached intervals and new budgets
+            for energy_budget in budgets(paths)[::-1] * 2:
+                try:
+                    path = cache.find_path(s, d, energy_budget)
+                except NoPathError:
+                    path = None
+                try:
+                    reference = find_path(
+                        cache.graph, s, d, energy_budget=energy_budget, engine=engine)
+                except NoPathError:
+                    reference = None
+                assert (path is None) == (reference is None)
+                if path is not None:
+                    assert path.energy <= energy_budget
+                    if engine == "label":
+                        assert path.distance == shortest_within(paths, energy_budget)
+                    else:
+                        assert path.distance <= reference.distance
+        assert cache.hits > 0
+
+
+def test_path_cache_rejects_inexact_engines(tiny_store):
+
+    with pytest.raises(ValueError):
+        PathCache(tiny_store.G, tiny_store.distance_func, tiny_store.energy_func, engine="rerun")
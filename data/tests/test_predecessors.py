@@ -0,0 +1,33 @@
+"""
+The predecessor dictionaries of the public search helpers and the functions extracting
+paths from them
+"""
+from task3 import *
+
+
+def test_single_source_shortest_paths_returns_dictionaries(store, compiled, queries):
+
+    for s, d, energy_budget in queries[:12]:
+        try:
+            path = find_path(compiled, s, d, energy_budget=energy_budget)
+        except NoPathError:
+            continue
+
+        predecessors = single_source_shortest_paths(
+            store.G, s, d, store.distance_func, store.energy_func, energy_budget=energy_budget)
+        assert isinstance(predecessors, dict)
+        assert predecessors[s] == (None, None, None)
+        assert extract_shortest_path_from_predecessor_list(predecessors, d) == path[:3] + (None,) * 3
+        assert extract_energy_from_predecessor_list(predecessors, d) == path.energy
+        u, v = extract_most_energy_intensive_edge(predecessors, d).split(",")
+        assert store.Cost[f"{u},{v}"] == max(
+            store.Cost[f"{a},{b}"] for a, b in zip(path.nodes, path.nodes[1:]))
+
+        s_id, d_id = compiled.node_id(s), compiled.node_id(d)
+        arcs = single_source_shortest_paths_compiled(compiled, s_id, d_id, energy_budget=energy_budget)
+        assert isinstance(arcs, dict) and arcs[s_id] is None
+        assert extract_path_info_from_predecessor_arcs(compiled, arcs, d_id) == path[:3] + (None,) * 3
+
+        # astar returns the same kind of dictionaries
+        astar_predecessors = astar_compiled(compiled, s_id, d_id, None, 1, energy_budget)
+        assert extract_energy_from_predecessor_arcs(compiled, astar_predecessors, d_id) <= energy_budget
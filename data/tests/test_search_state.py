@@ -0,0 +1,90 @@
+"""
+Workspaces reused from search to search: generation stamps, their overflow and the pools
+"""
+import pytest
+
+from task3 import *
+from search_state import SearchWorkspace, LabelWorkspace, WorkspacePool, workspace_pool
+from reference import check_path
+
+
+def test_reset_forgets_the_previous_search():
+
+    workspace = SearchWorkspace(4)
+    reached, settled = workspace.reset()
+    workspace.stamps[1] = reached
+    workspace.stamps[2] = settled
+    assert workspace.reached(1) and workspace.reached(2) and not workspace.reached(3)
+    assert workspace.settled_nodes().tolist() == [2]
+
+    workspace.reset()
+    assert not any(workspace.reached(v) for v in range(4))
+
+
+def test_stamp_overflow_clears_the_stamps():
+
+    workspace = SearchWorkspace(3)
+    workspace.generation = (1 << 32) - 4
+    reached, settled = workspace.reset()
+    assert settled == (1 << 32) - 1
+    workspace.stamps[0] = settled
+
+    # the next generation would not fit: the stamps start over
+    assert workspace.reset() == (2, 3)
+    assert list(workspace.stamps) == [0, 0, 0]
+    assert not workspace.reached(0)
+
+
+def test_searches_across_the_overflow(store, compiled, queries):
+
+    # one or two resets per query: the stamps overflow after the first few queries
+    workspace = SearchWorkspace(compiled.num_nodes)
+    workspace.generation = (1 << 32) - 12
+    for s, d, energy_budget in queries[:12]:
+        s_id, d_id = compiled.node_id(s), compiled.node_id(d)
+        try:
+            expected = find_path(compiled, s, d, energy_budget=energy_budget, engine="label")
+        except NoPathError:
+            with pytest.raises(NoPathError):
+                shortest_path_search_compiled(
+                    compiled, s_id, d_id, energy_budget=energy_budget, workspace=workspace)
+            continue
+        shortest_path_search_compiled(compiled, s_id, d_id, energy_budget=energy_budget, workspace=workspace)
+        path = path_info_from_arcs(compiled, workspace.path_arcs(compiled.tails, d_id), d_id)
+        check_path(store, path, s, d)
+        assert path.energy <= energy_budget
+        assert path.distance >= expected.distance
+    assert workspace.generation < 100
+
+
+def test_label_workspace_is_reused_across_queries(store, queries):
+
+    workspace = LabelWorkspace()
+    for s, d, energy_budget in queries[:12]:
+        try:
+            shortest_path_search(
+                store.G, s, d, store.distance_func, store.energy_func, None, energy_budget,
+                workspace=workspace)
+        except NoPathError:
+            continue
+        path = path_info_from_edges(workspace.edges(d), d)
+        check_path(store, path, s, d)
+        assert path == find_path(store.G, s, d, store.distance_func, store.energy_func,
+                                 energy_budget=energy_budget)
+    # node ids are kept from query to query
+    assert len(workspace.labels) <= len(store.G)
+
+
+def test_workspace_pool():
+
+    pool = WorkspacePool(list)
+    with pool.acquire() as first:
+        with pool.acquire() as second:
+            assert first is not second
+    with pool.acquire() as again:
+        assert again is first or again is second
+    assert pool.created == 2
+
+    graph = {"a": ["b"], "b": []}
+    assert workspace_pool(graph) is workspace_pool(graph)
+    assert workspace_pool(dict(graph)) is not workspace_pool(graph)
@@ -0,0 +1,52 @@
+"""
+The answers of the routing service, computed in its workers by solve
+"""
+import json
+
+import pytest
+
+import batch
+import service
+from service import BadRequest, parse_query, solve
+from task3 import *
+
+
+def test_solve(compiled, binding_query, monkeypatch):
+
+    monkeypatch.setattr(batch, "worker_graph", compiled)
+    s, d, energy_budget = binding_query
+
+    status, body = solve("find_path", s, d, energy_budget, 1, "label")
+    assert status == 200
+    assert body["energy"] <= energy_budget and body["nodes"][0] == s
+    assert json.dumps(body)
+
+    assert solve("find_path", s, "nowhere", energy_budget, 1, "rerun")[0] == 404
+    assert solve("find_path_astar", "nowhere", d, energy_budget, 1, "rerun")[0] == 404
+    least_energy = find_path(compiled, s, d, energy_budget=energy_budget, engine="label").energy
+    status, body = solve("find_path", s, d, least_energy / 2, 1, "rerun")
+    assert status == 404 and "budget" in body["error"]
+
+
+def test_solve_does_not_hide_errors(compiled, monkeypatch):
+
+    # only unknown nodes are answered with 404, a failing search is left to answer (500)
+    def broken(*args, **kwargs):
+        raise KeyError("1")
+
+    monkeypatch.setattr(batch, "worker_graph", compiled)
+    monkeypatch.setattr(service, "find_path", broken)
+    with pytest.raises(KeyError):
+        solve("find_path", "1", "2", None, 1, "rerun")
+
+
+def test_parse_query():
+
+    assert parse_query("find_path", b'{"s": 1, "d": "2", "engine": "larac"}') == \
+        ("find_path", "1", "2", 287932, 1, "larac")
+    for body in (b"[1]", b"{", b'{"s": "1"}', b'{"s": "1", "d": "2", "budget": "x"}',
+                 b'{"s": "1", "d": "2", "engine": "fastest"}'):
+        with pytest.raises(BadRequest):
+            parse_query("find_path", body)
+    with pytest.raises(BadRequest):
+        parse_query("find_path_astar", b'{"s": "1", "d": "2", "engine": "label"}')
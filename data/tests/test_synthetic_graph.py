@@ -0,0 +1,41 @@
+"""
+The RoadGrid generator: reproducible, and the same graph whether written as json or as
+a binary cache
+"""
+import numpy as np
+
+from synthetic_graph import RoadGrid, write_compiled, write_json
+from compiled_graph import CompiledGraph
+from graph_cache import load_graph_cache
+from graph_store import GraphStore
+from conftest import GRID
+
+ARRAYS = ("offsets", "targets", "tails", "dist", "energy", "coords")
+
+
+def test_json_and_binary_cache_agree(compiled, tmp_path):
+
+    graph = load_graph_cache(write_compiled(RoadGrid(**GRID), tmp_path))
+    assert list(graph.labels) == list(compiled.labels)
+    for name in ARRAYS:
+        assert np.array_equal(getattr(graph, name), getattr(compiled, name)), name
+
+    # GraphStore reads a folder holding only the binary cache
+    assert GraphStore(tmp_path).compiled.num_arcs == compiled.num_arcs
+
+
+def test_seed_decides_the_graph(compiled, tmp_path):
+
+    write_json(RoadGrid(**GRID), tmp_path / "same")
+    assert np.array_equal(CompiledGraph.from_json(tmp_path / "same").dist, compiled.dist)
+
+    write_json(RoadGrid(**dict(GRID, seed=GRID["seed"] + 1)), tmp_path / "other")
+    other = CompiledGraph.from_json(tmp_path / "other")
+    assert other.num_nodes == compiled.num_nodes
+    assert not np.array_equal(other.dist, compiled.dist)
+
+
+def test_with_nodes():
+
+    grid = RoadGrid.with_nodes(1000, seed=1)
+    assert abs(grid.num_nodes - 1000) <= 2 * max(grid.width, grid.height)
@@ -0,0 +1,29 @@
+"""
+Task 1 and the lazy GraphStore it reads its data from
+"""
+import pytest
+
+from graph_store import GraphStore
+from task1 import dijkstra_task1
+from reference import dijkstra, path_weights
+
+
+def test_task1(store, queries):
+
+    for s, d, _ in queries[::3]:
+        distance, _ = dijkstra(store, s, d)
+        nodes, found, energy = dijkstra_task1(store.G, s, d, store=store, verbose=False)
+        assert found == pytest.approx(distance)
+        assert nodes[0] == s and nodes[-1] == d
+        assert (found, energy) == path_weights(store, nodes)
+
+
+def test_graph_store_is_lazy_and_shared(grid_folder):
+
+    store = GraphStore.get(grid_folder)
+    assert GraphStore.get(str(grid_folder)) is store
+
+    fresh = GraphStore(grid_folder)
+    assert fresh._data == {}
+    assert fresh.Dist == store.Dist
+    assert list(fresh._data) == ["Dist"]